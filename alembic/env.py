@@ -1,4 +1,7 @@
 from app.models.task import Task
+from app.models.outbox import OutboxEvent
+from app.models.processed_event import ProcessedEvent
+from app.models.projection import TaskActivity, TaskDailyStats, TaskStatusCount
 from app.core.database import Base
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config
@@ -0,0 +1,55 @@
+"""create tasks table
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases bootstrapped by Base.metadata.create_all already have the table
+    if not op.get_context().as_sql and sa.inspect(op.get_bind()).has_table("tasks"):
+        return
+
+    op.create_table(
+        "tasks",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("titulo", sa.String(length=200), nullable=False),
+        sa.Column("descricao", sa.Text(), nullable=True),
+        sa.Column(
+            "status",
+            sa.Enum("PENDING", "COMPLETED", name="taskstatus"),
+            nullable=False,
+        ),
+        sa.Column(
+            "data_criacao",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=True,
+        ),
+        sa.Column(
+            "data_atualizacao",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_tasks_id"), "tasks", ["id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_tasks_id"), table_name="tasks")
+    op.drop_table("tasks")
+    sa.Enum(name="taskstatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,67 @@
+"""full-text search over task titulo/descricao
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:01.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        # Generated column: PostgreSQL keeps it current on every write
+        op.execute(
+            "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('portuguese', "
+            "coalesce(titulo, '') || ' ' || coalesce(descricao, ''))) STORED"
+        )
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector "
+            "ON tasks USING GIN (search_vector)"
+        )
+    elif dialect == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+            "titulo, descricao, content='tasks', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+            "INSERT INTO tasks_fts(rowid, titulo, descricao) "
+            "VALUES (new.id, new.titulo, new.descricao); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+            "INSERT INTO tasks_fts(tasks_fts, rowid, titulo, descricao) "
+            "VALUES ('delete', old.id, old.titulo, old.descricao); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS tasks_fts_au "
+            "AFTER UPDATE OF titulo, descricao ON tasks BEGIN "
+            "INSERT INTO tasks_fts(tasks_fts, rowid, titulo, descricao) "
+            "VALUES ('delete', old.id, old.titulo, old.descricao); "
+            "INSERT INTO tasks_fts(rowid, titulo, descricao) "
+            "VALUES (new.id, new.titulo, new.descricao); END"
+        )
+        # Index the rows that existed before the triggers
+        op.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_tasks_search_vector")
+        op.execute("ALTER TABLE tasks DROP COLUMN IF EXISTS search_vector")
+    elif dialect == "sqlite":
+        for trigger in ("tasks_fts_ai", "tasks_fts_ad", "tasks_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS tasks_fts")
@@ -0,0 +1,52 @@
+"""outbox table for task events
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:02.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases bootstrapped by Base.metadata.create_all already have the table
+    if not op.get_context().as_sql and sa.inspect(op.get_bind()).has_table(
+        "outbox_events"
+    ):
+        return
+
+    op.create_table(
+        "outbox_events",
+        sa.Column(
+            "id",
+            sa.BigInteger().with_variant(sa.Integer(), "sqlite"),
+            nullable=False,
+        ),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("event_type", sa.String(length=50), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_outbox_events_task_id"), "outbox_events", ["task_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_outbox_events_task_id"), table_name="outbox_events")
+    op.drop_table("outbox_events")
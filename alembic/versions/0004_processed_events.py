@@ -0,0 +1,50 @@
+"""processed_events table for consumer deduplication
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:03.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases bootstrapped by Base.metadata.create_all already have the table
+    if not op.get_context().as_sql and sa.inspect(op.get_bind()).has_table(
+        "processed_events"
+    ):
+        return
+
+    op.create_table(
+        "processed_events",
+        sa.Column("event_id", sa.String(length=64), nullable=False),
+        sa.Column(
+            "processed_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("event_id"),
+    )
+    op.create_index(
+        op.f("ix_processed_events_processed_at"),
+        "processed_events",
+        ["processed_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_processed_events_processed_at"), table_name="processed_events"
+    )
+    op.drop_table("processed_events")
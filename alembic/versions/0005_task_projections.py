@@ -0,0 +1,55 @@
+"""dashboard projection tables
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:04.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases bootstrapped by Base.metadata.create_all already have the tables
+    if not op.get_context().as_sql and sa.inspect(op.get_bind()).has_table(
+        "task_status_counts"
+    ):
+        return
+
+    op.create_table(
+        "task_status_counts",
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("status"),
+    )
+    op.create_table(
+        "task_daily_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("created", sa.Integer(), nullable=False),
+        sa.Column("completed", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day"),
+    )
+    op.create_table(
+        "task_activity",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("event_type", sa.String(length=50), nullable=False),
+        sa.Column("titulo", sa.String(length=200), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=True),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("task_activity")
+    op.drop_table("task_daily_stats")
+    op.drop_table("task_status_counts")
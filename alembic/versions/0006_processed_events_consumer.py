@@ -0,0 +1,51 @@
+"""namespace processed_events by consumer
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:05.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases bootstrapped by Base.metadata.create_all already have the column
+    if not op.get_context().as_sql and "consumer" in {
+        column["name"]
+        for column in sa.inspect(op.get_bind()).get_columns("processed_events")
+    }:
+        return
+
+    # Ids recorded so far are the task_events consumer's
+    with op.batch_alter_table("processed_events") as batch_op:
+        # SQLite's primary key is unnamed; batch mode recreates the table there
+        batch_op.add_column(
+            sa.Column(
+                "consumer",
+                sa.String(length=255),
+                server_default="task_events",
+                nullable=False,
+            )
+        )
+        if op.get_context().dialect.name != "sqlite":
+            batch_op.drop_constraint("processed_events_pkey", type_="primary")
+        batch_op.create_primary_key("processed_events_pkey", ["consumer", "event_id"])
+
+
+def downgrade() -> None:
+    # Other consumers' ids would collide with the task_events ones
+    op.execute("DELETE FROM processed_events WHERE consumer <> 'task_events'")
+    with op.batch_alter_table("processed_events") as batch_op:
+        if op.get_context().dialect.name != "sqlite":
+            batch_op.drop_constraint("processed_events_pkey", type_="primary")
+        batch_op.create_primary_key("processed_events_pkey", ["event_id"])
+        batch_op.drop_column("consumer")
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_read_db
+from app.repositories.projection_repository import ProjectionRepository
+from app.schemas.dashboard import (
+    ActivityResponse,
+    DailyStatsResponse,
+    StatusCountsResponse,
+)
+
+# Served from the projections the task event consumer maintains: no query here
+# scans the tasks table, and results lag the writes by the consumer's delay
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+
+@router.get("/status", response_model=StatusCountsResponse)
+def get_status_counts(db: Session = Depends(get_read_db)):
+    """Quantidade de tarefas por status"""
+    counts = ProjectionRepository(db).status_counts()
+    return StatusCountsResponse(total=sum(counts.values()), counts=counts)
+
+
+@router.get("/daily", response_model=List[DailyStatsResponse])
+def get_daily_stats(
+    days: int = Query(30, ge=1, le=366), db: Session = Depends(get_read_db)
+):
+    """Tarefas criadas e concluídas por dia (UTC) nos últimos `days` dias"""
+    since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    return ProjectionRepository(db).daily_stats(since)
+
+
+@router.get("/activity", response_model=List[ActivityResponse])
+def get_recent_activity(
+    limit: int = Query(20, ge=1, le=settings.projection_activity_size),
+    db: Session = Depends(get_read_db),
+):
+    """Eventos mais recentes das tarefas, do mais novo ao mais antigo"""
+    return ProjectionRepository(db).recent_activity(limit)
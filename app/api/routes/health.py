@@ -2,7 +2,20 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import (
+    async_engine,
+    async_read_engine,
+    engine,
+    get_db,
+    get_read_db,
+    read_engine,
+)
+from app.core.pool import pool_status
+from app.repositories.outbox_repository import OutboxRepository
+from app.services.async_rabbitmq_service import async_rabbitmq_service
+from app.services.rabbitmq_service import rabbitmq_service
+from app.services.task_cache import task_cache
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -14,10 +27,48 @@ def health_check():
 
 
 @router.get("/db")
-def health_check_db(db: Session = Depends(get_db)):
+def health_check_db(db: Session = Depends(get_read_db)):
     """Database health check"""
     try:
         db.execute(text("SELECT 1"))
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
         return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
+
+
+@router.get("/pool")
+def health_check_pool():
+    """Connection pool statistics for this worker process"""
+    pools = {"primary": pool_status(engine)}
+    if read_engine is not None:
+        pools["replica"] = pool_status(read_engine)
+    if async_engine is not None:
+        pools["async"] = pool_status(async_engine.sync_engine)
+    if async_read_engine is not None:
+        pools["async_replica"] = pool_status(async_read_engine.sync_engine)
+    return pools
+
+
+@router.get("/cache")
+def health_check_cache():
+    """Task cache statistics for this worker process"""
+    return task_cache.stats()
+
+
+@router.get("/outbox")
+def health_check_outbox(db: Session = Depends(get_db)):
+    """Task events written to the outbox and not yet published by the relay"""
+    pending, lag_seconds = OutboxRepository(db).lag()
+    return {
+        "enabled": settings.task_events_outbox,
+        "pending": pending,
+        "lag_seconds": round(lag_seconds, 3),
+    }
+
+
+@router.get("/publisher")
+def health_check_publisher():
+    """Task event publisher throughput, buffer and circuit breaker for this worker"""
+    if settings.database_async:
+        return async_rabbitmq_service.stats()
+    return rabbitmq_service.stats()
@@ -1,60 +1,354 @@
-from typing import List
+import inspect
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
-from app.schemas.task import TaskCreate, TaskResponse, TaskUpdate
-from app.services.task_service import TaskService
+from app.core.config import settings
+from app.core.database import (
+    get_async_db,
+    get_async_read_db,
+    get_async_read_sessionmaker,
+    get_db,
+    get_read_db,
+    get_read_sessionmaker,
+    stick_to_primary,
+)
+from app.core.etag import CACHE_CONTROL, etag_matches, not_modified
+from app.core.export import EXPORT_MEDIA_TYPES, ExportFormat
+from app.core.media import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    negotiate,
+    packb,
+    variant_etag,
+)
+from app.core.pagination import InvalidCursorError
+from app.schemas.task import (
+    TASK_FIELDS,
+    InvalidFieldsError,
+    TaskBatchCreate,
+    TaskCreate,
+    TaskResponse,
+    TaskUpdate,
+    parse_task_fields,
+)
+from app.services.async_task_service import AsyncTaskService
+from app.services.task_service import TaskService, task_etag
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 
-@router.post("/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
-def create_task(task_data: TaskCreate, db: Session = Depends(get_db)):
+def get_task_service(
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+    async_db: AsyncSession = Depends(get_async_db),
+    async_read_db: AsyncSession = Depends(get_async_read_db),
+) -> Union[TaskService, AsyncTaskService]:
+    """Pick the sync or the asyncio service according to `DATABASE_ASYNC`"""
+    # Sessions are lazy: the unused ones never check out a connection
+    if settings.database_async:
+        return AsyncTaskService(async_db, async_read_db)
+    return TaskService(db, read_db)
+
+
+async def run_service(method, *args, **kwargs):
+    """Await asyncio service methods; run blocking ones in the threadpool"""
+    if inspect.iscoroutinefunction(method):
+        return await method(*args, **kwargs)
+    return await run_in_threadpool(method, *args, **kwargs)
+
+
+def get_media_type(accept: Optional[str] = Header(None)) -> str:
+    """JSON, or MessagePack for clients that ask for `application/msgpack`"""
+    return negotiate(accept)
+
+
+def encoded_response(
+    body: bytes, headers: Dict[str, str], media_type: str = JSON_MEDIA_TYPE
+) -> Response:
+    """Send a body the service already serialized, skipping `response_model`"""
+    return Response(
+        content=body, media_type=media_type, headers={**headers, "Vary": "Accept"}
+    )
+
+
+def msgpack_response(
+    content: Union[TaskResponse, List[TaskResponse]],
+    status_code: int = status.HTTP_200_OK,
+    headers: Optional[Dict[str, str]] = None,
+    response: Optional[Response] = None,
+) -> Response:
+    """Encode what a route would return through `response_model` as MessagePack
+
+    `response` is the route's sub-response: the headers and cookies dependencies
+    set on it (`stick_to_primary`'s cookie) are carried over, as FastAPI would.
+    """
+    if isinstance(content, list):
+        data: Union[dict, list] = [task.model_dump() for task in content]
+    else:
+        data = content.model_dump()
+    encoded = Response(
+        content=packb(data),
+        status_code=status_code,
+        media_type=MSGPACK_MEDIA_TYPE,
+        headers={**(headers or {}), "Vary": "Accept"},
+    )
+    if response is not None:
+        encoded.headers.raw.extend(response.headers.raw)
+    return encoded
+
+
+def get_task_fields(
+    fields: Optional[str] = Query(
+        None,
+        description="Campos a retornar, separados por vírgula (ex.: id,titulo,status)",
+    ),
+) -> Optional[Tuple[str, ...]]:
+    """Validate `?fields=` against the `TaskResponse` field names"""
+    try:
+        return parse_task_fields(fields)
+    except InvalidFieldsError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Campos inválidos: {', '.join(exc.unknown) or '(nenhum)'}. "
+                f"Permitidos: {', '.join(TASK_FIELDS)}"
+            ),
+        ) from None
+
+
+@router.post(
+    "/",
+    response_model=TaskResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(stick_to_primary)],
+)
+async def create_task(
+    task_data: TaskCreate,
+    response: Response,
+    media_type: str = Depends(get_media_type),
+    service=Depends(get_task_service),
+):
     """Criar uma nova tarefa"""
-    service = TaskService(db)
-    return service.create_task(task_data)
+    task = await run_service(service.create_task, task_data)
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack_response(task, status.HTTP_201_CREATED, response=response)
+    return task
+
+
+@router.post(
+    "/batch",
+    response_model=List[TaskResponse],
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(stick_to_primary)],
+)
+async def create_tasks(
+    tasks_data: TaskBatchCreate,
+    response: Response,
+    media_type: str = Depends(get_media_type),
+    service=Depends(get_task_service),
+):
+    """Criar várias tarefas de uma vez
+
+    Aceita até `TASK_BATCH_MAX_SIZE` tarefas (1000 por padrão). A operação é
+    atômica: se qualquer item for inválido, a resposta é 422 indicando o índice
+    do item e nenhuma tarefa é criada.
+    """
+    tasks = await run_service(service.create_tasks, tasks_data)
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack_response(tasks, status.HTTP_201_CREATED, response=response)
+    return tasks
 
 
 @router.get("/", response_model=List[TaskResponse])
-def get_tasks(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Listar todas as tarefas"""
-    service = TaskService(db)
-    return service.get_all_tasks(skip=skip, limit=limit)
+async def get_tasks(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[Tuple[str, ...]] = Depends(get_task_fields),
+    media_type: str = Depends(get_media_type),
+    if_none_match: Optional[str] = Header(None),
+    service=Depends(get_task_service),
+):
+    """Listar todas as tarefas
+
+    Use o cabeçalho `X-Next-Cursor` da resposta como `cursor` para obter a
+    próxima página (paginação por keyset, sem custo de `skip`). Envie o `ETag`
+    recebido em `If-None-Match` para receber 304 se a página não mudou.
+    Com `fields`, cada tarefa traz apenas os campos pedidos e só essas colunas
+    são lidas do banco. Envie `Accept: application/msgpack` para receber
+    MessagePack em vez de JSON (vale para todas as rotas de tarefas).
+    """
+    try:
+        # Computed before the page is read, so it is never newer than the body
+        etag = await run_service(
+            service.get_tasks_page_etag,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            fields=fields,
+        )
+        etag = variant_etag(etag, media_type)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        body, next_cursor = await run_service(
+            service.get_tasks_page_json,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            fields=fields,
+            media_type=media_type,
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido"
+        ) from None
+
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return encoded_response(body, headers, media_type)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_tasks(
+    format: ExportFormat = ExportFormat.NDJSON,
+    session_factory=Depends(get_read_sessionmaker),
+    async_session_factory=Depends(get_async_read_sessionmaker),
+):
+    """Exportar todas as tarefas em NDJSON ou CSV
+
+    A resposta é enviada em streaming, em blocos de `TASK_EXPORT_CHUNK_SIZE`
+    linhas, sem carregar a tabela inteira em memória.
+    """
+    chunks: Union[Iterator[str], AsyncIterator[str]]
+    if settings.database_async:
+        chunks = AsyncTaskService.stream_export(async_session_factory, format)
+    else:
+        chunks = TaskService.stream_export(session_factory, format)
+
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format.value}"'},
+    )
+
+
+@router.get("/search", response_model=List[TaskResponse])
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    media_type: str = Depends(get_media_type),
+    service=Depends(get_task_service),
+):
+    """Buscar tarefas por texto no título e na descrição
+
+    Resultados ordenados por relevância; use `X-Next-Cursor` como `cursor`
+    para a próxima página.
+    """
+    try:
+        body, next_cursor = await run_service(
+            service.search_tasks_json,
+            q,
+            limit=limit,
+            cursor=cursor,
+            media_type=media_type,
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido"
+        ) from None
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return encoded_response(body, headers, media_type)
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
-def get_task(task_id: int, db: Session = Depends(get_db)):
-    """Obter uma tarefa específica"""
-    service = TaskService(db)
-    task = service.get_task(task_id)
+async def get_task(
+    task_id: int,
+    response: Response,
+    fields: Optional[Tuple[str, ...]] = Depends(get_task_fields),
+    media_type: str = Depends(get_media_type),
+    if_none_match: Optional[str] = Header(None),
+    service=Depends(get_task_service),
+):
+    """Obter uma tarefa específica
+
+    Com `fields`, a resposta traz apenas os campos pedidos.
+    """
+    if if_none_match:
+        etag = await run_service(service.get_task_etag, task_id, fields)
+        if etag is not None:
+            etag = variant_etag(etag, media_type)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
+    if fields is not None:
+        result = await run_service(service.get_task_fields, task_id, fields, media_type)
+        if result is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Tarefa não encontrada"
+            )
+        body, etag = result
+        headers = {
+            "ETag": variant_etag(etag, media_type),
+            "Cache-Control": CACHE_CONTROL,
+        }
+        return encoded_response(body, headers, media_type)
+
+    task = await run_service(service.get_task, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Tarefa não encontrada"
         )
+    headers = {
+        "ETag": variant_etag(task_etag(task), media_type),
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Accept",
+    }
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack_response(task, headers=headers)
+    response.headers.update(headers)
     return task
 
 
-@router.put("/{task_id}", response_model=TaskResponse)
+@router.put(
+    "/{task_id}",
+    response_model=TaskResponse,
+    dependencies=[Depends(stick_to_primary)],
+)
 async def update_task(
-    task_id: int, task_data: TaskUpdate, db: Session = Depends(get_db)
+    task_id: int,
+    task_data: TaskUpdate,
+    response: Response,
+    media_type: str = Depends(get_media_type),
+    service=Depends(get_task_service),
 ):
     """Atualizar uma tarefa"""
-    service = TaskService(db)
-    task = await service.update_task(task_id, task_data)
+    task = await run_service(service.update_task, task_id, task_data)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Tarefa não encontrada"
         )
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack_response(task, response=response)
     return task
 
 
-@router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(task_id: int, db: Session = Depends(get_db)):
+@router.delete(
+    "/{task_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(stick_to_primary)],
+)
+async def delete_task(task_id: int, service=Depends(get_task_service)):
     """Deletar uma tarefa"""
-    service = TaskService(db)
-    success = service.delete_task(task_id)
+    success = await run_service(service.delete_task, task_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Tarefa não encontrada"
@@ -0,0 +1,117 @@
+"""Inspect and replay task events parked in the dead-letter queue.
+
+Usage:
+    python -m app.commands.dead_letters [--queue task_events] list [--limit 20]
+    python -m app.commands.dead_letters [--queue task_events] replay [--limit N]
+
+``list`` prints the oldest dead-lettered events as JSON lines (attempts, last
+error, event) and leaves them in the queue. ``replay`` moves events back into
+the consumer queue they failed in (``--queue``) with their attempts reset,
+oldest first, once the fix for whatever made them fail is deployed; without
+``--limit`` it replays the whole queue.
+"""
+
+import argparse
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+import pika
+from pika.adapters.blocking_connection import BlockingChannel
+
+from app.consumers.retry import (
+    ATTEMPTS_HEADER,
+    ERROR_HEADER,
+    dead_letter_queue,
+    declare_retry_topology,
+    replay,
+)
+from app.core.config import settings
+from app.services.rabbitmq_service import (
+    TASK_EVENTS_QUEUE,
+    declare_task_events,
+    decode_event,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class DeadLetters:
+    def __init__(self, channel: BlockingChannel, queue: str = TASK_EVENTS_QUEUE):
+        self.channel = channel
+        self.queue = queue
+
+    def browse(self, limit: int) -> List[Dict[str, Any]]:
+        """Peek at up to ``limit`` events, returning them all to the queue."""
+        entries: List[Dict[str, Any]] = []
+        last_tag = None
+        while len(entries) < limit:
+            method, properties, body = self.channel.basic_get(
+                dead_letter_queue(self.queue)
+            )
+            if method is None:
+                break
+            last_tag = method.delivery_tag
+            headers = properties.headers or {}
+            try:
+                event: Any = decode_event(body, properties.content_type)
+            except ValueError:
+                event = body.decode(errors="replace")
+            entries.append(
+                {
+                    "attempts": headers.get(ATTEMPTS_HEADER),
+                    "error": headers.get(ERROR_HEADER),
+                    "event": event,
+                }
+            )
+        if last_tag is not None:
+            self.channel.basic_nack(delivery_tag=last_tag, multiple=True, requeue=True)
+        return entries
+
+    def replay(self, limit: Optional[int] = None) -> int:
+        """Move up to ``limit`` events (all by default) back to the work queue."""
+        replayed = 0
+        while limit is None or replayed < limit:
+            method, properties, body = self.channel.basic_get(
+                dead_letter_queue(self.queue)
+            )
+            if method is None:
+                break
+            replay(self.channel, body, properties, self.queue)
+            self.channel.basic_ack(delivery_tag=method.delivery_tag)
+            replayed += 1
+        return replayed
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--queue", default=TASK_EVENTS_QUEUE, help="consumer queue the events failed in"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="print dead-lettered events")
+    list_parser.add_argument("--limit", type=int, default=20)
+    replay_parser = commands.add_parser("replay", help="requeue dead-lettered events")
+    replay_parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    connection = pika.BlockingConnection(pika.URLParameters(settings.rabbitmq_url))
+    try:
+        channel = connection.channel()
+        declare_task_events(channel)
+        declare_retry_topology(channel, queue=args.queue)
+        # A replayed event is acked here only once the broker confirmed it
+        channel.confirm_delivery()
+        dead_letters = DeadLetters(channel, args.queue)
+        if args.command == "list":
+            for entry in dead_letters.browse(args.limit):
+                print(json.dumps(entry, default=str))
+        else:
+            logger.info(f"Replayed {dead_letters.replay(args.limit)} events")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
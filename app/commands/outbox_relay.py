@@ -0,0 +1,175 @@
+"""Publish task events from the outbox table to RabbitMQ.
+
+Usage:
+    python -m app.commands.outbox_relay [--batch-size 500] [--poll-seconds 1]
+        [--once]
+
+Events are read in ``id`` order, ``--batch-size`` per transaction, published
+with publisher confirms and deleted once RabbitMQ has confirmed them. A batch
+stops at the first event the broker refuses, so a task's events are never
+published out of order; the rest is retried on the next poll. Delivery is
+at-least-once: a crash between the confirm and the delete republishes events.
+Run one relay per database (see ``OutboxRepository.fetch_batch``).
+"""
+
+import argparse
+import logging
+import signal
+import threading
+from typing import Any, Dict, List, Optional
+
+import pika
+from pika.adapters.blocking_connection import BlockingChannel
+from pika.exceptions import NackError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repositories.outbox_repository import OutboxRepository
+from app.services.rabbitmq_service import (
+    TASK_EVENTS_TOPIC_EXCHANGE,
+    declare_task_events,
+    routing_key_from_body,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROPERTIES = pika.BasicProperties(delivery_mode=2, content_type="application/json")
+
+
+class OutboxRelay:
+    def __init__(
+        self,
+        batch_size: int = settings.outbox_batch_size,
+        poll_seconds: float = settings.outbox_poll_seconds,
+        session_factory: sessionmaker = SessionLocal,
+    ):
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.session_factory = session_factory
+        self.connection: Optional[pika.BlockingConnection] = None
+        self.channel: Optional[BlockingChannel] = None
+        self._stopping = threading.Event()
+        self.published = 0
+        self.refused = 0
+        self.batches = 0
+        self.pending = 0
+        self.lag_seconds = 0.0
+
+    def connect(self) -> BlockingChannel:
+        self.connection = pika.BlockingConnection(
+            pika.URLParameters(settings.rabbitmq_url)
+        )
+        self.channel = self.connection.channel()
+        declare_task_events(self.channel)
+        # From here on basic_publish waits for the broker's ack and raises on nack
+        self.channel.confirm_delivery()
+        logger.info("Outbox relay connected to RabbitMQ")
+        return self.channel
+
+    def relay_batch(self) -> int:
+        """Publish the oldest batch of events; returns how many were confirmed."""
+        channel = self.channel or self.connect()
+
+        with self.session_factory() as db:
+            outbox = OutboxRepository(db)
+            confirmed: List[int] = []
+            try:
+                for event in outbox.fetch_batch(self.batch_size):
+                    try:
+                        channel.basic_publish(
+                            exchange=TASK_EVENTS_TOPIC_EXCHANGE,
+                            routing_key=routing_key_from_body(event.body),
+                            body=event.body,
+                            properties=PROPERTIES,
+                        )
+                    except NackError:
+                        self.refused += 1
+                        logger.warning(
+                            f"RabbitMQ refused outbox event {event.id} "
+                            f"(task {event.task_id}); retrying on the next poll"
+                        )
+                        break
+                    confirmed.append(event.id)
+            finally:
+                # Whatever was confirmed is gone, even if the connection dropped
+                outbox.delete(confirmed)
+            self.pending, self.lag_seconds = outbox.lag()
+
+        self.batches += 1
+        self.published += len(confirmed)
+        if confirmed:
+            logger.info(
+                f"Published {len(confirmed)} outbox events; {self.pending} "
+                f"pending, oldest {self.lag_seconds:.1f}s old"
+            )
+        return len(confirmed)
+
+    def run(self):
+        """Relay until ``stop``: back to back while behind, else every poll."""
+        while not self._stopping.is_set():
+            try:
+                relayed = self.relay_batch()
+            except Exception as e:
+                logger.error(f"Outbox relay failed: {e}")
+                self.close()
+                relayed = 0
+            if relayed < self.batch_size:
+                self._stopping.wait(self.poll_seconds)
+        self.close()
+
+    def drain(self) -> int:
+        """Relay until the outbox is empty or the broker refuses an event."""
+        total = 0
+        while relayed := self.relay_batch():
+            total += relayed
+            if relayed < self.batch_size:
+                break
+        return total
+
+    def stop(self):
+        self._stopping.set()
+
+    def close(self):
+        if self.connection and self.connection.is_open:
+            self.connection.close()
+        self.connection = None
+        self.channel = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "published": self.published,
+            "refused": self.refused,
+            "batches": self.batches,
+            "pending": self.pending,
+            "lag_seconds": round(self.lag_seconds, 3),
+        }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=settings.outbox_batch_size)
+    parser.add_argument(
+        "--poll-seconds", type=float, default=settings.outbox_poll_seconds
+    )
+    parser.add_argument(
+        "--once", action="store_true", help="drain the outbox once and exit"
+    )
+    args = parser.parse_args(argv)
+
+    relay = OutboxRelay(args.batch_size, args.poll_seconds)
+    if args.once:
+        relay.drain()
+        relay.close()
+    else:
+        signal.signal(signal.SIGTERM, lambda signum, frame: relay.stop())
+        try:
+            relay.run()
+        except KeyboardInterrupt:
+            relay.close()
+    logger.info(f"Outbox relay stopped: {relay.stats()}")
+
+
+if __name__ == "__main__":
+    main()
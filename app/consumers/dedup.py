@@ -0,0 +1,112 @@
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Collection, Dict, Optional, Set
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repositories.processed_event_repository import ProcessedEventRepository
+from app.services.rabbitmq_service import TASK_EVENTS_QUEUE
+
+logger = logging.getLogger(__name__)
+
+
+class EventDeduplicator:
+    """Remembers handled event ids so redelivered events can be skipped.
+
+    Ids are namespaced by ``consumer``, the queue read: consumers of other
+    queues handle the same events on their own. Lookups go to a per-consumer
+    LRU first and only its misses reach the
+    ``processed_events`` table, in one query per batch. Ids are written to both
+    once handled; rows older than ``ttl_seconds`` are deleted every
+    ``compact_seconds``. The store is best effort: if the database fails, the
+    LRU alone answers and events may be handled twice, as without it.
+    """
+
+    def __init__(
+        self,
+        consumer: str = TASK_EVENTS_QUEUE,
+        cache_size: int = settings.consumer_dedup_cache_size,
+        ttl_seconds: float = settings.consumer_dedup_ttl_seconds,
+        compact_seconds: float = settings.consumer_dedup_compact_seconds,
+        session_factory: sessionmaker = SessionLocal,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.consumer = consumer
+        self.cache = TTLCache(cache_size, ttl_seconds, clock=clock)
+        self.ttl_seconds = ttl_seconds
+        self.compact_seconds = compact_seconds
+        self.session_factory = session_factory
+        self._clock = clock
+        self._next_compaction = clock()
+        self.lookups = 0
+        self.cache_hits = 0
+        self.db_hits = 0
+        self.compacted = 0
+
+    def seen(self, event_ids: Collection[str]) -> Set[str]:
+        """The subset of ``event_ids`` that was already handled."""
+        self.lookups += len(event_ids)
+        cached = {event_id for event_id in event_ids if self.cache.get(event_id)}
+        self.cache_hits += len(cached)
+        misses = [event_id for event_id in event_ids if event_id not in cached]
+        if not misses:
+            return cached
+        try:
+            with self.session_factory() as db:
+                stored = ProcessedEventRepository(db, self.consumer).seen(misses)
+        except Exception as e:
+            logger.error(f"Dedup lookup failed, using the LRU only: {e}")
+            return cached
+        self.db_hits += len(stored)
+        for event_id in stored:
+            self.cache.set(event_id, True)
+        return cached | stored
+
+    def mark(self, event_ids: Collection[str], recorded: Collection[str] = ()):
+        """Record ``event_ids`` as handled.
+
+        Ids in ``recorded`` are already in the table (the handler wrote them in
+        its own transaction) and only go to the LRU.
+        """
+        for event_id in event_ids:
+            self.cache.set(event_id, True)
+        missing = [event_id for event_id in event_ids if event_id not in recorded]
+        compact = self._clock() >= self._next_compaction
+        if not missing and not compact:
+            return
+        try:
+            with self.session_factory() as db:
+                repository = ProcessedEventRepository(db, self.consumer)
+                if missing:
+                    repository.add(missing)
+                    db.commit()
+                if compact:
+                    self._next_compaction = self._clock() + self.compact_seconds
+                    cutoff = datetime.now(timezone.utc) - timedelta(
+                        seconds=self.ttl_seconds
+                    )
+                    self.compacted += repository.compact(cutoff)
+        except Exception as e:
+            logger.error(f"Failed to record processed events: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        duplicates = self.cache_hits + self.db_hits
+        return {
+            "lookups": self.lookups,
+            "duplicates": duplicates,
+            "hit_rate": round(duplicates / self.lookups, 4) if self.lookups else 0.0,
+            "cache_hits": self.cache_hits,
+            "db_hits": self.db_hits,
+            "compacted": self.compacted,
+        }
+
+
+def make_deduplicator(
+    consumer: str = TASK_EVENTS_QUEUE,
+) -> Optional[EventDeduplicator]:
+    """The deduplicator for ``consumer``, or None when ``CONSUMER_DEDUP`` is off."""
+    return EventDeduplicator(consumer) if settings.consumer_dedup else None
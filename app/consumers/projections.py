@@ -0,0 +1,36 @@
+import logging
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repositories.processed_event_repository import ProcessedEventRepository
+from app.repositories.projection_repository import ProjectionRepository
+from app.services.rabbitmq_service import TASK_EVENTS_QUEUE
+
+logger = logging.getLogger(__name__)
+
+
+def project_events(
+    events: List[Dict[str, Any]], session_factory: sessionmaker = SessionLocal
+) -> List[str]:
+    """Batch handler applying task events to the dashboard projections.
+
+    Runs on the ``task_events`` queue: the events' ids are recorded for its
+    deduplication in the same transaction and returned, so the consumer does
+    not write them again. A batch redelivered to this consumer is thus never
+    counted twice; a consumer racing on the same
+    events can still apply them before either has recorded them.
+    """
+    event_ids = (
+        [message["event_id"] for message in events if message.get("event_id")]
+        if settings.consumer_dedup
+        else []
+    )
+    with session_factory() as db:
+        ProjectionRepository(db).apply(events)
+        ProcessedEventRepository(db, TASK_EVENTS_QUEUE).add(event_ids)
+        db.commit()
+    logger.info(f"Projected {len(events)} events")
+    return event_ids
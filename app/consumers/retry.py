@@ -0,0 +1,127 @@
+"""Delayed retries and dead-lettering for task events that fail to process.
+
+A failed event is republished to the retry queue of its attempt, whose
+``x-message-ttl`` holds it for ``consumer_retry_base_ms * 2 ** (attempt - 1)``
+and then dead-letters it straight back into the queue it came from (not the exchange,
+so other subscribers do not see it twice). The ``x-attempts`` header counts
+the failures; after ``consumer_max_attempts`` the event is parked in the
+queue's ``.dead`` queue (``task_events.dead`` for the ``task_events`` queue),
+as are events that cannot even be decoded. Every consumer queue gets its own
+retry and dead-letter queues, named after it.
+"""
+
+from typing import Any, Dict, Optional
+
+import pika
+
+from app.core.config import settings
+from app.core.media import JSON_MEDIA_TYPE
+from app.services.rabbitmq_service import TASK_EVENTS_QUEUE
+
+ATTEMPTS_HEADER = "x-attempts"
+ERROR_HEADER = "x-last-error"
+
+
+def retry_delay_ms(attempt: int) -> int:
+    """Delay before redelivering an event that failed ``attempt`` times."""
+    return settings.consumer_retry_base_ms * 2 ** (attempt - 1)
+
+
+def retry_queue(delay_ms: int, queue: str = TASK_EVENTS_QUEUE) -> str:
+    return f"{queue}.retry.{delay_ms}"
+
+
+def dead_letter_queue(queue: str = TASK_EVENTS_QUEUE) -> str:
+    return f"{queue}.dead"
+
+
+def declare_retry_topology(
+    channel,
+    max_attempts: int = settings.consumer_max_attempts,
+    queue: str = TASK_EVENTS_QUEUE,
+):
+    """Declare one TTL queue per retry delay and the dead-letter queue."""
+    for attempt in range(1, max_attempts):
+        delay_ms = retry_delay_ms(attempt)
+        channel.queue_declare(
+            queue=retry_queue(delay_ms, queue),
+            durable=True,
+            arguments={
+                "x-message-ttl": delay_ms,
+                "x-dead-letter-exchange": "",
+                "x-dead-letter-routing-key": queue,
+            },
+        )
+    channel.queue_declare(queue=dead_letter_queue(queue), durable=True)
+
+
+def attempts(properties: Optional[pika.BasicProperties]) -> int:
+    headers = getattr(properties, "headers", None) or {}
+    return int(headers.get(ATTEMPTS_HEADER, 0))
+
+
+def _republish(
+    channel,
+    queue: str,
+    body: bytes,
+    properties: Optional[pika.BasicProperties],
+    headers: Dict[str, Any],
+):
+    # The body is unchanged, so is its encoding
+    channel.basic_publish(
+        exchange="",
+        routing_key=queue,
+        body=body,
+        properties=pika.BasicProperties(
+            delivery_mode=2,
+            content_type=getattr(properties, "content_type", None) or JSON_MEDIA_TYPE,
+            headers=headers,
+        ),
+    )
+
+
+def retry_or_dead_letter(
+    channel,
+    body: bytes,
+    properties: Optional[pika.BasicProperties],
+    error: Exception,
+    max_attempts: int = settings.consumer_max_attempts,
+    queue: str = TASK_EVENTS_QUEUE,
+) -> bool:
+    """Send a failed event to its next retry queue; True if dead-lettered instead."""
+    attempt = attempts(properties) + 1
+    headers = dict(getattr(properties, "headers", None) or {})
+    headers[ATTEMPTS_HEADER] = attempt
+    headers[ERROR_HEADER] = f"{type(error).__name__}: {error}"[:500]
+    dead = attempt >= max_attempts
+    target = (
+        dead_letter_queue(queue)
+        if dead
+        else retry_queue(retry_delay_ms(attempt), queue)
+    )
+    _republish(channel, target, body, properties, headers)
+    return dead
+
+
+def dead_letter(
+    channel,
+    body: bytes,
+    properties: Optional[pika.BasicProperties],
+    error: Exception,
+    queue: str = TASK_EVENTS_QUEUE,
+):
+    """Park an event that no retry could fix (e.g. an undecodable body)."""
+    retry_or_dead_letter(channel, body, properties, error, max_attempts=0, queue=queue)
+
+
+def replay(
+    channel,
+    body: bytes,
+    properties: Optional[pika.BasicProperties],
+    queue: str = TASK_EVENTS_QUEUE,
+):
+    """Put a dead-lettered event back into its work queue with fresh attempts."""
+    headers = dict(getattr(properties, "headers", None) or {})
+    headers.pop(ATTEMPTS_HEADER, None)
+    headers.pop(ERROR_HEADER, None)
+    _republish(channel, queue, body, properties, headers)
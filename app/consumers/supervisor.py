@@ -0,0 +1,262 @@
+"""Run task event consumers in several processes and threads.
+
+Usage:
+    python -m app.consumers.supervisor [--workers 2] [--threads 1]
+        [--report-seconds 30] [--grace-seconds 30]
+        [--queue NAME --bind KEY [--bind KEY ...] --handler MODULE:FUNCTION]
+
+Each of the ``--workers`` processes runs ``--threads`` ``TaskEventConsumer``
+threads, every one over its own connection since pika connections cannot be
+shared between threads. A worker exits as soon as one of its consumers dies
+(a lost connection, say) and the supervisor starts it again. On SIGTERM or
+Ctrl+C every consumer stops consuming, handles and acks the batch it holds and
+disconnects, which returns its prefetched messages to the queue; workers still
+running after ``--grace-seconds`` are killed. Every ``--report-seconds`` the
+supervisor logs the message rate of each worker.
+
+Consumers read the ``task_events`` queue, which gets every event, unless
+``--queue`` names a queue of their own: it is bound to the topic exchange for
+the ``--bind`` routing keys only (``task.created``, ``task.updated.#``,
+``task.*.status.concluida``...). Such consumers run the batch handler named by
+``--handler`` (a function taking a list of events, see ``BatchHandler``) and
+deduplicate events apart from the ``task_events`` ones.
+"""
+
+import argparse
+import functools
+import importlib
+import logging
+import multiprocessing
+import signal
+import sys
+import threading
+import time
+from multiprocessing.sharedctypes import Synchronized
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.consumers.dedup import make_deduplicator
+from app.consumers.task_consumer import BatchHandler, TaskEventConsumer
+from app.services.rabbitmq_service import TASK_EVENTS_QUEUE
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+Worker = Callable[[int, int, Synchronized], None]
+
+
+def load_handler(path: str) -> BatchHandler:
+    """The batch handler ``path`` (``module:function``) names."""
+    module, _, name = path.partition(":")
+    if not module or not name:
+        raise ValueError(f"Expected MODULE:FUNCTION, got {path!r}")
+    return getattr(importlib.import_module(module), name)
+
+
+def run_worker(
+    index: int,
+    threads: int,
+    processed: Synchronized,
+    queue: str = TASK_EVENTS_QUEUE,
+    bindings: Sequence[str] = ("#",),
+    handler: Optional[str] = None,
+):
+    """Worker process: run ``threads`` consumers until SIGTERM or a crash.
+
+    ``handler`` is given as ``module:function`` and imported here, in the worker.
+    """
+    # Ctrl+C reaches the whole process group; let the supervisor decide
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+
+    batch_handler = load_handler(handler) if handler else None
+    consumers = [
+        TaskEventConsumer(
+            handler=batch_handler,
+            dedup=make_deduplicator(queue),
+            queue=queue,
+            bindings=bindings,
+        )
+        for _ in range(threads)
+    ]
+    runners = [
+        threading.Thread(target=consumer.start_consuming, name=f"consumer-{n}")
+        for n, consumer in enumerate(consumers)
+    ]
+    for runner in runners:
+        runner.start()
+    while not stopping.is_set() and all(runner.is_alive() for runner in runners):
+        stopping.wait(1)
+        processed.value = sum(consumer.meter.total for consumer in consumers)
+
+    for consumer, runner in zip(consumers, runners, strict=True):
+        if runner.is_alive():
+            consumer.stop()
+    for runner in runners:
+        runner.join()
+    processed.value = sum(consumer.meter.total for consumer in consumers)
+    if not stopping.is_set():
+        logger.error(f"Consumer thread died, stopping worker {index}")
+        sys.exit(1)
+
+
+class ConsumerSupervisor:
+    """Keeps ``workers`` consumer processes running and reports their rates."""
+
+    def __init__(
+        self,
+        workers: int,
+        threads: int,
+        grace_seconds: float = 30.0,
+        restart_seconds: float = 1.0,
+        target: Worker = run_worker,
+    ):
+        self.threads = threads
+        self.grace_seconds = grace_seconds
+        self.restart_seconds = restart_seconds
+        self.target = target
+        self.processes: List[Optional[multiprocessing.Process]] = [None] * workers
+        self.processed = [multiprocessing.Value("q", 0) for _ in range(workers)]
+        self.restarts = [0] * workers
+        self._restart_at = [0.0] * workers
+        self._last_report = (time.monotonic(), [0] * workers)
+        self._stopping = threading.Event()
+
+    def spawn(self, index: int):
+        self.processed[index].value = 0
+        process = multiprocessing.Process(
+            target=self.target,
+            args=(index, self.threads, self.processed[index]),
+            name=f"consumer-worker-{index}",
+        )
+        process.start()
+        self.processes[index] = process
+        logger.info(f"Started worker {index} (pid {process.pid})")
+
+    def run(self, report_seconds: float = 30.0):
+        for index in range(len(self.processes)):
+            self.spawn(index)
+        next_report = time.monotonic() + report_seconds
+        while not self._stopping.wait(0.2):
+            self.check_workers()
+            if time.monotonic() >= next_report:
+                self.report()
+                next_report += report_seconds
+        self.shutdown()
+
+    def check_workers(self):
+        """Restart, after ``restart_seconds``, the workers that exited."""
+        now = time.monotonic()
+        for index, process in enumerate(self.processes):
+            if process is None or process.is_alive():
+                continue
+            if not self._restart_at[index]:
+                logger.error(
+                    f"Worker {index} (pid {process.pid}) exited with code "
+                    f"{process.exitcode}, restarting"
+                )
+                self._restart_at[index] = now + self.restart_seconds
+            elif now >= self._restart_at[index]:
+                self._restart_at[index] = 0.0
+                self.restarts[index] += 1
+                self.spawn(index)
+
+    def stop(self):
+        self._stopping.set()
+
+    def shutdown(self):
+        """SIGTERM every worker so it drains, then kill those past the grace period."""
+        alive = [p for p in self.processes if p is not None and p.is_alive()]
+        for process in alive:
+            process.terminate()
+        deadline = time.monotonic() + self.grace_seconds
+        for process in alive:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.error(f"Worker pid {process.pid} did not drain in time, killing")
+                process.kill()
+                process.join()
+        self.report()
+
+    def rates(self) -> List[Dict[str, Any]]:
+        """Per-worker totals and message rates since the previous call."""
+        now = time.monotonic()
+        since, previous = self._last_report
+        totals = [counter.value for counter in self.processed]
+        elapsed = now - since
+        self._last_report = (now, totals)
+        return [
+            {
+                "worker": index,
+                "pid": process.pid if process is not None else None,
+                "processed": total,
+                # A restarted worker starts counting from zero again
+                "per_second": (
+                    round(max(total - before, 0) / elapsed, 2) if elapsed > 0 else 0.0
+                ),
+                "restarts": self.restarts[index],
+            }
+            for index, (process, total, before) in enumerate(
+                zip(self.processes, totals, previous, strict=True)
+            )
+        ]
+
+    def report(self):
+        for rate in self.rates():
+            logger.info(
+                f"Worker {rate['worker']} (pid {rate['pid']}): "
+                f"{rate['per_second']} msgs/s, {rate['processed']} processed, "
+                f"{rate['restarts']} restarts"
+            )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2, help="consumer processes")
+    parser.add_argument(
+        "--threads", type=int, default=1, help="consumers (connections) per process"
+    )
+    parser.add_argument("--report-seconds", type=float, default=30.0)
+    parser.add_argument("--grace-seconds", type=float, default=30.0)
+    parser.add_argument("--queue", default=TASK_EVENTS_QUEUE, help="queue to consume")
+    parser.add_argument(
+        "--bind",
+        action="append",
+        metavar="KEY",
+        help="routing key to bind --queue to (repeatable)",
+    )
+    parser.add_argument(
+        "--handler",
+        metavar="MODULE:FUNCTION",
+        help="batch handler of --queue (required with a queue of its own)",
+    )
+    args = parser.parse_args(argv)
+    if args.bind and args.queue == TASK_EVENTS_QUEUE:
+        parser.error("--bind needs a --queue of its own")
+    if args.queue != TASK_EVENTS_QUEUE and not args.handler:
+        parser.error("--queue needs a --handler of its own")
+    if args.handler:
+        try:
+            load_handler(args.handler)
+        except (ImportError, AttributeError, ValueError) as e:
+            parser.error(f"--handler: {e}")
+
+    supervisor = ConsumerSupervisor(
+        args.workers,
+        args.threads,
+        args.grace_seconds,
+        target=functools.partial(
+            run_worker,
+            queue=args.queue,
+            bindings=args.bind or ("#",),
+            handler=args.handler,
+        ),
+    )
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda signum, frame: supervisor.stop())
+    supervisor.run(args.report_seconds)
+    logger.info("Consumer supervisor stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,112 @@
-import json
 import logging
+import threading
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 import pika
+from pika.exceptions import ConnectionWrongStateError
 
+from app.consumers.dedup import EventDeduplicator, make_deduplicator
+from app.consumers.projections import project_events
+from app.consumers.retry import (
+    dead_letter,
+    declare_retry_topology,
+    retry_or_dead_letter,
+)
 from app.core.config import settings
+from app.core.metrics import RateMeter
+from app.services.rabbitmq_service import (
+    TASK_EVENTS_QUEUE,
+    bind_task_events,
+    declare_task_events,
+    decode_event,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Returns the event ids it recorded in processed_events itself, if any
+BatchHandler = Callable[[List[Dict[str, Any]]], Optional[Collection[str]]]
+# (decoded event, properties, raw body) of each message in a batch
+Batch = List[Tuple[Dict[str, Any], Any, bytes]]
+
 
 class TaskEventConsumer:
-    def __init__(self):
+    """Consumes task events in batches and acks each batch at once.
+
+    Messages are collected until ``batch_size`` are waiting or
+    ``batch_timeout_ms`` has passed since the first one, handed together to
+    ``handler`` and acked with a single ``multiple=True`` ack. If the handler
+    raises, the batch is handled again one event at a time and only the events
+    that still fail go to a delayed retry, or to the dead-letter queue once out
+    of attempts (see ``app.consumers.retry``). With a ``dedup`` store, events
+    whose ``event_id`` was already handled are acked without being handled
+    again, and only handled events are recorded; ids the handler returns were
+    recorded by it, in its own transaction, and are not written again. The
+    broker keeps up to
+    ``prefetch_count`` unacked messages in flight, so it should be larger than
+    ``batch_size``. On the ``task_events`` queue the handler defaults to
+    applying the events to the dashboard projections
+    (``app.consumers.projections``).
+
+    Each message is decoded by its ``content_type`` (JSON or MessagePack, see
+    ``decode_event``); encodings and envelope versions it does not know are
+    dead-lettered like any undecodable body.
+
+    By default the consumer reads the ``task_events`` queue, which gets every
+    event. A consumer given its own ``queue`` declares it durable and binds it
+    to the topic exchange for ``bindings`` only (e.g. ``task.deleted`` or
+    ``task.updated.status.*``), so the broker never delivers the rest. Such a
+    consumer must be given its own ``handler`` (projecting a subset of the
+    events would count them twice) and a ``dedup`` store for its queue.
+    """
+
+    def __init__(
+        self,
+        handler: Optional[BatchHandler] = None,
+        prefetch_count: int = settings.consumer_prefetch_count,
+        batch_size: int = settings.consumer_batch_size,
+        batch_timeout_ms: int = settings.consumer_batch_timeout_ms,
+        max_attempts: int = settings.consumer_max_attempts,
+        dedup: Optional[EventDeduplicator] = None,
+        queue: str = TASK_EVENTS_QUEUE,
+        bindings: Sequence[str] = ("#",),
+    ):
+        if queue == TASK_EVENTS_QUEUE and tuple(bindings) != ("#",):
+            raise ValueError(
+                f"The {TASK_EVENTS_QUEUE} queue receives every event; "
+                "selective bindings need a queue of their own"
+            )
+        if handler is None:
+            if queue != TASK_EVENTS_QUEUE:
+                raise ValueError(f"The {queue} queue needs a handler of its own")
+            handler = project_events
+        self.handler: BatchHandler = handler
+        self.queue = queue
+        self.bindings = tuple(bindings)
+        self.prefetch_count = prefetch_count
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout_ms / 1000
+        self.max_attempts = max_attempts
+        self.dedup = dedup
         self.connection = None
         self.channel = None
+        self.meter = RateMeter()
+        self.retried = 0
+        self.dead_lettered = 0
+        self._batch: Batch = []
+        self._last_tag: Optional[int] = None
+        self._timer = None
+        self._stopping = threading.Event()
 
     def connect(self):
         try:
@@ -20,7 +114,13 @@ class TaskEventConsumer:
                 pika.URLParameters(settings.rabbitmq_url)
             )
             self.channel = self.connection.channel()
-            self.channel.queue_declare(queue="task_events", durable=True)
+            declare_task_events(self.channel)
+            if self.queue != TASK_EVENTS_QUEUE:
+                self.channel.queue_declare(queue=self.queue, durable=True)
+                bind_task_events(self.channel, self.queue, self.bindings)
+            declare_retry_topology(self.channel, self.max_attempts, self.queue)
+            # Retried events are acked only once the broker has them
+            self.channel.confirm_delivery()
             logger.info("Consumer connected to RabbitMQ")
         except Exception as e:
             logger.error(f"Failed to connect to RabbitMQ: {e}")
@@ -28,40 +128,138 @@ class TaskEventConsumer:
 
     def process_message(self, ch, method, properties, body):
         try:
-            message = json.loads(body.decode())
-            event_type = message.get("event_type")
-            task_data = message.get("task_data")
-            timestamp = message.get("timestamp")
+            message = decode_event(body, getattr(properties, "content_type", None))
+        except Exception as e:
+            # Redelivering a message that cannot be decoded would never help
+            logger.error(f"Dead-lettering undecodable message: {e}")
+            dead_letter(ch, body, properties, e, self.queue)
+            self.dead_lettered += 1
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+            return
 
-            logger.info(f"Processing event: {event_type}")
-            logger.info(f"Task data: {task_data}")
-            logger.info(f"Timestamp: {timestamp}")
+        self._batch.append((message, properties, body))
+        self._last_tag = method.delivery_tag
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = self.connection.call_later(self.batch_timeout, self.flush)
 
-            ch.basic_ack(delivery_tag=method.delivery_tag)
+    def flush(self):
+        """Handle the pending batch, then ack all of it at once."""
+        if self._timer is not None:
+            self.connection.remove_timeout(self._timer)
+            self._timer = None
+        if not self._batch:
+            return
+        batch, last_tag = self._batch, self._last_tag
+        self._batch, self._last_tag = [], None
+        fresh = self.skip_duplicates(batch)
+        if fresh:
+            recorded: Set[str] = set()
+            try:
+                recorded.update(self.handler([m for m, _, _ in fresh]) or ())
+                handled = fresh
+            except Exception as e:
+                logger.warning(
+                    f"Batch of {len(fresh)} events failed ({e}), retrying one by one"
+                )
+                handled = [
+                    item for item in fresh if self.handle_one(*item, recorded=recorded)
+                ]
+            if self.dedup is not None:
+                self.dedup.mark(
+                    [m["event_id"] for m, _, _ in handled if m.get("event_id")],
+                    recorded=recorded,
+                )
+        self.channel.basic_ack(delivery_tag=last_tag, multiple=True)
+        self.meter.add(len(batch))
+
+    def skip_duplicates(self, batch: Batch) -> Batch:
+        """Drop events already handled, here or earlier in the same batch."""
+        if self.dedup is None:
+            return batch
+        seen = self.dedup.seen(
+            {m["event_id"] for m, _, _ in batch if m.get("event_id")}
+        )
+        fresh = []
+        for item in batch:
+            event_id = item[0].get("event_id")
+            if event_id and event_id in seen:
+                continue
+            if event_id:
+                seen.add(event_id)
+            fresh.append(item)
+        if len(fresh) < len(batch):
+            logger.info(f"Skipped {len(batch) - len(fresh)} duplicate events")
+        return fresh
+
+    def handle_one(
+        self,
+        message: Dict[str, Any],
+        properties,
+        body: bytes,
+        recorded: Optional[Set[str]] = None,
+    ) -> bool:
+        """Handle a single event; on failure send it to retry and return False.
 
+        Ids the handler recorded itself are added to ``recorded``.
+        """
+        try:
+            ids = self.handler([message])
+            if recorded is not None:
+                recorded.update(ids or ())
+            return True
         except Exception as e:
-            logger.error(f"Error processing message: {e}")
-            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+            if retry_or_dead_letter(
+                self.channel, body, properties, e, self.max_attempts, self.queue
+            ):
+                self.dead_lettered += 1
+                logger.error(f"Dead-lettered event {message.get('event_type')}: {e}")
+            else:
+                self.retried += 1
+                logger.warning(f"Retrying event {message.get('event_type')}: {e}")
+            return False
 
     def start_consuming(self):
         if not self.channel:
             self.connect()
 
-        self.channel.basic_qos(prefetch_count=1)
+        self.channel.basic_qos(prefetch_count=self.prefetch_count)
         self.channel.basic_consume(
-            queue="task_events", on_message_callback=self.process_message
+            queue=self.queue, on_message_callback=self.process_message
         )
 
-        logger.info("Starting to consume messages...")
+        logger.info(
+            f"Starting to consume {self.queue} (prefetch {self.prefetch_count}, "
+            f"batches of {self.batch_size} / {self.batch_timeout * 1000:.0f} ms)..."
+        )
         try:
-            self.channel.start_consuming()
+            if not self._stopping.is_set():
+                self.channel.start_consuming()
         except KeyboardInterrupt:
-            logger.info("Stopping consumer...")
             self.channel.stop_consuming()
-            if self.connection:
-                self.connection.close()
+        logger.info("Stopping consumer...")
+        # Drain: handle and ack the batch in progress; messages prefetched but
+        # not handled go back to the queue when the connection closes
+        self.flush()
+        logger.info(f"Processed {self.meter.total} events")
+        if self.dedup is not None:
+            logger.info(f"Deduplication: {self.dedup.stats()}")
+        if self.connection:
+            self.connection.close()
+
+    def stop(self):
+        """Make ``start_consuming`` drain and return; safe from any thread."""
+        self._stopping.set()
+        if self.connection is None or self.channel is None:
+            return
+        try:
+            self.connection.add_callback_threadsafe(self.channel.stop_consuming)
+        except ConnectionWrongStateError:
+            # The connection is already closed: start_consuming has returned
+            pass
 
 
 if __name__ == "__main__":
-    consumer = TaskEventConsumer()
+    consumer = TaskEventConsumer(dedup=make_deduplicator())
     consumer.start_consuming()
@@ -0,0 +1,59 @@
+import csv
+from itertools import islice
+from typing import Any, Iterator, List, NamedTuple, TextIO, Tuple
+
+from pydantic import ValidationError
+
+from app.core.export import ExportFormat
+from app.schemas.task import TaskCreate
+
+
+class ImportChunk(NamedTuple):
+    tasks: List[TaskCreate]
+    # (line number, message) for every record that was skipped
+    errors: List[Tuple[int, str]]
+
+
+def read_records(stream: TextIO, fmt: ExportFormat) -> Iterator[Tuple[int, Any]]:
+    """Yield ``(line number, record)`` pairs: raw lines for NDJSON, dicts for CSV.
+
+    Both formats accept what ``/tasks/export`` produces; columns other than the
+    ``TaskCreate`` fields are ignored.
+    """
+    if fmt == ExportFormat.CSV:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            # Exports write NULL as an empty cell
+            yield reader.line_num, {key: value or None for key, value in record.items()}
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        if line.strip():
+            yield line_number, line
+
+
+def validate_chunks(
+    stream: TextIO, fmt: ExportFormat, chunk_size: int
+) -> Iterator[ImportChunk]:
+    """Validate records against ``TaskCreate``, ``chunk_size`` records at a time."""
+    validate = (
+        TaskCreate.model_validate_json
+        if fmt == ExportFormat.NDJSON
+        else TaskCreate.model_validate
+    )
+    records = read_records(stream, fmt)
+    while batch := list(islice(records, chunk_size)):
+        chunk = ImportChunk([], [])
+        for line_number, record in batch:
+            try:
+                chunk.tasks.append(validate(record))
+            except ValidationError as exc:
+                chunk.errors.append((line_number, format_error(exc)))
+        yield chunk
+
+
+def format_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, error['loc'])) or 'record'}: {error['msg']}"
+        for error in exc.errors()
+    )
@@ -1,17 +1,147 @@
+import math
+import time
+from typing import Union
+
+from fastapi import Depends, Request, Response
 from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.sql.functions import now
 
 from app.core.config import settings
+from app.core.pool import engine_options
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+PRIMARY_COOKIE = "db_primary_until"
+
+
+@compiles(now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    # CURRENT_TIMESTAMP has one-second resolution; timestamps double as ETag
+    # versions, so keep milliseconds like the other databases keep micros
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+
 
-engine = create_engine(settings.database_url)
+engine = create_engine(settings.database_url, **engine_options(settings.database_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+read_engine = (
+    create_engine(
+        settings.database_read_url, **engine_options(settings.database_read_url)
+    )
+    if settings.database_read_url
+    else None
+)
+ReadSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    if read_engine is not None
+    else None
+)
+
 Base = declarative_base()
 
 
+def to_async_url(database_url: str) -> URL:
+    """Map a sync database URL onto the matching asyncio driver."""
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+def _create_async_engine(database_url: Union[str, URL, None] = None):
+    url = database_url or to_async_url(settings.database_url)
+    return create_async_engine(url, **engine_options(url, is_async=True))
+
+
+async_engine = (
+    _create_async_engine(settings.async_database_url)
+    if settings.database_async
+    else None
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+async_read_engine = (
+    _create_async_engine(to_async_url(settings.database_read_url))
+    if settings.database_async and settings.database_read_url
+    else None
+)
+AsyncReadSessionLocal = (
+    async_sessionmaker(bind=async_read_engine, autoflush=False, expire_on_commit=False)
+    if async_read_engine is not None
+    else None
+)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def wrote_recently(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def stick_to_primary(response: Response):
+    """Route this client's reads to the primary for a while after a write."""
+    seconds = settings.read_your_writes_seconds
+    if settings.database_read_url and seconds > 0:
+        response.set_cookie(
+            PRIMARY_COOKIE,
+            f"{time.time() + seconds:.3f}",
+            max_age=math.ceil(seconds),
+            httponly=True,
+            samesite="lax",
+        )
+
+
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    """Session for read-only work: the replica, unless the client just wrote."""
+    if ReadSessionLocal is None or wrote_recently(request):
+        yield db
+        return
+
+    read_db = ReadSessionLocal()
+    try:
+        yield read_db
+    finally:
+        read_db.close()
+
+
+def get_read_sessionmaker(request: Request) -> sessionmaker:
+    """Session factory for reads that outlive dependency teardown.
+
+    A ``StreamingResponse`` body is sent after the request's yield dependencies
+    have closed their sessions, so streamed reads open and close their own.
+    """
+    if ReadSessionLocal is None or wrote_recently(request):
+        return SessionLocal
+    return ReadSessionLocal
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db(request: Request, db: AsyncSession = Depends(get_async_db)):
+    if AsyncReadSessionLocal is None or wrote_recently(request):
+        yield db
+        return
+
+    async with AsyncReadSessionLocal() as read_db:
+        yield read_db
+
+
+def get_async_read_sessionmaker(request: Request) -> async_sessionmaker:
+    if AsyncReadSessionLocal is None or wrote_recently(request):
+        return AsyncSessionLocal
+    return AsyncReadSessionLocal
@@ -0,0 +1,44 @@
+import csv
+import io
+from enum import Enum
+from typing import Iterable
+
+from app.schemas.task import TaskResponse, TaskRowAdapter
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+EXPORT_COLUMNS = list(TaskResponse.model_fields)
+
+
+def export_header(fmt: ExportFormat) -> str:
+    """Text written once before the first chunk."""
+    if fmt == ExportFormat.CSV:
+        return encode_csv([EXPORT_COLUMNS])
+    return ""
+
+
+def encode_rows(rows: Iterable, fmt: ExportFormat) -> str:
+    """Serialize one chunk of task rows; chunks concatenate into a valid file."""
+    if fmt == ExportFormat.CSV:
+        tasks = (TaskResponse.model_validate(row) for row in rows)
+        return encode_csv(
+            [task.model_dump(mode="json")[column] for column in EXPORT_COLUMNS]
+            for task in tasks
+        )
+    return "".join(
+        TaskRowAdapter.dump_json(row._asdict()).decode() + "\n" for row in rows
+    )
+
+
+def encode_csv(lines: Iterable[Iterable]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(lines)
+    return buffer.getvalue()
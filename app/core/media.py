@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import Any, Optional
+
+import msgpack
+
+from app.core.etag import make_etag
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# Clients written before the type was registered still send the x- form
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick MessagePack when ``Accept`` asks for it at least as much as for JSON.
+
+    MessagePack must be named explicitly; wildcards only count for JSON, so
+    browsers and clients that send nothing or ``*/*`` keep getting JSON.
+    """
+    if not accept:
+        return JSON_MEDIA_TYPE
+    msgpack_q = json_q = 0.0
+    for part in accept.split(","):
+        media_type, *params = (item.strip() for item in part.split(";"))
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        media_type = media_type.lower()
+        if media_type in MSGPACK_MEDIA_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif media_type in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            json_q = max(json_q, q)
+    if msgpack_q > 0 and msgpack_q >= json_q:
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def variant_etag(etag: str, media_type: str) -> str:
+    """ETag of one representation: JSON keeps the resource tag, others get their own."""
+    if media_type == JSON_MEDIA_TYPE:
+        return etag
+    return make_etag(etag, media_type)
+
+
+def _pack_default(value: Any) -> Any:
+    # Aware datetimes are packed natively; naive ones come from SQLite, which
+    # stores UTC. Plain arithmetic is much cheaper than Timestamp.from_datetime
+    if isinstance(value, datetime):
+        delta = value - _EPOCH
+        return msgpack.Timestamp(
+            delta.days * 86400 + delta.seconds, delta.microseconds * 1000
+        )
+    raise TypeError(f"Cannot serialize {type(value).__name__} to MessagePack")
+
+
+def packb(value: Any) -> bytes:
+    """MessagePack with datetimes as the native timestamp extension.
+
+    Decode with ``msgpack.unpackb(body, timestamp=3)`` to get aware datetimes
+    back; enums travel as their values, like in JSON.
+    """
+    return msgpack.packb(value, datetime=True, default=_pack_default)
@@ -0,0 +1,42 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, List
+
+
+class RateMeter:
+    """Events per second over a sliding window, counted in one-second buckets."""
+
+    def __init__(
+        self, window_seconds: int = 60, clock: Callable[[], float] = time.monotonic
+    ):
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._started_at = clock()
+        # [second, count] pairs, oldest first
+        self._buckets: Deque[List[int]] = deque()
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def add(self, count: int = 1):
+        second = int(self._clock())
+        with self._lock:
+            self.total += count
+            if self._buckets and self._buckets[-1][0] == second:
+                self._buckets[-1][1] += count
+            else:
+                self._buckets.append([second, count])
+            self._expire(second)
+
+    def rate(self) -> float:
+        now = self._clock()
+        with self._lock:
+            self._expire(int(now))
+            recent = sum(count for _, count in self._buckets)
+        # A meter younger than its window averages over its lifetime only
+        elapsed = min(now - self._started_at, self.window_seconds)
+        return recent / elapsed if elapsed > 0 else 0.0
+
+    def _expire(self, second: int):
+        while self._buckets and self._buckets[0][0] <= second - self.window_seconds:
+            self._buckets.popleft()
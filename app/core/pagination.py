@@ -0,0 +1,62 @@
+import base64
+import binascii
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Encode keyset values into an opaque, URL-safe cursor."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor produced by ``encode_cursor``."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+    if not isinstance(values, dict):
+        raise InvalidCursorError("Invalid cursor")
+    return values
+
+
+def decode_id_cursor(cursor: str) -> int:
+    """Return the last seen ``id`` carried by an id keyset cursor."""
+    after_id = decode_cursor(cursor).get("id")
+    if not isinstance(after_id, int):
+        raise InvalidCursorError("Invalid cursor")
+    return after_id
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, int]:
+    """Return the ``(rank, id)`` of the last result of a ranked search page."""
+    values = decode_cursor(cursor)
+    rank, after_id = values.get("rank"), values.get("id")
+    if not isinstance(rank, (int, float)) or not isinstance(after_id, int):
+        raise InvalidCursorError("Invalid cursor")
+    return float(rank), after_id
+
+
+def id_cursor_key(item: Any) -> Dict[str, Any]:
+    return {"id": item.id}
+
+
+def split_page(
+    items: List[T],
+    limit: int,
+    key: Callable[[T], Dict[str, Any]] = id_cursor_key,
+) -> Tuple[List[T], Optional[str]]:
+    """Trim a ``limit + 1`` fetch to ``limit`` items and build the next cursor."""
+    if limit > 0 and len(items) > limit:
+        items = items[:limit]
+        return items, encode_cursor(key(items[-1]))
+    return items, None
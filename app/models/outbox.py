@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, Text
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class OutboxEvent(Base):
+    """A task event written in the same transaction as the task change.
+
+    ``python -m app.commands.outbox_relay`` publishes rows in ``id`` order and
+    deletes them once RabbitMQ has confirmed them.
+    """
+
+    __tablename__ = "outbox_events"
+
+    # BIGINT on PostgreSQL; SQLite only autoincrements INTEGER primary keys
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    # No foreign key: task_deleted events outlive their task
+    task_id = Column(Integer, nullable=False, index=True)
+    event_type = Column(String(50), nullable=False)
+    # The message exactly as it will be published
+    body = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, String
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class ProcessedEvent(Base):
+    """Id of a task event a consumer has handled, kept to skip redeliveries.
+
+    Ids are namespaced by ``consumer`` (the queue it reads): consumers of
+    different queues handle the same events independently. Rows older than ``consumer_dedup_ttl_seconds`` are compacted away.
+    """
+
+    __tablename__ = "processed_events"
+
+    consumer = Column(String(255), primary_key=True, server_default="task_events")
+    event_id = Column(String(64), primary_key=True)
+    processed_at = Column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
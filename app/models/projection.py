@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Date, DateTime, Integer, String
+
+from app.core.database import Base
+
+# Read models for the dashboard, written only by the task event consumer
+# (app.consumers.projections) and rebuilt from ``tasks`` by
+# ``python -m app.commands.rebuild_projections``.
+
+
+class TaskStatusCount(Base):
+    """Current number of tasks per status."""
+
+    __tablename__ = "task_status_counts"
+
+    status = Column(String(20), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class TaskDailyStats(Base):
+    """Tasks created and completed per (UTC) day.
+
+    Completions are counted when they happen: reopening a task does not
+    take its completion back.
+    """
+
+    __tablename__ = "task_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    created = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+
+
+class TaskActivity(Base):
+    """Latest task events, newest last; trimmed to ``projection_activity_size``."""
+
+    __tablename__ = "task_activity"
+
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, nullable=False)
+    event_type = Column(String(50), nullable=False)
+    titulo = Column(String(200), nullable=False)
+    status = Column(String(20), nullable=True)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
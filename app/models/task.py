@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import Column, DateTime, Enum, Integer, String, Text
+from sqlalchemy import DDL, Column, DateTime, Enum, Integer, String, Text, event
 from sqlalchemy.sql import func
 
 from app.core.database import Base
@@ -22,3 +22,47 @@ class Task(Base):
     data_atualizacao = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
+
+
+# Full-text search over titulo/descricao is maintained by the database itself and
+# is not mapped on the model: a generated tsvector column with a GIN index on
+# PostgreSQL, and an external-content FTS5 table kept in sync by triggers on
+# SQLite. The Alembic migration 0002 adds the same objects to existing databases.
+SEARCH_CONFIG = "portuguese"
+SEARCH_DDL = {
+    "postgresql": [
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}', "
+        "coalesce(titulo, '') || ' ' || coalesce(descricao, ''))) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector "
+        "ON tasks USING GIN (search_vector)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+        "titulo, descricao, content='tasks', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts(rowid, titulo, descricao) "
+        "VALUES (new.id, new.titulo, new.descricao); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, titulo, descricao) "
+        "VALUES ('delete', old.id, old.titulo, old.descricao); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_au "
+        "AFTER UPDATE OF titulo, descricao ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, titulo, descricao) "
+        "VALUES ('delete', old.id, old.titulo, old.descricao); "
+        "INSERT INTO tasks_fts(rowid, titulo, descricao) "
+        "VALUES (new.id, new.titulo, new.descricao); END",
+    ],
+}
+
+for _dialect, _statements in SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(
+            Task.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect)
+        )
+event.listen(
+    Task.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS tasks_fts").execute_if(dialect="sqlite"),
+)
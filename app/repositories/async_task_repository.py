@@ -0,0 +1,175 @@
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Row, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.task import Task, TaskStatus
+from app.repositories.task_repository import (
+    TASK_COLUMNS,
+    BeforeCommit,
+    delete_statement,
+    deleted_task_statement,
+    page_version_statement,
+    search_statement,
+    task_columns,
+    task_status_statement,
+    task_with_status_statement,
+    update_statement,
+)
+from app.schemas.task import TaskCreate, TaskUpdate
+
+
+class AsyncTaskRepository:
+    """asyncio counterpart of ``TaskRepository`` backed by an ``AsyncSession``."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(
+        self, task_data: TaskCreate, before_commit: BeforeCommit = None
+    ) -> Row:
+        table = Task.__table__
+        result = await self.db.execute(
+            insert(table).values(**task_data.model_dump()).returning(*table.c)
+        )
+        task = result.one()
+        if before_commit:
+            before_commit(task)
+        await self.db.commit()
+        return task
+
+    async def create_many(
+        self, tasks_data: List[TaskCreate], before_commit: BeforeCommit = None
+    ) -> List[Row]:
+        table = Task.__table__
+        result = await self.db.execute(
+            insert(table).returning(*table.c),
+            [task_data.model_dump() for task_data in tasks_data],
+        )
+        rows = sorted(result, key=lambda row: row.id)
+        if before_commit:
+            before_commit(rows)
+        await self.db.commit()
+        return rows
+
+    async def get_by_id(self, task_id: int) -> Optional[Task]:
+        return await self.db.scalar(select(Task).where(Task.id == task_id))
+
+    async def get_fields_by_id(
+        self, task_id: int, fields: Sequence[str]
+    ) -> Optional[Row]:
+        columns = task_columns(fields, required=("id", "data_atualizacao"))
+        result = await self.db.execute(select(*columns).where(Task.id == task_id))
+        return result.first()
+
+    async def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        result = await self.db.execute(
+            select(*task_columns(fields)).order_by(Task.id).offset(skip).limit(limit)
+        )
+        return list(result)
+
+    async def get_version(self, task_id: int) -> Optional[Row]:
+        result = await self.db.execute(
+            select(Task.data_atualizacao).where(Task.id == task_id)
+        )
+        return result.first()
+
+    async def get_page_version(
+        self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+    ) -> Tuple[Optional[datetime], int, Optional[int], Optional[int]]:
+        result = await self.db.execute(page_version_statement(skip, limit, after_id))
+        return tuple(result.one())
+
+    async def get_page(
+        self,
+        after_id: int,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        result = await self.db.execute(
+            select(*task_columns(fields))
+            .where(Task.id > after_id)
+            .order_by(Task.id)
+            .limit(limit)
+        )
+        return list(result)
+
+    async def stream_all(self, chunk_size: int = 1000) -> AsyncIterator[Sequence[Row]]:
+        result = await self.db.stream(
+            select(*TASK_COLUMNS)
+            .order_by(Task.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        async for rows in result.partitions():
+            yield rows
+
+    async def search(
+        self, query: str, limit: int = 100, after: Optional[Tuple[float, int]] = None
+    ) -> List[Row]:
+        dialect_name = self.db.get_bind().dialect.name
+        result = await self.db.execute(
+            search_statement(dialect_name, query, limit, after)
+        )
+        return list(result)
+
+    async def update(self, task_id: int, task_data: TaskUpdate) -> Optional[Row]:
+        return await self.update_with_previous_status(task_id, task_data)
+
+    async def update_with_previous_status(
+        self, task_id: int, task_data: TaskUpdate, before_commit: BeforeCommit = None
+    ) -> Optional[Row]:
+        """See ``TaskRepository.update_with_previous_status``."""
+        update_data = task_data.model_dump(exclude_unset=True)
+
+        if not update_data:
+            result = await self.db.execute(task_with_status_statement(task_id))
+            task = result.first()
+            if task and before_commit:
+                before_commit(task)
+                await self.db.commit()
+            return task
+
+        old_status = None
+        if self.db.get_bind().dialect.name != "postgresql":
+            old_status = await self.db.scalar(task_status_statement(task_id))
+            if old_status is None:
+                return None
+
+        result = await self.db.execute(
+            update_statement(task_id, update_data, old_status)
+        )
+        task = result.first()
+        if task and before_commit:
+            before_commit(task)
+        await self.db.commit()
+        return task
+
+    async def delete(self, task_id: int) -> bool:
+        return await self.delete_returning(task_id) is not None
+
+    async def delete_returning(
+        self, task_id: int, before_commit: BeforeCommit = None
+    ) -> Optional[Row]:
+        """See ``TaskRepository.delete_returning``."""
+        if self.db.get_bind().dialect.delete_returning:
+            task = (await self.db.execute(delete_statement(task_id))).first()
+        else:
+            result = await self.db.execute(deleted_task_statement(task_id))
+            task = result.first()
+            if task:
+                await self.db.execute(delete_statement(task_id, returning=False))
+
+        if task and before_commit:
+            before_commit(task)
+        await self.db.commit()
+        return task
+
+    async def get_by_status(self, status: TaskStatus) -> List[Task]:
+        result = await self.db.scalars(select(Task).where(Task.status == status))
+        return list(result)
@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+from typing import List, Sequence, Tuple
+
+from sqlalchemy import Row, delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models.outbox import OutboxEvent
+
+
+class OutboxRepository:
+    """Reads and clears the outbox for the relay; services only add to it."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def fetch_batch(self, limit: int) -> List[Row]:
+        """The oldest ``limit`` events, locked until ``delete`` commits.
+
+        ``FOR UPDATE`` (not ``SKIP LOCKED``) makes a second relay wait instead
+        of publishing later events of a task ahead of earlier ones. SQLite
+        ignores it; its writers are serialized anyway.
+        """
+        return list(
+            self.db.execute(
+                select(
+                    OutboxEvent.id,
+                    OutboxEvent.task_id,
+                    OutboxEvent.event_type,
+                    OutboxEvent.body,
+                )
+                .order_by(OutboxEvent.id)
+                .limit(limit)
+                .with_for_update()
+            )
+        )
+
+    def delete(self, event_ids: Sequence[int]) -> int:
+        """Drop published events and end the transaction ``fetch_batch`` began."""
+        deleted = 0
+        if event_ids:
+            deleted = self.db.execute(
+                delete(OutboxEvent).where(OutboxEvent.id.in_(event_ids))
+            ).rowcount
+        self.db.commit()
+        return deleted
+
+    def lag(self) -> Tuple[int, float]:
+        """Pending events and the age in seconds of the oldest one (0 if none)."""
+        pending, oldest = self.db.execute(
+            select(func.count(), func.min(OutboxEvent.created_at))
+        ).one()
+        if oldest is None:
+            return pending, 0.0
+        if oldest.tzinfo is None:
+            # SQLite returns naive datetimes; its now() is UTC
+            oldest = oldest.replace(tzinfo=timezone.utc)
+        return pending, max((datetime.now(timezone.utc) - oldest).total_seconds(), 0.0)
@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+from typing import Collection, Set
+
+from sqlalchemy import Insert, delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.processed_event import ProcessedEvent
+
+
+class ProcessedEventRepository:
+    """Durable record of handled event ids for consumer deduplication.
+
+    Ids are kept per ``consumer``: one consumer having handled an event says
+    nothing about another.
+    """
+
+    def __init__(self, db: Session, consumer: str):
+        self.db = db
+        self.consumer = consumer
+
+    def seen(self, event_ids: Collection[str]) -> Set[str]:
+        """The subset of ``event_ids`` already recorded."""
+        if not event_ids:
+            return set()
+        return set(
+            self.db.scalars(
+                select(ProcessedEvent.event_id).where(
+                    ProcessedEvent.consumer == self.consumer,
+                    ProcessedEvent.event_id.in_(event_ids),
+                )
+            )
+        )
+
+    def add(self, event_ids: Collection[str]):
+        """Record ``event_ids`` (caller commits, possibly with the work they did)."""
+        if not event_ids:
+            return
+        # ON CONFLICT DO NOTHING: two consumers may race on a redelivered event
+        statement: Insert
+        if self.db.get_bind().dialect.name == "postgresql":
+            statement = postgresql.insert(ProcessedEvent).on_conflict_do_nothing()
+        else:
+            statement = sqlite.insert(ProcessedEvent).on_conflict_do_nothing()
+        now = datetime.now(timezone.utc)
+        self.db.execute(
+            statement,
+            [
+                {"consumer": self.consumer, "event_id": event_id, "processed_at": now}
+                for event_id in event_ids
+            ],
+        )
+
+    def compact(self, older_than: datetime) -> int:
+        """Forget ids of every consumer recorded before ``older_than``; returns how many."""
+        deleted = self.db.execute(
+            delete(ProcessedEvent).where(ProcessedEvent.processed_at < older_than)
+        ).rowcount
+        self.db.commit()
+        return deleted
@@ -0,0 +1,238 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Sequence, Union
+
+from sqlalchemy import Row, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.projection import TaskActivity, TaskDailyStats, TaskStatusCount
+from app.models.task import Task, TaskStatus
+
+COMPLETED = TaskStatus.COMPLETED.value
+
+
+def _parse_timestamp(value: Union[str, datetime, None]) -> datetime:
+    """Event timestamps: ``str(datetime)`` in JSON events, datetimes in
+    MessagePack ones; missing ones mean "now"."""
+    if not value or value == "None":
+        return datetime.now(timezone.utc)
+    parsed = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    # SQLite hands out naive datetimes; its now() is UTC
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _day(value: Union[str, datetime, None]) -> date:
+    return _parse_timestamp(value).astimezone(timezone.utc).date()
+
+
+def _as_date(value) -> date:
+    # func.date() gives dates on PostgreSQL and 'YYYY-MM-DD' strings on SQLite
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def _increment(db: Session, model, key: str, rows: List[Dict[str, Any]]):
+    """Upsert ``rows``, adding their counters to those of existing rows."""
+    if not rows:
+        return
+    columns = [column for column in rows[0] if column != key]
+    if db.get_bind().dialect.name == "postgresql":
+        statement: Any = postgresql.insert(model)
+    else:
+        statement = sqlite.insert(model)
+    statement = statement.on_conflict_do_update(
+        index_elements=[key],
+        set_={
+            column: getattr(model, column) + getattr(statement.excluded, column)
+            for column in columns
+        },
+    )
+    db.execute(statement, rows)
+
+
+class ProjectionRepository:
+    """Dashboard read models: applied from task events, read in constant time."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply(self, events: Sequence[Dict[str, Any]]):
+        """Fold a batch of task events into the projections (caller commits).
+
+        Deltas are aggregated first, so a batch costs one upsert per touched
+        status and day whatever its size.
+        """
+        statuses: Counter = Counter()
+        days: Dict[date, Counter] = defaultdict(Counter)
+        activity = []
+        for message in events:
+            event_type = message.get("event_type")
+            data = message.get("task_data") or {}
+            if event_type == "task_created":
+                statuses[data["status"]] += 1
+                days[_day(data.get("data_criacao"))]["created"] += 1
+            elif event_type == "task_updated":
+                old_status, new_status = data.get("old_status"), data["status"]
+                if old_status != new_status:
+                    statuses[old_status] -= 1
+                    statuses[new_status] += 1
+                    if new_status == COMPLETED:
+                        days[_day(data.get("data_atualizacao"))]["completed"] += 1
+            elif event_type == "task_deleted":
+                # Events published before deletes carried the status are skipped
+                if data.get("status"):
+                    statuses[data["status"]] -= 1
+            else:
+                continue
+            activity.append(
+                {
+                    "task_id": data["id"],
+                    "event_type": event_type,
+                    "titulo": data.get("titulo") or "",
+                    "status": data.get("status"),
+                    "occurred_at": _parse_timestamp(message.get("timestamp")),
+                }
+            )
+
+        _increment(
+            self.db,
+            TaskStatusCount,
+            "status",
+            [
+                {"status": status, "count": delta}
+                for status, delta in statuses.items()
+                if delta
+            ],
+        )
+        _increment(
+            self.db,
+            TaskDailyStats,
+            "day",
+            [
+                {"day": day, "created": c["created"], "completed": c["completed"]}
+                for day, c in days.items()
+            ],
+        )
+        if activity:
+            self.db.execute(insert(TaskActivity), activity)
+            self._trim_activity()
+
+    def _trim_activity(self):
+        newest = select(func.max(TaskActivity.id)).scalar_subquery()
+        self.db.execute(
+            delete(TaskActivity).where(
+                TaskActivity.id <= newest - settings.projection_activity_size
+            )
+        )
+
+    def rebuild(self):
+        """Recompute every projection from ``tasks`` (caller commits).
+
+        ``tasks`` keeps no history, so completions per day are approximated by
+        the last update of the tasks completed now, and the activity by the
+        latest created or updated tasks; deletes leave no trace.
+        """
+        self.db.execute(delete(TaskStatusCount))
+        self.db.execute(delete(TaskDailyStats))
+        self.db.execute(delete(TaskActivity))
+
+        counts = self.db.execute(
+            select(Task.status, func.count()).group_by(Task.status)
+        ).all()
+        if counts:
+            self.db.execute(
+                insert(TaskStatusCount),
+                [{"status": status.value, "count": count} for status, count in counts],
+            )
+
+        days: Dict[date, Counter] = defaultdict(Counter)
+        created_day = func.date(Task.data_criacao)
+        for day, count in self.db.execute(
+            select(created_day, func.count()).group_by(created_day)
+        ):
+            days[_as_date(day)]["created"] += count
+        completed_day = func.date(Task.data_atualizacao)
+        for day, count in self.db.execute(
+            select(completed_day, func.count())
+            .where(Task.status == TaskStatus.COMPLETED)
+            .group_by(completed_day)
+        ):
+            days[_as_date(day)]["completed"] += count
+        if days:
+            self.db.execute(
+                insert(TaskDailyStats),
+                [
+                    {"day": day, "created": c["created"], "completed": c["completed"]}
+                    for day, c in days.items()
+                ],
+            )
+
+        latest = self.db.execute(
+            select(
+                Task.id,
+                Task.titulo,
+                Task.status,
+                Task.data_criacao,
+                Task.data_atualizacao,
+            )
+            .order_by(Task.data_atualizacao.desc(), Task.id.desc())
+            .limit(settings.projection_activity_size)
+        ).all()
+        if latest:
+            self.db.execute(
+                insert(TaskActivity),
+                [
+                    {
+                        "task_id": row.id,
+                        "event_type": (
+                            "task_updated"
+                            if row.data_atualizacao != row.data_criacao
+                            else "task_created"
+                        ),
+                        "titulo": row.titulo,
+                        "status": row.status.value,
+                        "occurred_at": row.data_atualizacao or row.data_criacao,
+                    }
+                    # Oldest first, like events arrive
+                    for row in reversed(latest)
+                ],
+            )
+
+    # Reads: bounded by the size of the answer, not the number of tasks
+
+    def status_counts(self) -> Dict[str, int]:
+        counts = dict(
+            self.db.execute(select(TaskStatusCount.status, TaskStatusCount.count))
+            .tuples()
+            .all()
+        )
+        return {status.value: counts.get(status.value, 0) for status in TaskStatus}
+
+    def daily_stats(self, since: date) -> List[Row]:
+        return list(
+            self.db.execute(
+                select(
+                    TaskDailyStats.day,
+                    TaskDailyStats.created,
+                    TaskDailyStats.completed,
+                )
+                .where(TaskDailyStats.day >= since)
+                .order_by(TaskDailyStats.day)
+            )
+        )
+
+    def recent_activity(self, limit: int) -> List[Row]:
+        return list(
+            self.db.execute(
+                select(
+                    TaskActivity.task_id,
+                    TaskActivity.event_type,
+                    TaskActivity.titulo,
+                    TaskActivity.status,
+                    TaskActivity.occurred_at,
+                )
+                .order_by(TaskActivity.id.desc())
+                .limit(limit)
+            )
+        )
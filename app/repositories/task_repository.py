@@ -1,49 +1,400 @@
-from typing import List, Optional
+import io
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
+from sqlalchemy import (
+    Column,
+    ColumnClause,
+    Double,
+    Row,
+    Select,
+    Update,
+    UpdateBase,
+    and_,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    select,
+    table,
+    update,
+)
 from sqlalchemy.orm import Session
 
-from app.models.task import Task, TaskStatus
-from app.schemas.task import TaskCreate, TaskUpdate
+from app.models.task import SEARCH_CONFIG, Task, TaskStatus
+from app.schemas.task import TaskCreate, TaskResponse, TaskUpdate
+
+# Read as Core rows in TaskResponse field order: list endpoints serialize them
+# directly (see ``dump_task_rows``) without ORM identity-map bookkeeping
+TASK_COLUMNS = [Task.__table__.c[name] for name in TaskResponse.model_fields]
+
+# Called with what a write returns, inside its transaction, right before the
+# commit: lets services add rows (outbox events) that must commit with it
+BeforeCommit = Optional[Callable[[Any], None]]
+
+
+def task_columns(
+    fields: Optional[Sequence[str]] = None, required: Sequence[str] = ("id",)
+) -> List[Column]:
+    """``TASK_COLUMNS`` projected to ``fields`` (``None`` keeps them all).
+
+    ``required`` columns are selected even when not asked for: ``id`` drives
+    keyset pagination, and callers drop it again when serializing.
+    """
+    if fields is None:
+        return TASK_COLUMNS
+    wanted = set(fields).union(required)
+    return [column for column in TASK_COLUMNS if column.name in wanted]
+
+
+# Text format (tab-separated, \N for NULL); the other columns use their defaults
+COPY_TASKS_SQL = "COPY tasks (titulo, descricao, status) FROM STDIN"
+
+
+def copy_text(value: Optional[str]) -> str:
+    """Escape a value for COPY's text format."""
+    if value is None:
+        return "\\N"
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def fts5_query(query: str) -> str:
+    """Quote each term so user input can't inject FTS5 query syntax."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def search_statement(
+    dialect_name: str,
+    query: str,
+    limit: int,
+    after: Optional[Tuple[float, int]] = None,
+) -> Select:
+    """Ranked full-text search, keyset-paginated on ``(rank DESC, id)``.
+
+    Every row carries a ``rank`` column where higher is more relevant.
+    """
+    tasks = Task.__table__
+    if dialect_name == "postgresql":
+        config: ColumnClause[Any] = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+        ts_query = func.websearch_to_tsquery(config, query)
+        vector: ColumnClause[Any] = literal_column("tasks.search_vector")
+        # ts_rank() is a float4: widen it so the cursor round-trips exactly
+        rank = cast(func.ts_rank(vector, ts_query), Double)
+        matches = select(*TASK_COLUMNS, rank.label("rank")).where(
+            vector.op("@@")(ts_query)
+        )
+    elif dialect_name == "sqlite":
+        fts = table("tasks_fts", column("rowid"))
+        # bm25() is lower-is-better: negate it to rank like PostgreSQL
+        matches = (
+            select(
+                *TASK_COLUMNS, (-func.bm25(literal_column("tasks_fts"))).label("rank")
+            )
+            .join_from(tasks, fts, fts.c.rowid == tasks.c.id)
+            .where(literal_column("tasks_fts").op("MATCH")(fts5_query(query)))
+        )
+    else:
+        raise NotImplementedError(f"Full-text search is not set up for {dialect_name}")
+
+    ranked = matches.subquery("matches")
+    stmt = select(ranked).order_by(ranked.c.rank.desc(), ranked.c.id).limit(limit)
+    if after is not None:
+        after_rank, after_id = after
+        stmt = stmt.where(
+            or_(
+                ranked.c.rank < after_rank,
+                and_(ranked.c.rank == after_rank, ranked.c.id > after_id),
+            )
+        )
+    return stmt
+
+
+def page_version_statement(
+    skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+) -> Select:
+    """max(data_atualizacao), count and id range of an offset or keyset page.
+
+    Any insert, update or delete that changes the page changes at least one
+    of them.
+    """
+    page = select(Task.id, Task.data_atualizacao).order_by(Task.id).limit(limit)
+    page = page.where(Task.id > after_id) if after_id is not None else page.offset(skip)
+    rows = page.subquery()
+    return select(
+        func.max(rows.c.data_atualizacao),
+        func.count(),
+        func.min(rows.c.id),
+        func.max(rows.c.id),
+    )
+
+
+def task_with_status_statement(task_id: int) -> Select:
+    """A task's columns plus its ``status`` as ``old_status`` (an empty update)."""
+    table = Task.__table__
+    return select(*table.c, table.c.status.label("old_status")).where(
+        table.c.id == task_id
+    )
+
+
+def task_status_statement(task_id: int) -> Select:
+    return select(Task.__table__.c.status).where(Task.__table__.c.id == task_id)
+
+
+def update_statement(
+    task_id: int, values: Dict[str, Any], old_status: Optional[TaskStatus] = None
+) -> Update:
+    """Update a task, returning its new columns plus ``old_status``.
+
+    Without ``old_status`` this is one ``UPDATE ... FROM (SELECT ... FOR
+    UPDATE) RETURNING``: the locked subquery still holds the row as it was
+    before the update (PostgreSQL). Other dialects (SQLite) only expose new
+    values in RETURNING, so callers read ``old_status`` first through
+    ``task_status_statement``.
+    """
+    table = Task.__table__
+    if old_status is None:
+        old = (
+            select(table.c.id, table.c.status)
+            .where(table.c.id == task_id)
+            .with_for_update()
+            .subquery("old")
+        )
+        return (
+            update(table)
+            .where(table.c.id == old.c.id)
+            .values(**values)
+            .returning(*table.c, old.c.status.label("old_status"))
+        )
+    return (
+        update(table)
+        .where(table.c.id == task_id)
+        .values(**values)
+        .returning(
+            *table.c, literal(old_status, table.c.status.type).label("old_status")
+        )
+    )
+
+
+# What ``delete_returning`` reports about a deleted task
+DELETED_COLUMNS = (Task.id, Task.titulo, Task.status)
+
+
+def deleted_task_statement(task_id: int) -> Select:
+    return select(*DELETED_COLUMNS).where(Task.id == task_id)
+
+
+def delete_statement(task_id: int, returning: bool = True) -> UpdateBase:
+    """``DELETE`` a task, ``RETURNING`` its ``DELETED_COLUMNS`` if asked to.
+
+    ORM-enabled so an already loaded instance is detached from the session.
+    """
+    stmt = delete(Task).where(Task.id == task_id)
+    return stmt.returning(*DELETED_COLUMNS) if returning else stmt
 
 
 class TaskRepository:
     def __init__(self, db: Session):
         self.db = db
 
-    def create(self, task_data: TaskCreate) -> Task:
+    def create(self, task_data: TaskCreate, before_commit: BeforeCommit = None) -> Task:
         task = Task(**task_data.model_dump())
         self.db.add(task)
+        if before_commit:
+            self.db.flush()
+            before_commit(task)
         self.db.commit()
         self.db.refresh(task)
         return task
 
+    def create_many(
+        self, tasks_data: List[TaskCreate], before_commit: BeforeCommit = None
+    ) -> List[Row]:
+        """Insert all tasks with a single multi-row ``INSERT ... RETURNING``.
+
+        Rows are committed in one transaction and returned in insertion order.
+        """
+        table = Task.__table__
+        rows = sorted(
+            self.db.execute(
+                insert(table).returning(*table.c),
+                [task_data.model_dump() for task_data in tasks_data],
+            ),
+            key=lambda row: row.id,
+        )
+        if before_commit:
+            before_commit(rows)
+        self.db.commit()
+        return rows
+
+    def copy_many(self, tasks_data: List[TaskCreate]) -> int:
+        """Bulk-load tasks without returning them, in one transaction.
+
+        Streams the rows through ``COPY ... FROM STDIN`` on PostgreSQL
+        (psycopg2) and falls back to a single executemany ``INSERT`` elsewhere.
+        """
+        connection = self.db.connection()
+        if connection.dialect.driver == "psycopg2":
+            buffer = io.StringIO()
+            # The status enum is stored by member name
+            status = TaskStatus.PENDING.name
+            for task_data in tasks_data:
+                buffer.write(
+                    f"{copy_text(task_data.titulo)}\t"
+                    f"{copy_text(task_data.descricao)}\t{status}\n"
+                )
+            buffer.seek(0)
+            cursor = connection.connection.cursor()
+            try:
+                cursor.copy_expert(COPY_TASKS_SQL, buffer)
+            finally:
+                cursor.close()
+        else:
+            self.db.execute(
+                insert(Task.__table__),
+                [task_data.model_dump() for task_data in tasks_data],
+            )
+        self.db.commit()
+        return len(tasks_data)
+
     def get_by_id(self, task_id: int) -> Optional[Task]:
         return self.db.query(Task).filter(Task.id == task_id).first()
 
-    def get_all(self, skip: int = 0, limit: int = 100) -> List[Task]:
-        return self.db.query(Task).offset(skip).limit(limit).all()
+    def get_fields_by_id(self, task_id: int, fields: Sequence[str]) -> Optional[Row]:
+        """Only ``fields`` of a task, plus what its ETag needs."""
+        columns = task_columns(fields, required=("id", "data_atualizacao"))
+        return self.db.execute(select(*columns).where(Task.id == task_id)).first()
+
+    def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        return list(
+            self.db.execute(
+                select(*task_columns(fields))
+                .order_by(Task.id)
+                .offset(skip)
+                .limit(limit)
+            )
+        )
 
-    def update(self, task_id: int, task_data: TaskUpdate) -> Optional[Task]:
-        task = self.get_by_id(task_id)
-        if not task:
-            return None
+    def get_version(self, task_id: int) -> Optional[Row]:
+        """``data_atualizacao`` of a task, without loading the rest of it."""
+        return self.db.execute(
+            select(Task.data_atualizacao).where(Task.id == task_id)
+        ).first()
 
+    def get_page_version(
+        self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+    ) -> Tuple[Optional[datetime], int, Optional[int], Optional[int]]:
+        """Aggregate the rows a page would return, without loading them."""
+        return tuple(
+            self.db.execute(page_version_statement(skip, limit, after_id)).one()
+        )
+
+    def get_page(
+        self,
+        after_id: int,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        """Keyset pagination: fetch tasks with ``id`` greater than ``after_id``."""
+        return list(
+            self.db.execute(
+                select(*task_columns(fields))
+                .where(Task.id > after_id)
+                .order_by(Task.id)
+                .limit(limit)
+            )
+        )
+
+    def stream_all(self, chunk_size: int = 1000) -> Iterator[Sequence[Row]]:
+        """Yield every task in id order, ``chunk_size`` rows at a time.
+
+        ``yield_per`` streams from a server-side cursor where the driver has
+        one, so memory stays bounded by the chunk size.
+        """
+        result = self.db.execute(
+            select(*TASK_COLUMNS)
+            .order_by(Task.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        yield from result.partitions()
+
+    def search(
+        self, query: str, limit: int = 100, after: Optional[Tuple[float, int]] = None
+    ) -> List[Row]:
+        dialect_name = self.db.get_bind().dialect.name
+        return list(
+            self.db.execute(search_statement(dialect_name, query, limit, after))
+        )
+
+    def update(self, task_id: int, task_data: TaskUpdate) -> Optional[Row]:
+        return self.update_with_previous_status(task_id, task_data)
+
+    def update_with_previous_status(
+        self, task_id: int, task_data: TaskUpdate, before_commit: BeforeCommit = None
+    ) -> Optional[Row]:
+        """Update a task, returning its new columns plus ``old_status``.
+
+        One round trip on PostgreSQL; elsewhere the previous status is read
+        first (see ``update_statement``).
+        """
         update_data = task_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(task, field, value)
 
+        if not update_data:
+            task = self.db.execute(task_with_status_statement(task_id)).first()
+            if task and before_commit:
+                before_commit(task)
+                self.db.commit()
+            return task
+
+        old_status = None
+        if self.db.get_bind().dialect.name != "postgresql":
+            old_status = self.db.scalar(task_status_statement(task_id))
+            if old_status is None:
+                return None
+
+        task = self.db.execute(
+            update_statement(task_id, update_data, old_status)
+        ).first()
+        if task and before_commit:
+            before_commit(task)
         self.db.commit()
-        self.db.refresh(task)
         return task
 
     def delete(self, task_id: int) -> bool:
-        task = self.get_by_id(task_id)
-        if not task:
-            return False
+        return self.delete_returning(task_id) is not None
 
-        self.db.delete(task)
+    def delete_returning(
+        self, task_id: int, before_commit: BeforeCommit = None
+    ) -> Optional[Row]:
+        """Delete a task with ``DELETE ... RETURNING id, titulo, status``.
+
+        Databases without DELETE RETURNING (SQLite < 3.35) read the
+        columns first and then delete.
+        """
+        if self.db.get_bind().dialect.delete_returning:
+            task = self.db.execute(delete_statement(task_id)).first()
+        else:
+            task = self.db.execute(deleted_task_statement(task_id)).first()
+            if task:
+                self.db.execute(delete_statement(task_id, returning=False))
+
+        if task and before_commit:
+            before_commit(task)
         self.db.commit()
-        return True
+        return task
 
     def get_by_status(self, status: TaskStatus) -> List[Task]:
         return self.db.query(Task).filter(Task.status == status).all()
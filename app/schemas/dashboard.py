@@ -0,0 +1,27 @@
+from datetime import date, datetime
+from typing import Dict, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class StatusCountsResponse(BaseModel):
+    total: int
+    counts: Dict[str, int]
+
+
+class DailyStatsResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    day: date
+    created: int
+    completed: int
+
+
+class ActivityResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    task_id: int
+    event_type: str
+    titulo: str
+    status: Optional[str] = None
+    occurred_at: datetime
@@ -1,8 +1,20 @@
 from datetime import datetime
-from typing import Optional
+from typing import (
+    Annotated,
+    Any,
+    Collection,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from typing_extensions import TypedDict
 
+from app.core.config import settings
+from app.core.media import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, packb
 from app.models.task import TaskStatus
 
 
@@ -15,6 +27,12 @@ class TaskCreate(TaskBase):
     pass
 
 
+# Batches are validated as a whole: one invalid item rejects the request
+TaskBatchCreate = Annotated[
+    List[TaskCreate], Field(min_length=1, max_length=settings.task_batch_max_size)
+]
+
+
 class TaskUpdate(BaseModel):
     titulo: Optional[str] = Field(None, min_length=1, max_length=200)
     descricao: Optional[str] = Field(None, max_length=1000)
@@ -28,3 +46,96 @@ class TaskResponse(TaskBase):
     status: TaskStatus
     data_criacao: datetime
     data_atualizacao: Optional[datetime] = None
+
+
+class TaskRow(TypedDict):
+    """Serialization-only twin of ``TaskResponse`` for trusted database rows.
+
+    Dumping rows through it skips building and validating a model per row.
+    """
+
+    titulo: str
+    descricao: Optional[str]
+    id: int
+    status: TaskStatus
+    data_criacao: datetime
+    data_atualizacao: Optional[datetime]
+
+
+# Typed Any: they are handed plain dicts built from rows, not TaskRow values
+TaskRowAdapter: TypeAdapter[Any] = TypeAdapter(TaskRow)
+TaskRowListAdapter: TypeAdapter[Any] = TypeAdapter(List[TaskRow])
+
+
+# Names accepted by ``?fields=``, in response order
+TASK_FIELDS = tuple(TaskResponse.model_fields)
+
+
+class InvalidFieldsError(ValueError):
+    """Raised for ``?fields=`` lists naming fields ``TaskResponse`` lacks."""
+
+    def __init__(self, unknown: Iterable[str]):
+        self.unknown = sorted(unknown)
+        super().__init__(f"Unknown fields: {', '.join(self.unknown)}")
+
+
+def parse_task_fields(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Parse a comma-separated ``?fields=`` value; ``None`` means every field.
+
+    Duplicates and order are ignored: fields always come back in
+    ``TASK_FIELDS`` order so equivalent requests share projections and ETags.
+    """
+    if value is None:
+        return None
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = requested.difference(TASK_FIELDS)
+    if unknown or not requested:
+        raise InvalidFieldsError(unknown)
+    return tuple(name for name in TASK_FIELDS if name in requested)
+
+
+def row_dicts(
+    rows: Sequence[Any], fields: Optional[Collection[str]] = None
+) -> List[dict]:
+    """Rows as dicts of their ``TaskResponse`` fields, or only of ``fields``.
+
+    Extra columns (``id`` kept for the cursor, the search ``rank``) are left
+    out. Cheaper than ``Row._asdict()``, which rebuilds the key list per row.
+    """
+    if not rows:
+        return []
+    wanted = TASK_FIELDS if fields is None else fields
+    keys = rows[0]._fields
+    if all(key in wanted for key in keys):
+        return [dict(zip(keys, row, strict=True)) for row in rows]
+    columns = [(index, key) for index, key in enumerate(keys) if key in wanted]
+    return [{key: row[index] for index, key in columns} for row in rows]
+
+
+def dump_task_row(
+    values: dict,
+    fields: Optional[Collection[str]] = None,
+    media_type: str = JSON_MEDIA_TYPE,
+) -> bytes:
+    """One ``TaskResponse`` object, or only its ``fields``, as JSON or MessagePack."""
+    include = set(fields) if fields is not None else None
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return packb(TaskRowAdapter.dump_python(values, include=include))
+    return TaskRowAdapter.dump_json(values, include=include)
+
+
+def dump_task_rows(
+    rows: Sequence[Any],
+    fields: Optional[Collection[str]] = None,
+    media_type: str = JSON_MEDIA_TYPE,
+) -> bytes:
+    """Array of ``TaskResponse`` objects, serialized straight from Rows.
+
+    With ``fields``, each object carries only those keys. MessagePack bodies
+    have the same keys, with native timestamps instead of ISO strings; the
+    values go to the packer as they are, since it handles them all natively.
+    """
+    values = row_dicts(rows, fields)
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return packb(values)
+    return TaskRowListAdapter.dump_json(values)
@@ -0,0 +1,235 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import aio_pika
+from aio_pika.abc import AbstractExchange, AbstractRobustConnection
+
+from app.core.config import settings
+from app.core.metrics import RateMeter
+from app.services.rabbitmq_service import (
+    TASK_EVENTS_EXCHANGE,
+    TASK_EVENTS_QUEUE,
+    TASK_EVENTS_TOPIC_EXCHANGE,
+    build_event,
+    encode_event,
+    task_event_routing_key,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def declare_task_events(
+    channel: aio_pika.abc.AbstractChannel,
+) -> AbstractExchange:
+    """asyncio counterpart of ``rabbitmq_service.declare_task_events``.
+
+    Returns the topic exchange events are published to.
+    """
+    topic = await channel.declare_exchange(
+        TASK_EVENTS_TOPIC_EXCHANGE, aio_pika.ExchangeType.TOPIC, durable=True
+    )
+    fanout = await channel.declare_exchange(
+        TASK_EVENTS_EXCHANGE, aio_pika.ExchangeType.FANOUT, durable=True
+    )
+    await fanout.bind(topic, routing_key="#")
+    queue = await channel.declare_queue(TASK_EVENTS_QUEUE, durable=True)
+    await queue.bind(fanout)
+    return topic
+
+
+class AsyncTaskEventPublisher:
+    """asyncio publisher for task events, used by the async task routes.
+
+    Publishing only puts the serialized event in an in-memory queue; a
+    background task sends the queue in batches, every ``flush_seconds`` or as
+    soon as ``flush_size`` events are waiting, over one persistent connection
+    with publisher confirms. A batch is confirmed as a whole before the next
+    one is sent and unconfirmed events are sent again, so events keep their
+    order except across a failed batch. The connection is opened by ``start``
+    and closed by ``close``, from the app lifespan; robust connections
+    reconnect on their own.
+    """
+
+    def __init__(
+        self,
+        flush_seconds: float = settings.rabbitmq_flush_seconds,
+        flush_size: int = settings.rabbitmq_flush_size,
+        buffer_size: int = settings.rabbitmq_publisher_buffer_size,
+        retry_seconds: float = 5.0,
+        content_type: str = settings.rabbitmq_event_content_type,
+    ):
+        self.flush_seconds = flush_seconds
+        self.flush_size = flush_size
+        self.buffer_size = buffer_size
+        self.retry_seconds = retry_seconds
+        self.content_type = content_type
+        self.meter = RateMeter()
+        self.dropped = 0
+        self.failures = 0
+        self.connection: Optional[AbstractRobustConnection] = None
+        self.exchange: Optional[AbstractExchange] = None
+        # (routing key, encoded event)
+        self._queue: Optional["asyncio.Queue[Tuple[str, bytes]]"] = None
+        self._full: Optional[asyncio.Event] = None
+        self._in_flight: List[Tuple[str, bytes]] = []
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def start(self):
+        """Connect and start the flush task, which retries if RabbitMQ is down."""
+        if self._task:
+            return
+        # Queues and events belong to the loop running the app
+        self._queue = asyncio.Queue(maxsize=self.buffer_size)
+        self._full = asyncio.Event()
+        try:
+            await self._connect()
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Failed to connect to RabbitMQ: {e}")
+        self._task = asyncio.create_task(self._run(), name="rabbitmq-flush")
+
+    def publish_task_event(self, event_type: str, task_data: Dict[str, Any]) -> bool:
+        """Queue one event; False when it had to be dropped."""
+        return self.publish_task_events([(event_type, task_data)]) == 1
+
+    def publish_task_events(self, events: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """Queue events in order, without waiting; returns how many were accepted."""
+        if not events:
+            return 0
+        if self._queue is None or self._full is None:
+            self.dropped += len(events)
+            logger.error(f"Async publisher not started, dropped {len(events)} events")
+            return 0
+        accepted = 0
+        for event_type, task_data in events:
+            try:
+                self._queue.put_nowait(
+                    (
+                        task_event_routing_key(event_type, task_data),
+                        encode_event(
+                            build_event(event_type, task_data), self.content_type
+                        ),
+                    )
+                )
+                accepted += 1
+            except asyncio.QueueFull:
+                self.dropped += 1
+                logger.error(
+                    f"Publisher queue full, dropped event: {event_type} "
+                    f"for task {task_data.get('id')}"
+                )
+        if self._queue.qsize() >= self.flush_size:
+            self._full.set()
+        return accepted
+
+    async def _run(self):
+        while self.exchange is None:
+            await asyncio.sleep(self.retry_seconds)
+            try:
+                await self._connect()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Failed to connect to RabbitMQ: {e}")
+        while True:
+            await self._next_batch()
+            await self._flush()
+
+    async def _connect(self):
+        self.connection = await aio_pika.connect_robust(settings.rabbitmq_url)
+        channel = await self.connection.channel(publisher_confirms=True)
+        self.exchange = await declare_task_events(channel)
+        logger.info("Async publisher connected to RabbitMQ")
+
+    async def _next_batch(self):
+        """Move the next batch from the queue to ``_in_flight``.
+
+        Events are in ``_in_flight`` as soon as they leave the queue, so
+        ``buffered`` (and ``close``) never miss the one waiting for a batch.
+        """
+        assert self._queue is not None and self._full is not None
+        self._in_flight = [await self._queue.get()]
+        try:
+            await asyncio.wait_for(self._full.wait(), timeout=self.flush_seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._full.clear()
+        while len(self._in_flight) < self.flush_size and not self._queue.empty():
+            self._in_flight.append(self._queue.get_nowait())
+
+    async def _flush(self):
+        assert self.exchange is not None
+        while self._in_flight:
+            results = await asyncio.gather(
+                *(
+                    self.exchange.publish(
+                        aio_pika.Message(
+                            body,
+                            content_type=self.content_type,
+                            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                        ),
+                        routing_key=routing_key,
+                    )
+                    for routing_key, body in self._in_flight
+                ),
+                return_exceptions=True,
+            )
+            failed = [
+                event
+                for event, result in zip(self._in_flight, results, strict=True)
+                if isinstance(result, BaseException)
+            ]
+            self.meter.add(len(self._in_flight) - len(failed))
+            self._in_flight = failed
+            if failed:
+                self.failures += 1
+                logger.error(f"{len(failed)} events not confirmed, will retry")
+                await asyncio.sleep(self.retry_seconds)
+
+    async def close(self, timeout: float = 5.0):
+        """Flush what is queued (while connected, within ``timeout``) and disconnect."""
+        if self._task is None:
+            return
+        if self.connection is not None and not self.connection.is_closed:
+            assert self._full is not None
+            self._full.set()
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while self.buffered and loop.time() < deadline:
+                await asyncio.sleep(0.01)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        if self.buffered:
+            logger.error(
+                f"Async publisher closed with {self.buffered} unpublished events"
+            )
+        if self.connection is not None:
+            await self.connection.close()
+        self.connection = self.exchange = None
+        self._queue = self._full = self._task = None
+        self._in_flight = []
+
+    @property
+    def buffered(self) -> int:
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return queued + len(self._in_flight)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connection is not None and not self.connection.is_closed,
+            "buffered": self.buffered,
+            "buffer_size": self.buffer_size,
+            "flush_seconds": self.flush_seconds,
+            "flush_size": self.flush_size,
+            "published": self.meter.total,
+            "published_per_second": round(self.meter.rate(), 2),
+            "dropped": self.dropped,
+            "failures": self.failures,
+        }
+
+
+# Singleton instance, started and closed by the app lifespan
+async_rabbitmq_service = AsyncTaskEventPublisher()
@@ -0,0 +1,245 @@
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.etag import make_etag
+from app.core.export import ExportFormat, encode_rows, export_header
+from app.core.media import JSON_MEDIA_TYPE
+from app.core.pagination import decode_id_cursor, decode_rank_cursor, split_page
+from app.repositories.async_task_repository import AsyncTaskRepository
+from app.schemas.task import (
+    TaskCreate,
+    TaskResponse,
+    TaskUpdate,
+    dump_task_row,
+    dump_task_rows,
+)
+from app.services.async_rabbitmq_service import async_rabbitmq_service
+from app.services.task_cache import task_cache
+from app.services.task_service import (
+    outbox_writer,
+    search_cursor_key,
+    task_completion_notification,
+    task_created_event,
+    task_deleted_event,
+    task_etag,
+    task_updated_event,
+)
+from app.services.teams_service import teams_service
+
+
+class AsyncTaskService:
+    """asyncio counterpart of ``TaskService``.
+
+    Database I/O never blocks the event loop, and publishing an event only
+    queues it for the aio-pika publisher.
+    """
+
+    def __init__(self, db: AsyncSession, read_db: Optional[AsyncSession] = None):
+        self.repository = AsyncTaskRepository(db)
+        self.read_repository = (
+            AsyncTaskRepository(read_db) if read_db else self.repository
+        )
+
+    async def create_task(self, task_data: TaskCreate) -> TaskResponse:
+        task = await self.repository.create(
+            task_data,
+            before_commit=outbox_writer(
+                self.repository.db, "task_created", task_created_event
+            ),
+        )
+
+        if not settings.task_events_outbox:
+            async_rabbitmq_service.publish_task_event(
+                "task_created",
+                task_created_event(task),
+            )
+
+        return TaskResponse.model_validate(task)
+
+    async def create_tasks(self, tasks_data: List[TaskCreate]) -> List[TaskResponse]:
+        tasks = await self.repository.create_many(
+            tasks_data,
+            before_commit=outbox_writer(
+                self.repository.db, "task_created", task_created_event
+            ),
+        )
+
+        if not settings.task_events_outbox:
+            async_rabbitmq_service.publish_task_events(
+                [("task_created", task_created_event(task)) for task in tasks],
+            )
+
+        return [TaskResponse.model_validate(task) for task in tasks]
+
+    async def get_task(self, task_id: int) -> Optional[TaskResponse]:
+        cached = task_cache.get(task_id)
+        if cached is not None:
+            return cached
+
+        task = await self.read_repository.get_by_id(task_id)
+        if task:
+            response = TaskResponse.model_validate(task)
+            task_cache.set(task_id, response)
+            return response
+        return None
+
+    async def get_task_fields(
+        self,
+        task_id: int,
+        fields: Sequence[str],
+        media_type: str = JSON_MEDIA_TYPE,
+    ) -> Optional[Tuple[bytes, str]]:
+        # A cached full task already holds every field; partial rows are not cached
+        cached = task_cache.get(task_id)
+        if cached is not None:
+            values, etag = dict(cached), task_etag(cached, fields)
+        else:
+            task = await self.read_repository.get_fields_by_id(task_id, fields)
+            if task is None:
+                return None
+            values, etag = task._asdict(), task_etag(task, fields)
+        return dump_task_row(values, fields, media_type), etag
+
+    async def get_task_etag(
+        self, task_id: int, fields: Optional[Sequence[str]] = None
+    ) -> Optional[str]:
+        version = await self.read_repository.get_version(task_id)
+        if version is None:
+            return None
+        return make_etag("task", task_id, version.data_atualizacao, *(fields or ()))
+
+    async def get_tasks_page_etag(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> str:
+        after_id = decode_id_cursor(cursor) if cursor is not None else None
+        version = await self.read_repository.get_page_version(skip, limit + 1, after_id)
+        return make_etag("tasks", skip, limit, cursor, *version, *(fields or ()))
+
+    async def get_all_tasks(
+        self, skip: int = 0, limit: int = 100
+    ) -> List[TaskResponse]:
+        tasks = await self.read_repository.get_all(skip, limit)
+        return [TaskResponse.model_validate(task) for task in tasks]
+
+    async def get_tasks_page(
+        self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[TaskResponse], Optional[str]]:
+        tasks, next_cursor = await self._read_tasks_page(skip, limit, cursor)
+        return [TaskResponse.model_validate(task) for task in tasks], next_cursor
+
+    async def get_tasks_page_json(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        media_type: str = JSON_MEDIA_TYPE,
+    ) -> Tuple[bytes, Optional[str]]:
+        tasks, next_cursor = await self._read_tasks_page(skip, limit, cursor, fields)
+        return dump_task_rows(tasks, fields, media_type), next_cursor
+
+    async def _read_tasks_page(
+        self,
+        skip: int,
+        limit: int,
+        cursor: Optional[str],
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[Row], Optional[str]]:
+        if cursor is not None:
+            tasks = await self.read_repository.get_page(
+                decode_id_cursor(cursor), limit + 1, fields
+            )
+        else:
+            tasks = await self.read_repository.get_all(skip, limit + 1, fields)
+        return split_page(tasks, limit)
+
+    async def export_tasks(self, fmt: ExportFormat) -> AsyncIterator[str]:
+        yield export_header(fmt)
+        async for rows in self.read_repository.stream_all(
+            settings.task_export_chunk_size
+        ):
+            yield encode_rows(rows, fmt)
+
+    @classmethod
+    async def stream_export(
+        cls, session_factory: async_sessionmaker, fmt: ExportFormat
+    ) -> AsyncIterator[str]:
+        async with session_factory() as db:
+            async for chunk in cls(db).export_tasks(fmt):
+                yield chunk
+
+    async def search_tasks(
+        self, query: str, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[TaskResponse], Optional[str]]:
+        tasks, next_cursor = await self._search(query, limit, cursor)
+        return [TaskResponse.model_validate(task) for task in tasks], next_cursor
+
+    async def search_tasks_json(
+        self,
+        query: str,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        media_type: str = JSON_MEDIA_TYPE,
+    ) -> Tuple[bytes, Optional[str]]:
+        tasks, next_cursor = await self._search(query, limit, cursor)
+        return dump_task_rows(tasks, media_type=media_type), next_cursor
+
+    async def _search(
+        self, query: str, limit: int, cursor: Optional[str]
+    ) -> Tuple[List[Row], Optional[str]]:
+        after = decode_rank_cursor(cursor) if cursor is not None else None
+        if not query.strip():
+            return [], None
+        tasks = await self.read_repository.search(query, limit + 1, after)
+        return split_page(tasks, limit, key=search_cursor_key)
+
+    async def update_task(
+        self, task_id: int, task_data: TaskUpdate
+    ) -> Optional[TaskResponse]:
+        task = await self.repository.update_with_previous_status(
+            task_id,
+            task_data,
+            before_commit=outbox_writer(
+                self.repository.db, "task_updated", task_updated_event
+            ),
+        )
+
+        if task:
+            task_cache.delete(task_id)
+            notification = task_completion_notification(task)
+            if notification:
+                await teams_service.send_task_completion_notification(notification)
+
+            if not settings.task_events_outbox:
+                async_rabbitmq_service.publish_task_event(
+                    "task_updated",
+                    task_updated_event(task),
+                )
+
+            return TaskResponse.model_validate(task)
+
+        return None
+
+    async def delete_task(self, task_id: int) -> bool:
+        task = await self.repository.delete_returning(
+            task_id,
+            before_commit=outbox_writer(
+                self.repository.db, "task_deleted", task_deleted_event
+            ),
+        )
+        if task:
+            task_cache.delete(task_id)
+            if not settings.task_events_outbox:
+                async_rabbitmq_service.publish_task_event(
+                    "task_deleted",
+                    task_deleted_event(task),
+                )
+            return True
+        return False
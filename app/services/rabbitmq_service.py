@@ -1,56 +1,366 @@
 import json
 import logging
-from typing import Any, Dict
+import queue
+import threading
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
 
+import msgpack
 import pika
+from pika.adapters.blocking_connection import BlockingChannel
 
+from app.core.circuit_breaker import CircuitBreaker
 from app.core.config import settings
+from app.core.media import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPES, packb
+from app.core.metrics import RateMeter
 
 logger = logging.getLogger(__name__)
 
+# Events are published to a topic exchange with routing keys such as
+# task.created or task.updated.status.concluida (see task_event_routing_key),
+# so consumers bind only the events they need. The fanout exchange of earlier
+# releases is bound to it with "#": the durable task_events work queue, and
+# any queue bound to the fanout by older code, still receive every event.
+TASK_EVENTS_TOPIC_EXCHANGE = "task_events.topic"
+TASK_EVENTS_EXCHANGE = "task_events"
+TASK_EVENTS_QUEUE = "task_events"
 
-class RabbitMQService:
-    def __init__(self):
-        self.connection = None
-        self.channel = None
+# Version of the event envelope (see build_event). Bodies published before it
+# existed have no "version" and count as 0; consumers refuse newer versions
+EVENT_VERSION = 1
+EVENT_CONTENT_TYPES = (JSON_MEDIA_TYPE, *MSGPACK_MEDIA_TYPES)
+
+
+class UnsupportedEvent(ValueError):
+    """An event in an encoding or envelope version this code cannot read."""
+
+
+def declare_task_events(channel):
+    """Declare both exchanges and the durable queue receiving every event."""
+    channel.exchange_declare(
+        exchange=TASK_EVENTS_TOPIC_EXCHANGE, exchange_type="topic", durable=True
+    )
+    channel.exchange_declare(
+        exchange=TASK_EVENTS_EXCHANGE, exchange_type="fanout", durable=True
+    )
+    channel.exchange_bind(
+        destination=TASK_EVENTS_EXCHANGE,
+        source=TASK_EVENTS_TOPIC_EXCHANGE,
+        routing_key="#",
+    )
+    channel.queue_declare(queue=TASK_EVENTS_QUEUE, durable=True)
+    channel.queue_bind(queue=TASK_EVENTS_QUEUE, exchange=TASK_EVENTS_EXCHANGE)
+
+
+def bind_task_events(channel, queue: str, routing_keys: Sequence[str]):
+    """Bind ``queue`` to the topic exchange for ``routing_keys`` only.
+
+    Keys take AMQP topic wildcards: ``task.updated.#`` matches every update,
+    ``task.*.status.concluida`` every event leaving a task completed.
+    """
+    for routing_key in routing_keys:
+        channel.queue_bind(
+            queue=queue, exchange=TASK_EVENTS_TOPIC_EXCHANGE, routing_key=routing_key
+        )
+
+
+def task_event_routing_key(event_type: str, task_data: Dict[str, Any]) -> str:
+    """``task.created``, ``task.updated.status.<new status>`` or ``task.deleted``."""
+    key = "task." + event_type.removeprefix("task_")
+    if event_type == "task_updated" and task_data.get("status") is not None:
+        key += f".status.{task_data['status']}"
+    return key
+
+
+def routing_key_from_body(body: str) -> str:
+    """Routing key of an already serialized event (see ``build_message``)."""
+    message = json.loads(body)
+    return task_event_routing_key(message["event_type"], message.get("task_data") or {})
+
+
+def build_event(event_type: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Envelope of a task event, before encoding.
+
+    ``event_id`` is unique per event and survives republishing (outbox relay
+    retries, redeliveries), so consumers can recognize events they handled.
+    """
+    return {
+        "version": EVENT_VERSION,
+        "event_id": uuid.uuid4().hex,
+        "event_type": event_type,
+        "task_data": task_data,
+        "timestamp": task_data.get("data_atualizacao") or task_data.get("data_criacao"),
+    }
+
+
+def build_message(event_type: str, task_data: Dict[str, Any]) -> str:
+    """JSON body of a task event, as the outbox stores it."""
+    return json.dumps(build_event(event_type, task_data), default=str)
+
+
+def encode_event(message: Dict[str, Any], content_type: str) -> bytes:
+    """Body of ``message`` in ``content_type``.
+
+    JSON turns datetimes into ``str()``; MessagePack packs them as its native
+    timestamps, which decode back to aware datetimes.
+    """
+    if content_type == JSON_MEDIA_TYPE:
+        return json.dumps(message, default=str).encode()
+    if content_type in MSGPACK_MEDIA_TYPES:
+        return packb(message)
+    raise UnsupportedEvent(f"Unsupported event content type {content_type!r}")
+
+
+def decode_event(body: bytes, content_type: Optional[str] = None) -> Dict[str, Any]:
+    """Decode a body by the ``content_type`` it was published with.
 
-    def connect(self):
+    Messages without one predate the envelope and are JSON.
+    """
+    if content_type is None or content_type == JSON_MEDIA_TYPE:
+        message = json.loads(body)
+    elif content_type in MSGPACK_MEDIA_TYPES:
+        message = msgpack.unpackb(body, timestamp=3)
+    else:
+        raise UnsupportedEvent(f"Unsupported event content type {content_type!r}")
+    if not isinstance(message, dict):
+        raise UnsupportedEvent("Event body is not an envelope")
+    if message.get("version", 0) > EVENT_VERSION:
+        raise UnsupportedEvent(f"Unsupported event version {message['version']}")
+    return message
+
+
+def event_properties(content_type: str) -> pika.BasicProperties:
+    return pika.BasicProperties(delivery_mode=2, content_type=content_type)
+
+
+class PublisherWorker(threading.Thread):
+    """Publishes the events of its buffer over a connection only it uses.
+
+    Events taken from the buffer stay pending until the broker confirms them,
+    so a connection lost mid-batch resumes at the first unconfirmed event.
+    Connection attempts go through the breaker shared by all workers.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        buffer_size: int,
+        breaker: CircuitBreaker,
+        meter: RateMeter,
+        batch_size: int = 100,
+        retry_seconds: float = 1.0,
+        content_type: str = settings.rabbitmq_event_content_type,
+    ):
+        super().__init__(name=f"rabbitmq-publisher-{index}", daemon=True)
+        # (routing key, encoded event)
+        self.buffer: "queue.Queue[Tuple[str, bytes]]" = queue.Queue(maxsize=buffer_size)
+        self.breaker = breaker
+        self.meter = meter
+        self.batch_size = batch_size
+        self.retry_seconds = retry_seconds
+        self.content_type = content_type
+        self.pending: Deque[Tuple[str, bytes]] = deque()
+        self.failures = 0
+        self.connection: Optional[pika.BlockingConnection] = None
+        self.channel: Optional[BlockingChannel] = None
+        self._stopping = threading.Event()
+
+    def run(self):
+        while True:
+            if not self.pending:
+                self._take_batch()
+                if not self.pending:
+                    if self._stopping.is_set():
+                        break
+                    continue
+            if not self.breaker.allow_request():
+                if self._stopping.is_set():
+                    break
+                self._stopping.wait(self.retry_seconds)
+                continue
+            try:
+                self._publish()
+                self.breaker.record_success()
+            except Exception as e:
+                self.failures += 1
+                self.breaker.record_failure()
+                logger.error(f"Failed to publish events, will retry: {e}")
+                self._close()
+                # Shutting down with RabbitMQ unreachable: give up on the rest
+                if self._stopping.wait(self.retry_seconds):
+                    break
+        self._close()
+
+    def _take_batch(self):
         try:
-            self.connection = pika.BlockingConnection(
-                pika.URLParameters(settings.rabbitmq_url)
-            )
-            self.channel = self.connection.channel()
-            self.channel.queue_declare(queue="task_events", durable=True)
-            logger.info("Connected to RabbitMQ")
-        except Exception as e:
-            logger.error(f"Failed to connect to RabbitMQ: {e}")
+            self.pending.append(self.buffer.get(timeout=0.5))
+        except queue.Empty:
+            return
+        while len(self.pending) < self.batch_size:
+            try:
+                self.pending.append(self.buffer.get_nowait())
+            except queue.Empty:
+                break
 
-    def publish_task_event(self, event_type: str, task_data: Dict[str, Any]):
-        if not self.channel:
-            self.connect()
+    def _connect(self) -> BlockingChannel:
+        self.connection = pika.BlockingConnection(
+            pika.URLParameters(settings.rabbitmq_url)
+        )
+        channel = self.connection.channel()
+        declare_task_events(channel)
+        channel.confirm_delivery()
+        self.channel = channel
+        logger.info(f"{self.name} connected to RabbitMQ")
+        return channel
 
+    def _publish(self):
+        channel = self.channel or self._connect()
+        properties = event_properties(self.content_type)
+        published = 0
         try:
-            message = {
-                "event_type": event_type,
-                "task_data": task_data,
-                "timestamp": task_data.get("data_atualizacao")
-                or task_data.get("data_criacao"),
-            }
-
-            self.channel.basic_publish(
-                exchange="",
-                routing_key="task_events",
-                body=json.dumps(message, default=str),
-                properties=pika.BasicProperties(delivery_mode=2),
-            )
-            logger.info(f"Published event: {event_type} for task {task_data.get('id')}")
+            while self.pending:
+                routing_key, body = self.pending[0]
+                channel.basic_publish(
+                    exchange=TASK_EVENTS_TOPIC_EXCHANGE,
+                    routing_key=routing_key,
+                    body=body,
+                    properties=properties,
+                )
+                self.pending.popleft()
+                published += 1
+        finally:
+            self.meter.add(published)
+
+    def _close(self):
+        try:
+            if self.connection and self.connection.is_open:
+                self.connection.close()
         except Exception as e:
-            logger.error(f"Failed to publish event: {e}")
+            logger.warning(f"Error closing RabbitMQ connection: {e}")
+        self.connection = None
+        self.channel = None
+
+    def stop(self, timeout: float):
+        self._stopping.set()
+        self.join(timeout=timeout)
+
+
+class TaskEventPublisher:
+    """Thread-safe publisher for task events, shared by all request threads.
+
+    Publishing only serializes the event and puts it in a worker's bounded
+    buffer, so requests never wait on RabbitMQ. Events are sharded by task id
+    across ``threads`` workers, keeping the order of each task's events. While
+    RabbitMQ is down the breaker spaces out reconnection attempts and events
+    accumulate in the buffers; once a buffer is full further events are dropped
+    and counted, unless ``block`` is set: bulk jobs (``import_tasks``) would
+    rather wait for room than lose events. Workers start with the first event.
+    """
+
+    def __init__(
+        self,
+        threads: int = settings.rabbitmq_publisher_threads,
+        buffer_size: int = settings.rabbitmq_publisher_buffer_size,
+        breaker: Optional[CircuitBreaker] = None,
+        content_type: str = settings.rabbitmq_event_content_type,
+        block: bool = False,
+    ):
+        if content_type not in EVENT_CONTENT_TYPES:
+            raise UnsupportedEvent(f"Unsupported event content type {content_type!r}")
+        self.threads = max(threads, 1)
+        self.block = block
+        self.buffer_size = buffer_size
+        self.content_type = content_type
+        self.breaker = breaker or CircuitBreaker(
+            settings.rabbitmq_breaker_failure_threshold,
+            settings.rabbitmq_breaker_reset_seconds,
+        )
+        self.meter = RateMeter()
+        self.workers: List[PublisherWorker] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.workers:
+                return
+            self.workers = [
+                PublisherWorker(
+                    index,
+                    self.buffer_size,
+                    self.breaker,
+                    self.meter,
+                    content_type=self.content_type,
+                )
+                for index in range(self.threads)
+            ]
+            for worker in self.workers:
+                worker.start()
+
+    def publish_task_event(self, event_type: str, task_data: Dict[str, Any]) -> bool:
+        """Buffer one event; False when it had to be dropped."""
+        return self.publish_task_events([(event_type, task_data)]) == 1
+
+    def publish_task_events(self, events: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """Buffer events in order; returns how many were accepted."""
+        if not events:
+            return 0
+        if not self.workers:
+            self.start()
+        workers = self.workers
+        accepted = 0
+        for event_type, task_data in events:
+            worker = workers[hash(task_data.get("id")) % len(workers)]
+            try:
+                worker.buffer.put(
+                    (
+                        task_event_routing_key(event_type, task_data),
+                        encode_event(
+                            build_event(event_type, task_data), self.content_type
+                        ),
+                    ),
+                    block=self.block,
+                )
+                accepted += 1
+            except queue.Full:
+                with self._lock:
+                    self.dropped += 1
+                logger.error(
+                    f"Publisher buffer full, dropped event: {event_type} "
+                    f"for task {task_data.get('id')}"
+                )
+        return accepted
+
+    def stop(self, timeout: float = 5.0) -> int:
+        """Publish what is buffered (within ``timeout``) and stop the workers.
+
+        Returns how many buffered events could not be published.
+        """
+        with self._lock:
+            workers, self.workers = self.workers, []
+        unpublished = 0
+        for worker in workers:
+            worker.stop(timeout)
+            lost = worker.buffer.qsize() + len(worker.pending)
+            if lost:
+                logger.error(f"{worker.name} stopped with {lost} unpublished events")
+            unpublished += lost
+        return unpublished
 
-    def close(self):
-        if self.connection and not self.connection.is_closed:
-            self.connection.close()
+    def stats(self) -> Dict[str, Any]:
+        workers = self.workers
+        return {
+            "threads": len(workers),
+            "buffered": sum(w.buffer.qsize() + len(w.pending) for w in workers),
+            "buffer_size": self.buffer_size * self.threads,
+            "published": self.meter.total,
+            "published_per_second": round(self.meter.rate(), 2),
+            "dropped": self.dropped,
+            "failures": sum(worker.failures for worker in workers),
+            "breaker": self.breaker.stats(),
+        }
 
 
 # Singleton instance
-rabbitmq_service = RabbitMQService()
+rabbitmq_service = TaskEventPublisher()
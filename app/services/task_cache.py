@@ -0,0 +1,82 @@
+import logging
+import threading
+from typing import Optional
+
+import pika
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services.rabbitmq_service import (
+    bind_task_events,
+    declare_task_events,
+    decode_event,
+)
+
+logger = logging.getLogger(__name__)
+
+INVALIDATING_EVENTS = ("task_updated", "task_deleted")
+INVALIDATING_KEYS = ("task.updated.#", "task.deleted")
+
+# Per-process cache of TaskResponse objects keyed by task id
+task_cache = TTLCache(settings.task_cache_size, settings.task_cache_ttl_seconds)
+
+
+class TaskCacheInvalidator(threading.Thread):
+    """Drops cache entries when any worker publishes an update or delete.
+
+    Each process binds its own exclusive queue to the topic exchange for
+    updates and deletes only, so every worker sees each of those events and
+    none of the creations. The cache is cleared on each (re)connection since
+    events published while disconnected are lost to this worker.
+    """
+
+    def __init__(self, cache: TTLCache, retry_seconds: float = 5.0):
+        super().__init__(name="task-cache-invalidator", daemon=True)
+        self.cache = cache
+        self.retry_seconds = retry_seconds
+        self._stopping = threading.Event()
+        self.connection: Optional[pika.BlockingConnection] = None
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                self._consume()
+            except Exception as e:
+                logger.error(f"Cache invalidation listener failed: {e}")
+                self.cache.clear()
+            self._stopping.wait(self.retry_seconds)
+
+    def _consume(self):
+        self.connection = pika.BlockingConnection(
+            pika.URLParameters(settings.rabbitmq_url)
+        )
+        try:
+            channel = self.connection.channel()
+            declare_task_events(channel)
+            queue = channel.queue_declare(
+                queue="", exclusive=True, auto_delete=True
+            ).method.queue
+            bind_task_events(channel, queue, INVALIDATING_KEYS)
+            channel.basic_consume(
+                queue=queue, on_message_callback=self.process_message, auto_ack=True
+            )
+            self.cache.clear()
+            logger.info("Cache invalidation listener connected to RabbitMQ")
+
+            while not self._stopping.is_set():
+                self.connection.process_data_events(time_limit=1)
+        finally:
+            if self.connection.is_open:
+                self.connection.close()
+
+    def process_message(self, ch, method, properties, body):
+        try:
+            message = decode_event(body, getattr(properties, "content_type", None))
+            if message.get("event_type") in INVALIDATING_EVENTS:
+                self.cache.delete(message["task_data"]["id"])
+        except Exception as e:
+            logger.error(f"Invalid task event: {e}")
+
+    def stop(self):
+        self._stopping.set()
+        self.join(timeout=self.retry_seconds)
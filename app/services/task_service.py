@@ -1,95 +1,357 @@
-from typing import List, Optional
+import asyncio
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
-from sqlalchemy.orm import Session
+import anyio.from_thread
+from sqlalchemy import Row
+from sqlalchemy.orm import Session, sessionmaker
 
+from app.core.config import settings
+from app.core.etag import make_etag
+from app.core.export import ExportFormat, encode_rows, export_header
+from app.core.media import JSON_MEDIA_TYPE
+from app.core.pagination import decode_id_cursor, decode_rank_cursor, split_page
+from app.models.outbox import OutboxEvent
 from app.models.task import TaskStatus
-from app.repositories.task_repository import TaskRepository
-from app.schemas.task import TaskCreate, TaskResponse, TaskUpdate
-from app.services.rabbitmq_service import rabbitmq_service
+from app.repositories.task_repository import BeforeCommit, TaskRepository
+from app.schemas.task import (
+    TaskCreate,
+    TaskResponse,
+    TaskUpdate,
+    dump_task_row,
+    dump_task_rows,
+)
+from app.services.rabbitmq_service import build_message, rabbitmq_service
+from app.services.task_cache import task_cache
 from app.services.teams_service import teams_service
 
 
+def task_created_event(task) -> Dict[str, Any]:
+    return {
+        "id": task.id,
+        "titulo": task.titulo,
+        "status": task.status.value,
+        # Datetimes: str() in JSON events, native timestamps in MessagePack
+        "data_criacao": task.data_criacao,
+    }
+
+
+def task_updated_event(task) -> Dict[str, Any]:
+    return {
+        "id": task.id,
+        "titulo": task.titulo,
+        "status": task.status.value,
+        "old_status": task.old_status.value,
+        "data_atualizacao": task.data_atualizacao,
+    }
+
+
+def task_deleted_event(task) -> Dict[str, Any]:
+    # The status lets projections decrement the right counter
+    return {"id": task.id, "titulo": task.titulo, "status": task.status.value}
+
+
+def task_completion_notification(task) -> Optional[Dict[str, Any]]:
+    """Teams payload when an update moved the task to completed, else None."""
+    if task.old_status == TaskStatus.COMPLETED or task.status != TaskStatus.COMPLETED:
+        return None
+    return {
+        "id": task.id,
+        "titulo": task.titulo,
+        "descricao": task.descricao,
+        "data_criacao": str(task.data_criacao),
+        "data_atualizacao": str(task.data_atualizacao),
+    }
+
+
+def send_completion_notification(notification: Dict[str, Any]):
+    """Send a Teams notification from synchronous code.
+
+    Routes run the sync service in the threadpool, so the request goes back
+    to the event loop; other callers (scripts) get a loop of their own.
+    """
+    try:
+        anyio.from_thread.run(
+            teams_service.send_task_completion_notification, notification
+        )
+    except RuntimeError:
+        # Not in an AnyIO worker thread
+        asyncio.run(teams_service.send_task_completion_notification(notification))
+
+
+def task_etag(task, fields: Optional[Sequence[str]] = None) -> str:
+    # A projection is a different representation, so it gets its own tag
+    return make_etag("task", task.id, task.data_atualizacao, *(fields or ()))
+
+
+def search_cursor_key(task) -> Dict[str, Any]:
+    return {"rank": task.rank, "id": task.id}
+
+
+def outbox_writer(
+    db, event_type: str, build: Callable[[Any], Dict[str, Any]]
+) -> BeforeCommit:
+    """``before_commit`` hook adding the events of a write to the outbox.
+
+    ``None`` while ``TASK_EVENTS_OUTBOX`` is off, in which case services
+    publish straight to RabbitMQ after the commit instead.
+    """
+    if not settings.task_events_outbox:
+        return None
+
+    def write(result: Any) -> None:
+        tasks = result if isinstance(result, list) else [result]
+        # add_all is synchronous on AsyncSession too; the commit flushes them
+        db.add_all(
+            OutboxEvent(
+                task_id=task.id,
+                event_type=event_type,
+                body=build_message(event_type, build(task)),
+            )
+            for task in tasks
+        )
+
+    return write
+
+
 class TaskService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, read_db: Optional[Session] = None):
         self.repository = TaskRepository(db)
+        # Read-only methods go to the replica session when one is given
+        self.read_repository = TaskRepository(read_db) if read_db else self.repository
 
     def create_task(self, task_data: TaskCreate) -> TaskResponse:
-        task = self.repository.create(task_data)
-
-        # Publish event
-        rabbitmq_service.publish_task_event(
-            "task_created",
-            {
-                "id": task.id,
-                "titulo": task.titulo,
-                "status": task.status.value,
-                "data_criacao": str(task.data_criacao),
-            },
+        task = self.repository.create(
+            task_data,
+            before_commit=outbox_writer(
+                self.repository.db, "task_created", task_created_event
+            ),
         )
 
+        # Publish event, unless it went to the outbox with the task
+        if not settings.task_events_outbox:
+            rabbitmq_service.publish_task_event(
+                "task_created", task_created_event(task)
+            )
+
         return TaskResponse.model_validate(task)
 
+    def create_tasks(self, tasks_data: List[TaskCreate]) -> List[TaskResponse]:
+        tasks = self.repository.create_many(
+            tasks_data,
+            before_commit=outbox_writer(
+                self.repository.db, "task_created", task_created_event
+            ),
+        )
+
+        # Publish all events in one batch
+        if not settings.task_events_outbox:
+            rabbitmq_service.publish_task_events(
+                [("task_created", task_created_event(task)) for task in tasks]
+            )
+
+        return [TaskResponse.model_validate(task) for task in tasks]
+
+    def import_tasks(
+        self, chunks: Iterable[List[TaskCreate]], publish_events: bool = True
+    ) -> Iterator[int]:
+        """Load validated chunks, one transaction each; yields rows per chunk.
+
+        Without events the rows go through ``copy_many`` (COPY on PostgreSQL);
+        with events they need their ids, so ``create_tasks`` is used instead.
+        """
+        for tasks_data in chunks:
+            if not tasks_data:
+                continue
+            if publish_events:
+                yield len(self.create_tasks(tasks_data))
+            else:
+                yield self.repository.copy_many(tasks_data)
+
     def get_task(self, task_id: int) -> Optional[TaskResponse]:
-        task = self.repository.get_by_id(task_id)
+        cached = task_cache.get(task_id)
+        if cached is not None:
+            return cached
+
+        task = self.read_repository.get_by_id(task_id)
         if task:
-            return TaskResponse.model_validate(task)
+            response = TaskResponse.model_validate(task)
+            task_cache.set(task_id, response)
+            return response
         return None
 
+    def get_task_fields(
+        self,
+        task_id: int,
+        fields: Sequence[str],
+        media_type: str = JSON_MEDIA_TYPE,
+    ) -> Optional[Tuple[bytes, str]]:
+        """Only ``fields`` of a task, encoded, with the ETag of that projection."""
+        # A cached full task already holds every field; partial rows are not cached
+        cached = task_cache.get(task_id)
+        if cached is not None:
+            values, etag = dict(cached), task_etag(cached, fields)
+        else:
+            task = self.read_repository.get_fields_by_id(task_id, fields)
+            if task is None:
+                return None
+            values, etag = task._asdict(), task_etag(task, fields)
+        return dump_task_row(values, fields, media_type), etag
+
+    def get_task_etag(
+        self, task_id: int, fields: Optional[Sequence[str]] = None
+    ) -> Optional[str]:
+        """ETag of the stored task, read from its version alone."""
+        version = self.read_repository.get_version(task_id)
+        if version is None:
+            return None
+        return make_etag("task", task_id, version.data_atualizacao, *(fields or ()))
+
+    def get_tasks_page_etag(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> str:
+        """ETag of a ``get_tasks_page`` result, from an aggregate over its rows."""
+        after_id = decode_id_cursor(cursor) if cursor is not None else None
+        version = self.read_repository.get_page_version(skip, limit + 1, after_id)
+        return make_etag("tasks", skip, limit, cursor, *version, *(fields or ()))
+
     def get_all_tasks(self, skip: int = 0, limit: int = 100) -> List[TaskResponse]:
-        tasks = self.repository.get_all(skip, limit)
+        tasks = self.read_repository.get_all(skip, limit)
         return [TaskResponse.model_validate(task) for task in tasks]
 
-    async def update_task(
+    def get_tasks_page(
+        self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[TaskResponse], Optional[str]]:
+        """Return a page of tasks and the cursor for the next page, if any.
+
+        When ``cursor`` is given, ``skip`` is ignored and the page is fetched by
+        keyset (``id > last_id``), so deep pages cost the same as the first one.
+        """
+        tasks, next_cursor = self._read_tasks_page(skip, limit, cursor)
+        return [TaskResponse.model_validate(task) for task in tasks], next_cursor
+
+    def get_tasks_page_json(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        media_type: str = JSON_MEDIA_TYPE,
+    ) -> Tuple[bytes, Optional[str]]:
+        """``get_tasks_page`` as a JSON or MessagePack body, encoded once from rows."""
+        tasks, next_cursor = self._read_tasks_page(skip, limit, cursor, fields)
+        return dump_task_rows(tasks, fields, media_type), next_cursor
+
+    def _read_tasks_page(
+        self,
+        skip: int,
+        limit: int,
+        cursor: Optional[str],
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[Row], Optional[str]]:
+        if cursor is not None:
+            # Fetch one extra row to know whether there is a next page
+            tasks = self.read_repository.get_page(
+                decode_id_cursor(cursor), limit + 1, fields
+            )
+        else:
+            tasks = self.read_repository.get_all(skip, limit + 1, fields)
+        return split_page(tasks, limit)
+
+    def export_tasks(self, fmt: ExportFormat) -> Iterator[str]:
+        """Serialize every task chunk by chunk, never holding the whole table."""
+        yield export_header(fmt)
+        for rows in self.read_repository.stream_all(settings.task_export_chunk_size):
+            yield encode_rows(rows, fmt)
+
+    @classmethod
+    def stream_export(
+        cls, session_factory: sessionmaker, fmt: ExportFormat
+    ) -> Iterator[str]:
+        """``export_tasks`` on a session owned by the stream itself."""
+        with session_factory() as db:
+            yield from cls(db).export_tasks(fmt)
+
+    def search_tasks(
+        self, query: str, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[TaskResponse], Optional[str]]:
+        """Full-text search over titulo/descricao, most relevant first."""
+        tasks, next_cursor = self._search(query, limit, cursor)
+        return [TaskResponse.model_validate(task) for task in tasks], next_cursor
+
+    def search_tasks_json(
+        self,
+        query: str,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        media_type: str = JSON_MEDIA_TYPE,
+    ) -> Tuple[bytes, Optional[str]]:
+        tasks, next_cursor = self._search(query, limit, cursor)
+        return dump_task_rows(tasks, media_type=media_type), next_cursor
+
+    def _search(
+        self, query: str, limit: int, cursor: Optional[str]
+    ) -> Tuple[List[Row], Optional[str]]:
+        after = decode_rank_cursor(cursor) if cursor is not None else None
+        if not query.strip():
+            return [], None
+        tasks = self.read_repository.search(query, limit + 1, after)
+        return split_page(tasks, limit, key=search_cursor_key)
+
+    def update_task(
         self, task_id: int, task_data: TaskUpdate
     ) -> Optional[TaskResponse]:
-        # Get current task to check status change
-        current_task = self.repository.get_by_id(task_id)
-        if not current_task:
-            return None
-
-        old_status = current_task.status
-        task = self.repository.update(task_id, task_data)
+        # Single round trip returning the new row and the status it replaced
+        task = self.repository.update_with_previous_status(
+            task_id,
+            task_data,
+            before_commit=outbox_writer(
+                self.repository.db, "task_updated", task_updated_event
+            ),
+        )
 
         if task:
-            # Check if status changed to completed
-            if (
-                old_status != TaskStatus.COMPLETED
-                and task.status == TaskStatus.COMPLETED
-            ):
+            task_cache.delete(task_id)
+            notification = task_completion_notification(task)
+            if notification:
                 # Send Teams notification
-                await teams_service.send_task_completion_notification(
-                    {
-                        "id": task.id,
-                        "titulo": task.titulo,
-                        "descricao": task.descricao,
-                        "data_criacao": str(task.data_criacao),
-                        "data_atualizacao": str(task.data_atualizacao),
-                    }
-                )
+                send_completion_notification(notification)
 
             # Publish status change event
-            rabbitmq_service.publish_task_event(
-                "task_updated",
-                {
-                    "id": task.id,
-                    "titulo": task.titulo,
-                    "status": task.status.value,
-                    "old_status": old_status.value,
-                    "data_atualizacao": str(task.data_atualizacao),
-                },
-            )
+            if not settings.task_events_outbox:
+                rabbitmq_service.publish_task_event(
+                    "task_updated", task_updated_event(task)
+                )
 
             return TaskResponse.model_validate(task)
 
         return None
 
     def delete_task(self, task_id: int) -> bool:
-        task = self.repository.get_by_id(task_id)
+        task = self.repository.delete_returning(
+            task_id,
+            before_commit=outbox_writer(
+                self.repository.db, "task_deleted", task_deleted_event
+            ),
+        )
         if task:
-            success = self.repository.delete(task_id)
-            if success:
+            task_cache.delete(task_id)
+            if not settings.task_events_outbox:
                 rabbitmq_service.publish_task_event(
-                    "task_deleted", {"id": task.id, "titulo": task.titulo}
+                    "task_deleted", task_deleted_event(task)
                 )
-            return success
+            return True
         return False
@@ -0,0 +1,123 @@
+"""Measure task event consumption throughput by prefetch and batch size.
+
+Usage:
+    python -m benchmarks.consumer_batching [--messages 10000] [--rtt-ms 0.5]
+
+Drives ``TaskEventConsumer`` with a broker stand-in instead of RabbitMQ. The
+stand-in delivers a message only while fewer than ``prefetch_count`` are
+unacked as far as it knows; an ack reaches it half a round trip (``--rtt-ms``)
+after it is sent, and the delivery it unblocks takes another half to arrive.
+The handler does no work, so the numbers isolate the cost of the ack round
+trips and the number of ack frames sent.
+"""
+
+import argparse
+import bisect
+import json
+import time
+from types import SimpleNamespace
+
+from app.consumers.task_consumer import TaskEventConsumer
+
+CONFIGS = [(1, 1), (10, 1), (100, 1), (20, 10), (200, 100), (1000, 500)]
+
+
+class StandInChannel:
+    def __init__(self):
+        # Cumulative acked tags and when each ack was sent
+        self.acked_tags = [0]
+        self.acked_at = [0.0]
+        self.acks = 0
+
+    def basic_ack(self, delivery_tag, multiple=False):
+        self.acks += 1
+        self.acked_tags.append(max(self.acked_tags[-1], delivery_tag))
+        self.acked_at.append(time.perf_counter())
+
+    def basic_nack(self, delivery_tag, multiple=False, requeue=True):
+        raise AssertionError("benchmark handler never fails")
+
+    def ready_at(self, tag: int, prefetch: int, rtt: float):
+        """When ``tag`` can arrive, or None while no ack would release it."""
+        needed = tag - prefetch
+        if needed <= 0:
+            return 0.0
+        index = bisect.bisect_left(self.acked_tags, needed)
+        if index == len(self.acked_tags):
+            return None
+        return self.acked_at[index] + rtt
+
+
+class StandInConnection:
+    def __init__(self):
+        self.timer = None
+
+    def call_later(self, delay, callback):
+        self.timer = (time.perf_counter() + delay, callback)
+        return self.timer
+
+    def remove_timeout(self, timer):
+        if self.timer is timer:
+            self.timer = None
+
+    def fire_timer(self):
+        deadline, callback = self.timer
+        self.timer = None
+        wait_until(deadline)
+        callback()
+
+
+def wait_until(deadline: float):
+    while (remaining := deadline - time.perf_counter()) > 0:
+        time.sleep(remaining)
+
+
+def run(messages, prefetch: int, batch: int, rtt: float, timeout_ms: int):
+    consumer = TaskEventConsumer(
+        handler=lambda events: None,
+        prefetch_count=prefetch,
+        batch_size=batch,
+        batch_timeout_ms=timeout_ms,
+    )
+    channel, connection = StandInChannel(), StandInConnection()
+    consumer.channel, consumer.connection = channel, connection
+
+    start = time.perf_counter()
+    for tag, body in enumerate(messages, start=1):
+        while (ready := channel.ready_at(tag, prefetch, rtt)) is None:
+            # Prefetch window full with a partial batch: only the timer acks
+            connection.fire_timer()
+        wait_until(ready)
+        consumer.process_message(channel, SimpleNamespace(delivery_tag=tag), None, body)
+    if connection.timer:
+        connection.fire_timer()
+    elapsed = time.perf_counter() - start
+    return len(messages) / elapsed, channel.acks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    parser.add_argument("--timeout-ms", type=int, default=200)
+    args = parser.parse_args()
+
+    messages = [
+        json.dumps(
+            {
+                "event_type": "task_created",
+                "task_data": {"id": i, "titulo": f"Task {i}", "status": "pendente"},
+                "timestamp": "2024-01-01T00:00:00",
+            }
+        ).encode()
+        for i in range(args.messages)
+    ]
+
+    print(f"{'prefetch':>9}{'batch':>7}{'msgs/s':>12}{'acks':>8}")
+    for prefetch, batch in CONFIGS:
+        rate, acks = run(messages, prefetch, batch, args.rtt_ms / 1000, args.timeout_ms)
+        print(f"{prefetch:>9}{batch:>7}{rate:>12,.0f}{acks:>8,}")
+
+
+if __name__ == "__main__":
+    main()
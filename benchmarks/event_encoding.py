@@ -0,0 +1,83 @@
+"""Compare JSON and MessagePack bodies of task events.
+
+Usage:
+    python -m benchmarks.event_encoding [--events 10000] [--repeat 20]
+
+Builds ``--events`` task events shaped like the ones the services publish
+(creations and status updates, datetimes as PostgreSQL's ``timestamptz``
+columns return them) and reports, for both content types, the mean body size
+and the median time per event to encode the envelope (``encode_event``) and to
+decode it as consumers do (``decode_event``).
+"""
+
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from app.core.media import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE
+from app.services.rabbitmq_service import build_event, decode_event, encode_event
+from benchmarks.pagination import timed
+
+
+def sample_events(count: int):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    events = []
+    for n in range(count):
+        at = start + timedelta(seconds=n, microseconds=n)
+        if n % 2:
+            task_data = {
+                "id": n,
+                "titulo": f"Tarefa {n}",
+                "status": "concluida",
+                "old_status": "pendente",
+                "data_atualizacao": at,
+            }
+            events.append(build_event("task_updated", task_data))
+        else:
+            task_data = {
+                "id": n,
+                "titulo": f"Tarefa {n}",
+                "status": "pendente",
+                "data_criacao": at,
+            }
+            events.append(build_event("task_created", task_data))
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    events = sample_events(args.events)
+    print(
+        f"{'format':>10}{'bytes/event':>14}{'ratio':>8}"
+        f"{'encode us':>12}{'decode us':>12}"
+    )
+    json_size = None
+    for content_type in (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE):
+        bodies = [encode_event(event, content_type) for event in events]
+        size = sum(len(body) for body in bodies) / len(bodies)
+        json_size = json_size or size
+        encode = timed(
+            lambda content_type=content_type: [
+                encode_event(event, content_type) for event in events
+            ],
+            args.repeat,
+        )
+        decode = timed(
+            lambda content_type=content_type, bodies=bodies: [
+                decode_event(body, content_type) for body in bodies
+            ],
+            args.repeat,
+        )
+        # timed() reports milliseconds per run
+        print(
+            f"{content_type.split('/')[1]:>10}{size:>14.1f}{size / json_size:>8.2f}"
+            f"{encode * 1000 / len(events):>12.2f}"
+            f"{decode * 1000 / len(events):>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Compare peak memory of the streaming export with a one-shot list response.
+
+Usage:
+    python -m benchmarks.export [--url URL] [--rows 200000]
+
+Seeds ``rows`` tasks into the target database (a temporary SQLite file by
+default), then measures time and peak traced memory for serializing all of
+them the way ``GET /api/tasks?limit=N`` does and through
+``TaskService.stream_export``.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.export import ExportFormat
+from app.schemas.task import TaskResponse
+from app.services.task_service import TaskService
+from benchmarks.pagination import seed
+
+TaskList = TypeAdapter(list[TaskResponse])
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    url = args.url or "sqlite:///" + os.path.join(
+        tempfile.gettempdir(), "benchmark_export.db"
+    )
+    engine = create_engine(url)
+    print(f"Seeding {args.rows} tasks into {engine.url.render_as_string()}...")
+    seed(engine, args.rows)
+    Session = sessionmaker(bind=engine)
+
+    def list_response():
+        with Session() as db:
+            tasks = TaskService(db).get_all_tasks(0, args.rows)
+            return len(TaskList.dump_json(tasks))
+
+    def streaming(fmt):
+        def run():
+            return sum(
+                len(chunk.encode()) for chunk in TaskService.stream_export(Session, fmt)
+            )
+
+        return run
+
+    results = {
+        "list (JSON)": measure(list_response),
+        "stream NDJSON": measure(streaming(ExportFormat.NDJSON)),
+        "stream CSV": measure(streaming(ExportFormat.CSV)),
+    }
+
+    print(f"{'strategy':<16}{'seconds':>10}{'peak MiB':>12}{'output MiB':>12}")
+    for name, (elapsed, peak, size) in results.items():
+        print(f"{name:<16}{elapsed:>10.2f}{peak / 2**20:>12.1f}{size / 2**20:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""p50/p99 latency of the task routes under concurrency, sync vs asyncio engine.
+
+Usage:
+    python -m benchmarks.load_test [--url URL] [--requests 2000] [--concurrency 50]
+
+Drives the ASGI app in-process with httpx, mixing reads and updates, once with
+the sync Session (threadpool) and once with DATABASE_ASYNC enabled. RabbitMQ
+publishing is stubbed out so only the database path is measured. Point --url at
+PostgreSQL for meaningful numbers: SQLite serializes writers and reports
+"database is locked" errors at high concurrency.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from unittest.mock import patch
+
+import httpx
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, get_async_db, get_db, to_async_url
+from app.models.task import Task
+from main import app
+
+
+async def run(requests: int, concurrency: int, task_ids, async_engine):
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+
+        async def one(i: int):
+            nonlocal errors
+            task_id = task_ids[i % len(task_ids)]
+            async with semaphore:
+                start = time.perf_counter()
+                if i % 5 == 0:
+                    response = await c.put(
+                        f"/api/tasks/{task_id}", json={"titulo": f"T{i}"}
+                    )
+                else:
+                    response = await c.get(f"/api/tasks/{task_id}")
+                errors += response.status_code >= 400
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    # Pooled aiosqlite/asyncpg connections belong to this loop: close them here
+    await async_engine.dispose()
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "rps": requests / elapsed,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    url = args.url or "sqlite:///" + os.path.join(
+        tempfile.gettempdir(), "benchmark_load.db"
+    )
+    # One connection per in-flight request so neither engine waits on the pool
+    pool = {"pool_size": args.concurrency, "max_overflow": 0}
+    engine = create_engine(url, **pool)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Task), [{"titulo": f"Task {i}"} for i in range(100)])
+    task_ids = list(range(1, 101))
+
+    SessionLocal = sessionmaker(autoflush=False, bind=engine)
+    async_engine = create_async_engine(to_async_url(url), **pool)
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+    print(f"{'engine':<8}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}{'errors':>8}")
+    for mode in (False, True):
+        with (
+            patch("app.api.routes.tasks.settings.database_async", mode),
+            patch("app.services.rabbitmq_service.rabbitmq_service.publish_task_event"),
+        ):
+            stats = asyncio.run(
+                run(args.requests, args.concurrency, task_ids, async_engine)
+            )
+        name = "async" if mode else "sync"
+        print(
+            f"{name:<8}{stats['p50']:>10.2f}{stats['p99']:>10.2f}"
+            f"{stats['rps']:>10.0f}{stats['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
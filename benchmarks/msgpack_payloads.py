@@ -0,0 +1,94 @@
+"""Compare JSON and MessagePack bodies of GET /api/tasks for large pages.
+
+Usage:
+    python -m benchmarks.msgpack_payloads [--sizes 100 1000 10000] [--repeat 20]
+
+Seeds the largest page size into an in-memory SQLite database, reads each page
+once and reports, for both media types, the body size and the median time to
+encode the rows (``dump_task_rows``) and to decode the body on the client.
+
+SQLite returns naive datetimes, which MessagePack packs through a Python hook;
+the ``tz`` rows repeat the run with aware datetimes, as PostgreSQL's
+``timestamptz`` columns return them, which the packer handles natively.
+"""
+
+import argparse
+import json
+from collections import namedtuple
+from datetime import datetime, timezone
+from functools import partial
+
+import msgpack
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.media import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE
+from app.repositories.task_repository import TaskRepository
+from app.schemas.task import dump_task_rows
+from benchmarks.pagination import seed, timed
+
+DECODERS = {
+    JSON_MEDIA_TYPE: json.loads,
+    MSGPACK_MEDIA_TYPE: partial(msgpack.unpackb, timestamp=3),
+}
+
+
+def with_timezone(rows):
+    """Copies of ``rows`` with aware datetimes, keeping the ``Row`` interface."""
+    row_type = namedtuple("TaskRow", rows[0]._fields)
+    return [
+        row_type(
+            *(
+                (
+                    value.replace(tzinfo=timezone.utc)
+                    if isinstance(value, datetime)
+                    else value
+                )
+                for value in row
+            )
+        )
+        for row in rows
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    seed(engine, max(args.sizes))
+    db = sessionmaker(bind=engine)()
+    repo = TaskRepository(db)
+
+    print(
+        f"{'rows':>8}{'dates':>7}{'format':>10}{'bytes':>12}{'ratio':>8}"
+        f"{'encode ms':>12}{'decode ms':>12}"
+    )
+    for size in args.sizes:
+        naive = repo.get_all(0, size)
+        for dates, rows in (("naive", naive), ("tz", with_timezone(naive))):
+            json_size = None
+            for media_type, decode in DECODERS.items():
+                body = dump_task_rows(rows, media_type=media_type)
+                json_size = json_size or len(body)
+                encode = timed(
+                    lambda rows=rows, media_type=media_type: dump_task_rows(
+                        rows, media_type=media_type
+                    ),
+                    args.repeat,
+                )
+                decoded = timed(
+                    lambda decode=decode, body=body: decode(body), args.repeat
+                )
+                print(
+                    f"{size:>8}{dates:>7}{media_type.split('/')[1]:>10}"
+                    f"{len(body):>12,}{len(body) / json_size:>8.2f}"
+                    f"{encode:>12.2f}{decoded:>12.2f}"
+                )
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Compare OFFSET and keyset pagination latency on shallow and deep pages.
+
+Usage:
+    python -m benchmarks.pagination [--url URL] [--limit 100] [--pages 10000]
+
+Seeds ``limit * pages`` tasks into the target database (a temporary SQLite file
+by default) and times page 1 and the last page with both strategies.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.task import Task, TaskStatus
+from app.repositories.task_repository import TaskRepository
+
+
+def seed(engine, rows: int, chunk: int = 10_000):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for start in range(0, rows, chunk):
+            conn.execute(
+                insert(Task),
+                [
+                    {
+                        "titulo": f"Task {i}",
+                        "descricao": "benchmark",
+                        "status": TaskStatus.PENDING,
+                    }
+                    for i in range(start, min(start + chunk, rows))
+                ],
+            )
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    url = args.url or "sqlite:///" + os.path.join(
+        tempfile.gettempdir(), "benchmark_pagination.db"
+    )
+    engine = create_engine(url)
+    rows = args.limit * args.pages
+    print(f"Seeding {rows} tasks into {engine.url.render_as_string()}...")
+    seed(engine, rows)
+
+    db = sessionmaker(bind=engine)()
+    repo = TaskRepository(db)
+    last_skip = (args.pages - 1) * args.limit
+    # Cursor a client would hold when requesting the last page
+    last_after_id = (
+        db.scalar(select(func.min(Task.id)).select_from(Task)) + last_skip - 1
+    )
+
+    results = {
+        ("offset", 1): timed(lambda: repo.get_all(0, args.limit), args.repeat),
+        ("offset", args.pages): timed(
+            lambda: repo.get_all(last_skip, args.limit), args.repeat
+        ),
+        ("keyset", 1): timed(lambda: repo.get_page(0, args.limit), args.repeat),
+        ("keyset", args.pages): timed(
+            lambda: repo.get_page(last_after_id, args.limit), args.repeat
+        ),
+    }
+    db.close()
+
+    print(f"{'strategy':<10}{'page':>10}{'median ms':>12}")
+    for (strategy, page), ms in results.items():
+        print(f"{strategy:<10}{page:>10}{ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
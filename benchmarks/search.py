@@ -0,0 +1,104 @@
+"""Compare full-text search with a LIKE scan over titulo/descricao.
+
+Usage:
+    python -m benchmarks.search [--url URL] [--rows 1000000] [--limit 20]
+
+Seeds ``rows`` tasks built from a small Portuguese vocabulary into the target
+database (a temporary SQLite file by default), then times the ranked search
+(first page and the page after its cursor) against ``ILIKE '%term%'`` for a
+rare and a common term.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+
+from sqlalchemy import create_engine, insert, or_, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.task import Task, TaskStatus
+from app.repositories.task_repository import TaskRepository
+from benchmarks.pagination import timed
+
+WORDS = (
+    "comprar enviar revisar relatório reunião cliente pagamento fatura "
+    "contrato proposta orçamento entrega estoque pedido cadastro backup "
+    "servidor deploy teste documentação planejamento campanha pesquisa"
+).split()
+RARE_TERM = "auditoria"
+
+
+def seed(engine, rows: int, chunk: int = 10_000):
+    rng = random.Random(42)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for start in range(0, rows, chunk):
+            batch = []
+            for i in range(start, min(start + chunk, rows)):
+                words = rng.sample(WORDS, 6)
+                if i % 10_000 == 0:
+                    words.append(RARE_TERM)
+                batch.append(
+                    {
+                        "titulo": " ".join(words[:3]).capitalize(),
+                        "descricao": " ".join(words[3:]),
+                        "status": TaskStatus.PENDING,
+                    }
+                )
+            conn.execute(insert(Task), batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    url = args.url or "sqlite:///" + os.path.join(
+        tempfile.gettempdir(), "benchmark_search.db"
+    )
+    engine = create_engine(url)
+    print(f"Seeding {args.rows} tasks into {engine.url.render_as_string()}...")
+    seed(engine, args.rows)
+
+    db = sessionmaker(bind=engine)()
+    repo = TaskRepository(db)
+
+    def like_scan(term):
+        pattern = f"%{term}%"
+        stmt = (
+            select(Task.__table__)
+            .where(or_(Task.titulo.ilike(pattern), Task.descricao.ilike(pattern)))
+            .order_by(Task.id)
+            .limit(args.limit)
+        )
+        return db.execute(stmt).all()
+
+    results = {}
+    for label, term in (("rare", RARE_TERM), ("common", WORDS[0])):
+        first_page = repo.search(term, args.limit)
+        after = (first_page[-1].rank, first_page[-1].id) if first_page else None
+        results[(label, "fts page 1")] = timed(
+            lambda term=term: repo.search(term, args.limit), args.repeat
+        )
+        results[(label, "fts page 2")] = timed(
+            lambda term=term, after=after: repo.search(term, args.limit, after),
+            args.repeat,
+        )
+        results[(label, "like scan")] = timed(
+            lambda term=term: like_scan(term), args.repeat
+        )
+    db.close()
+
+    print(f"{'term':<8}{'strategy':<14}{'median ms':>12}")
+    for (label, strategy), ms in results.items():
+        print(f"{label:<8}{strategy:<14}{ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Compare the model-based and the row-based JSON paths of GET /api/tasks.
+
+Usage:
+    python -m benchmarks.serialization [--sizes 100 1000 10000] [--repeat 20]
+
+Seeds the largest page size into an in-memory SQLite database, then for each
+page size times both paths with and without the database fetch:
+
+* models: ORM objects -> ``TaskResponse.model_validate`` per row -> FastAPI's
+  ``response_model`` validation and encoding -> ``JSONResponse``
+* rows: Core rows -> ``dump_task_rows`` (one ``TypeAdapter.dump_json`` call)
+"""
+
+import argparse
+import asyncio
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.task import Task
+from app.repositories.task_repository import TaskRepository
+from app.schemas.task import TaskResponse, dump_task_rows
+from benchmarks.pagination import seed, timed
+
+response_field = create_model_field(
+    "Response_get_tasks", List[TaskResponse], mode="serialization"
+)
+
+
+def encode_models(tasks) -> bytes:
+    content = [TaskResponse.model_validate(task) for task in tasks]
+    encoded = asyncio.run(
+        serialize_response(
+            field=response_field, response_content=content, is_coroutine=True
+        )
+    )
+    return JSONResponse(encoded).body
+
+
+def fetch_models(db, limit: int):
+    db.expunge_all()
+    return db.scalars(select(Task).order_by(Task.id).limit(limit)).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    seed(engine, max(args.sizes))
+    db = sessionmaker(bind=engine)()
+    repo = TaskRepository(db)
+
+    print(
+        f"{'rows':>8}{'encode: models':>16}{'rows':>8}"
+        f"{'fetch+encode: models':>22}{'rows':>8}  (median ms)"
+    )
+    for size in args.sizes:
+        tasks, rows = fetch_models(db, size), repo.get_all(0, size)
+        results = [
+            timed(lambda tasks=tasks: encode_models(tasks), args.repeat),
+            timed(lambda rows=rows: dump_task_rows(rows), args.repeat),
+            timed(lambda size=size: encode_models(fetch_models(db, size)), args.repeat),
+            timed(lambda size=size: dump_task_rows(repo.get_all(0, size)), args.repeat),
+        ]
+        print(
+            f"{size:>8}{results[0]:>16.2f}{results[1]:>8.2f}"
+            f"{results[2]:>22.2f}{results[3]:>8.2f}"
+        )
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ const API_BASE_URL =
 
 const api = axios.create({
   baseURL: API_BASE_URL,
+  // Send the read-your-writes cookie so reads after a write hit the primary
+  withCredentials: true,
   headers: {
     "Content-Type": "application/json",
   },
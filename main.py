@@ -1,17 +1,52 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import tasks, health
+from app.api.routes import tasks, health, dashboard
 from app.core.config import settings
 from app.core.database import engine
 from app.models.task import Base
 
+# Every model must be imported for create_all to create its table
+from app.models.outbox import OutboxEvent  # noqa: F401
+from app.models.processed_event import ProcessedEvent  # noqa: F401
+from app.models.projection import (  # noqa: F401
+    TaskActivity,
+    TaskDailyStats,
+    TaskStatusCount,
+)
+from app.services.async_rabbitmq_service import async_rabbitmq_service
+from app.services.rabbitmq_service import rabbitmq_service
+from app.services.task_cache import TaskCacheInvalidator, task_cache
+
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Other workers' updates and deletes reach this process's cache via RabbitMQ
+    invalidator = TaskCacheInvalidator(task_cache) if task_cache.enabled else None
+    if invalidator:
+        invalidator.start()
+    # The async routes publish over one aio-pika connection owned by the app
+    if settings.database_async:
+        await async_rabbitmq_service.start()
+    yield
+    await async_rabbitmq_service.close()
+    # Joining threads blocks: keep the loop free for the requests still draining
+    if invalidator:
+        await run_in_threadpool(invalidator.stop)
+    # Flush task events still buffered by the publisher threads
+    await run_in_threadpool(rabbitmq_service.stop)
+
+
 app = FastAPI(
     title=settings.app_name,
     description="Sistema de Gerenciamento de Tarefas com FastAPI, PostgreSQL e RabbitMQ",
     version="1.0.0",
     debug=settings.debug,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -20,10 +55,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(tasks.router, prefix="/api")
 app.include_router(health.router, prefix="/api")
+app.include_router(dashboard.router, prefix="/api")
 
 
 @app.get("/")
@@ -1,10 +1,21 @@
+from unittest.mock import patch
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
-from app.core.database import Base, get_db
+from app.core.database import (
+    Base,
+    get_async_db,
+    get_async_read_sessionmaker,
+    get_db,
+    get_read_sessionmaker,
+)
 from app.models.task import Task, TaskStatus
+from app.services.rabbitmq_service import rabbitmq_service
 from main import app
 
 # Use in-memory SQLite for tests
@@ -15,6 +26,12 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Same database through aiosqlite; NullPool so connections never outlive a loop
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
 
 def override_get_db():
     try:
@@ -24,6 +41,13 @@ def override_get_db():
         db.close()
 
 
+@pytest.fixture(autouse=True)
+def stop_event_publisher():
+    """Stop publisher threads started by tests that publish without a mock."""
+    yield
+    rabbitmq_service.stop(timeout=1)
+
+
 @pytest.fixture(scope="function")
 def db_session():
     """Create a fresh database session for each test."""
@@ -40,11 +64,61 @@ def db_session():
 def client(db_session):
     """Create a test client with overridden database dependency."""
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_sessionmaker] = lambda: TestingSessionLocal
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
 
+# Stand-in read replica: a separate database the primary does not write to
+replica_engine = create_engine(
+    "sqlite:///./test_replica.db", connect_args={"check_same_thread": False}
+)
+TestingReplicaSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=replica_engine
+)
+
+
+@pytest.fixture(scope="function")
+def replica_session():
+    """Create a fresh session on the stand-in read replica."""
+    Base.metadata.create_all(bind=replica_engine)
+    db = TestingReplicaSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=replica_engine)
+
+
+@pytest.fixture
+async def async_db_session(db_session):
+    """Create an asyncio session on the same fresh database."""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(scope="function")
+def async_client(db_session):
+    """Create a test client serving task routes through the asyncio service."""
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_sessionmaker] = lambda: (
+        TestingAsyncSessionLocal
+    )
+    with (
+        patch("app.api.routes.tasks.settings.database_async", True),
+        TestClient(app) as test_client,
+    ):
+        yield test_client
+    app.dependency_overrides.clear()
+
+
 @pytest.fixture
 def sample_task_data():
     """Sample task data for testing."""
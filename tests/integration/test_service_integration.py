@@ -3,6 +3,7 @@
 from unittest.mock import AsyncMock, patch
 
 import pytest
+from starlette.concurrency import run_in_threadpool
 
 from app.models.task import TaskStatus
 from app.schemas.task import TaskCreate, TaskUpdate
@@ -38,7 +39,7 @@ class TestTaskServiceIntegration:
                     "id": created_task.id,
                     "titulo": created_task.titulo,
                     "status": created_task.status.value,
-                    "data_criacao": str(created_task.data_criacao),
+                    "data_criacao": created_task.data_criacao,
                 },
             )
 
@@ -64,7 +65,9 @@ class TestTaskServiceIntegration:
         ):
             mock_teams.return_value = AsyncMock()
 
-            updated_task = await service.update_task(created_task.id, update_data)
+            updated_task = await run_in_threadpool(
+                service.update_task, created_task.id, update_data
+            )
 
             # Verificar atualização
             assert updated_task.status == TaskStatus.COMPLETED
@@ -83,7 +86,7 @@ class TestTaskServiceIntegration:
                     "titulo": updated_task.titulo,
                     "status": updated_task.status.value,
                     "old_status": TaskStatus.PENDING.value,
-                    "data_atualizacao": str(updated_task.data_atualizacao),
+                    "data_atualizacao": updated_task.data_atualizacao,
                 },
             )
 
@@ -109,7 +112,9 @@ class TestTaskServiceIntegration:
                 "app.services.task_service.rabbitmq_service.publish_task_event"
             ) as mock_publish,
         ):
-            updated_task = await service.update_task(created_task.id, update_data)
+            updated_task = await run_in_threadpool(
+                service.update_task, created_task.id, update_data
+            )
 
             # Verificar atualização
             assert updated_task.titulo == "Título Atualizado"
@@ -127,7 +132,7 @@ class TestTaskServiceIntegration:
                     "titulo": updated_task.titulo,
                     "status": updated_task.status.value,
                     "old_status": TaskStatus.PENDING.value,
-                    "data_atualizacao": str(updated_task.data_atualizacao),
+                    "data_atualizacao": updated_task.data_atualizacao,
                 },
             )
 
@@ -154,7 +159,8 @@ class TestTaskServiceIntegration:
 
             # Verificar evento
             mock_publish.assert_called_once_with(
-                "task_deleted", {"id": task_id, "titulo": "Para Deletar"}
+                "task_deleted",
+                {"id": task_id, "titulo": "Para Deletar", "status": "pendente"},
             )
 
     def test_get_all_tasks_integration(self, db_session):
@@ -202,7 +208,7 @@ class TestTaskServiceIntegration:
 
         update_data = TaskUpdate(titulo="Não existe")
 
-        result = await service.update_task(99999, update_data)
+        result = await run_in_threadpool(service.update_task, 99999, update_data)
         assert result is None
 
     @pytest.mark.asyncio
@@ -232,7 +238,9 @@ class TestTaskServiceIntegration:
                 "app.services.task_service.teams_service.send_task_completion_notification"
             ),
         ):
-            updated_task = await service.update_task(task_id, update_data)
+            updated_task = await run_in_threadpool(
+                service.update_task, task_id, update_data
+            )
 
         assert updated_task.titulo == "Fluxo Completo - Atualizado"
         assert updated_task.status == TaskStatus.PENDING
@@ -247,7 +255,9 @@ class TestTaskServiceIntegration:
             ) as mock_teams,
         ):
             mock_teams.return_value = AsyncMock()
-            completed_task = await service.update_task(task_id, complete_data)
+            completed_task = await run_in_threadpool(
+                service.update_task, task_id, complete_data
+            )
 
         assert completed_task.status == TaskStatus.COMPLETED
         mock_teams.assert_called_once()
@@ -1,3 +1,22 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+import msgpack
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import PRIMARY_COOKIE
+from app.models.task import Task, TaskStatus
+from app.repositories.projection_repository import ProjectionRepository
+from app.services.rabbitmq_service import build_message
+from app.services.task_service import task_created_event
+from main import app
+
+
 class TestTaskAPI:
     def test_create_task(self, client, sample_task_data):
         """Test creating a task via API."""
@@ -30,6 +49,35 @@ class TestTaskAPI:
 
         assert response.status_code == 422
 
+    def test_create_tasks_batch(self, client):
+        """Test creating several tasks in one request."""
+        tasks_data = [{"titulo": f"Batch {i}"} for i in range(3)]
+
+        response = client.post("/api/tasks/batch", json=tasks_data)
+
+        assert response.status_code == 201
+        data = response.json()
+        assert [task["titulo"] for task in data] == ["Batch 0", "Batch 1", "Batch 2"]
+        assert all(task["status"] == "pendente" for task in data)
+
+    def test_create_tasks_batch_invalid_item(self, client):
+        """Test that one invalid item rejects the whole batch."""
+        tasks_data = [{"titulo": "Valid"}, {"descricao": "Missing title"}]
+
+        response = client.post("/api/tasks/batch", json=tasks_data)
+
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"][:2] == ["body", 1]
+        assert client.get("/api/tasks/").json() == []
+
+    def test_create_tasks_batch_too_large(self, client):
+        """Test creating a batch above the maximum size."""
+        tasks_data = [{"titulo": "Task"}] * 1001
+
+        response = client.post("/api/tasks/batch", json=tasks_data)
+
+        assert response.status_code == 422
+
     def test_get_all_tasks(self, client, sample_task):
         """Test getting all tasks."""
         response = client.get("/api/tasks/")
@@ -57,6 +105,92 @@ class TestTaskAPI:
         data = response.json()
         assert len(data) == 2
 
+    def test_get_tasks_with_cursor(self, client):
+        """Test walking all pages with the keyset cursor."""
+        for i in range(5):
+            client.post("/api/tasks/", json={"titulo": f"Task {i}"})
+
+        response = client.get("/api/tasks/?limit=2")
+        seen = [task["titulo"] for task in response.json()]
+        cursor = response.headers["X-Next-Cursor"]
+
+        while cursor:
+            response = client.get(f"/api/tasks/?limit=2&cursor={cursor}")
+            assert response.status_code == 200
+            seen += [task["titulo"] for task in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+
+        assert seen == [f"Task {i}" for i in range(5)]
+
+    def test_get_tasks_last_page_has_no_cursor(self, client, sample_task):
+        """Test that a page smaller than the limit has no next cursor."""
+        response = client.get("/api/tasks/?limit=10")
+
+        assert response.status_code == 200
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_get_tasks_invalid_cursor(self, client):
+        """Test listing tasks with a malformed cursor."""
+        response = client.get("/api/tasks/?cursor=not-a-cursor")
+
+        assert response.status_code == 400
+
+    def test_export_tasks_ndjson(self, client):
+        """Test streaming every task as NDJSON across several chunks."""
+        client.post(
+            "/api/tasks/batch", json=[{"titulo": f"Task {i}"} for i in range(5)]
+        )
+
+        with patch("app.services.task_service.settings.task_export_chunk_size", 2):
+            response = client.get("/api/tasks/export")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        tasks = [json.loads(line) for line in response.text.splitlines()]
+        assert [task["titulo"] for task in tasks] == [f"Task {i}" for i in range(5)]
+        assert tasks[0]["status"] == "pendente"
+
+    def test_export_tasks_csv(self, client, sample_task):
+        """Test exporting tasks as CSV with a header row."""
+        response = client.get("/api/tasks/export?format=csv")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "tasks.csv" in response.headers["content-disposition"]
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 1
+        assert rows[0]["titulo"] == "Sample Task"
+        assert rows[0]["id"] == str(sample_task.id)
+
+    def test_export_tasks_invalid_format(self, client):
+        """Test exporting with an unsupported format."""
+        response = client.get("/api/tasks/export?format=xml")
+
+        assert response.status_code == 422
+
+    def test_search_tasks(self, client):
+        """Test ranked search with accent-insensitive matching and a cursor."""
+        for titulo in ["Comprar pão", "Pão de queijo com pão", "Lavar o carro"]:
+            client.post("/api/tasks/", json={"titulo": titulo})
+
+        response = client.get("/api/tasks/search?q=pao&limit=1")
+
+        assert response.status_code == 200
+        assert [task["titulo"] for task in response.json()] == ["Pão de queijo com pão"]
+        cursor = response.headers["X-Next-Cursor"]
+
+        response = client.get(f"/api/tasks/search?q=pao&limit=1&cursor={cursor}")
+        assert [task["titulo"] for task in response.json()] == ["Comprar pão"]
+
+    def test_search_tasks_validation(self, client):
+        """Test search with a missing query or a malformed cursor."""
+        assert client.get("/api/tasks/search").status_code == 422
+        assert client.get("/api/tasks/search?q=").status_code == 422
+        assert client.get("/api/tasks/search?q=%20").json() == []
+
+        response = client.get("/api/tasks/search?q=x&cursor=not-a-cursor")
+        assert response.status_code == 400
+
     def test_get_task_by_id(self, client, sample_task):
         """Test getting a specific task by ID."""
         response = client.get(f"/api/tasks/{sample_task.id}")
@@ -67,6 +201,112 @@ class TestTaskAPI:
         assert data["titulo"] == sample_task.titulo
         assert data["descricao"] == sample_task.descricao
 
+    def test_get_task_conditional(self, client, db_session):
+        """Test If-None-Match on a task until an update changes its ETag."""
+        task = Task(
+            titulo="Cached",
+            status=TaskStatus.PENDING,
+            data_atualizacao=datetime(2024, 1, 1),
+        )
+        db_session.add(task)
+        db_session.commit()
+
+        response = client.get(f"/api/tasks/{task.id}")
+        etag = response.headers["ETag"]
+        assert response.headers["Cache-Control"] == "no-cache"
+
+        response = client.get(f"/api/tasks/{task.id}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+        client.put(f"/api/tasks/{task.id}", json={"titulo": "Changed"})
+        response = client.get(f"/api/tasks/{task.id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["titulo"] == "Changed"
+        assert response.headers["ETag"] != etag
+
+    def test_get_tasks_conditional(self, client, sample_task):
+        """Test that a list ETag changes when the page's rows change."""
+        response = client.get("/api/tasks/?limit=10")
+        etag = response.headers["ETag"]
+
+        response = client.get("/api/tasks/?limit=10", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        response = client.get("/api/tasks/?limit=5", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+
+        client.post("/api/tasks/", json={"titulo": "New"})
+        response = client.get("/api/tasks/?limit=10", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+
+    def test_get_tasks_with_fields(self, client, sample_task):
+        """Test that ?fields= returns only the requested fields."""
+        response = client.get("/api/tasks/?fields=status, titulo,status")
+
+        assert response.status_code == 200
+        assert response.json() == [{"titulo": "Sample Task", "status": "pendente"}]
+        full = client.get("/api/tasks/")
+        assert response.headers["ETag"] != full.headers["ETag"]
+
+    def test_get_task_with_fields(self, client, sample_task):
+        """Test a partial task, its ETag and 404 for unknown ids."""
+        url = f"/api/tasks/{sample_task.id}?fields=id,titulo"
+        response = client.get(url)
+
+        assert response.status_code == 200
+        assert response.json() == {"id": sample_task.id, "titulo": "Sample Task"}
+
+        etag = response.headers["ETag"]
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        response = client.get(
+            f"/api/tasks/{sample_task.id}", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 200
+
+        assert client.get("/api/tasks/999?fields=id").status_code == 404
+
+    def test_get_tasks_invalid_fields(self, client):
+        """Test that unknown or empty field lists are rejected."""
+        response = client.get("/api/tasks/?fields=id,senha")
+
+        assert response.status_code == 400
+        assert "senha" in response.json()["detail"]
+        assert client.get("/api/tasks/1?fields=").status_code == 400
+
+    def test_msgpack_negotiation(self, client, sample_task):
+        """Test Accept: application/msgpack on reads and writes, JSON otherwise."""
+        accept = {"Accept": "application/msgpack"}
+
+        response = client.get("/api/tasks/?fields=id,titulo", headers=accept)
+        assert response.headers["Content-Type"] == "application/msgpack"
+        assert response.headers["Vary"] == "Accept"
+        assert msgpack.unpackb(response.content) == [
+            {"id": sample_task.id, "titulo": "Sample Task"}
+        ]
+        json_etag = client.get("/api/tasks/?fields=id,titulo").headers["ETag"]
+        assert response.headers["ETag"] != json_etag
+
+        response = client.get(f"/api/tasks/{sample_task.id}", headers=accept)
+        task = msgpack.unpackb(response.content, timestamp=3)
+        assert task["status"] == "pendente"
+        assert isinstance(task["data_criacao"], datetime)
+
+        response = client.post("/api/tasks/", json={"titulo": "Bin"}, headers=accept)
+        assert response.status_code == 201
+        assert msgpack.unpackb(response.content)["titulo"] == "Bin"
+
+        response = client.get("/api/tasks/search?q=sample", headers=accept)
+        assert len(msgpack.unpackb(response.content)) == 1
+
+        response = client.get(
+            f"/api/tasks/{sample_task.id}", headers={"Accept": "text/html"}
+        )
+        assert response.json()["id"] == sample_task.id
+
     def test_get_task_not_found(self, client):
         """Test getting a task that doesn't exist."""
         response = client.get("/api/tasks/999")
@@ -136,6 +376,84 @@ class TestTaskAPI:
         assert response.status_code == 404
 
 
+class TestReadReplicaAPI:
+    def test_reads_go_to_replica_until_client_writes(self, client, replica_session):
+        """Test replica routing and read-your-writes stickiness."""
+        replica_session.add(Task(titulo="Replica Task"))
+        replica_session.commit()
+
+        with (
+            patch(
+                "app.core.database.ReadSessionLocal",
+                sessionmaker(bind=replica_session.get_bind()),
+            ),
+            patch("app.core.database.settings.database_read_url", "sqlite:///replica"),
+        ):
+            response = client.get("/api/tasks/")
+            assert [task["titulo"] for task in response.json()] == ["Replica Task"]
+
+            response = client.post("/api/tasks/", json={"titulo": "Primary Task"})
+            assert PRIMARY_COOKIE in response.cookies
+
+            # The test client keeps the cookie: reads now hit the primary
+            response = client.get("/api/tasks/")
+            assert [task["titulo"] for task in response.json()] == ["Primary Task"]
+
+    def test_msgpack_writes_set_the_primary_cookie(self, client, sample_task):
+        """Test that MessagePack writes keep the read-your-writes cookie."""
+        accept = {"Accept": "application/msgpack"}
+        with patch("app.core.database.settings.database_read_url", "sqlite:///replica"):
+            writes = [
+                client.post("/api/tasks/", json={"titulo": "Bin"}, headers=accept),
+                client.post("/api/tasks/batch", json=[{"titulo": "B"}], headers=accept),
+                client.put(
+                    f"/api/tasks/{sample_task.id}",
+                    json={"status": "concluida"},
+                    headers=accept,
+                ),
+            ]
+
+        for response in writes:
+            assert response.headers["Content-Type"] == "application/msgpack"
+            assert PRIMARY_COOKIE in response.cookies
+
+
+class TestTaskAPIAsync:
+    def test_crud_through_async_service(self, async_client):
+        """Test the task routes with DATABASE_ASYNC enabled."""
+        response = async_client.post("/api/tasks/", json={"titulo": "Async Task"})
+        assert response.status_code == 201
+        task_id = response.json()["id"]
+
+        response = async_client.put(
+            f"/api/tasks/{task_id}", json={"status": "concluida"}
+        )
+        assert response.status_code == 200
+        assert response.json()["status"] == "concluida"
+
+        response = async_client.get("/api/tasks/?limit=1")
+        assert [task["id"] for task in response.json()] == [task_id]
+
+        assert async_client.delete(f"/api/tasks/{task_id}").status_code == 204
+        assert async_client.get(f"/api/tasks/{task_id}").status_code == 404
+
+    def test_conditional_get_through_async_service(self, async_client, sample_task):
+        """Test ETags with DATABASE_ASYNC enabled."""
+        for url in (f"/api/tasks/{sample_task.id}", "/api/tasks/"):
+            etag = async_client.get(url).headers["ETag"]
+
+            response = async_client.get(url, headers={"If-None-Match": etag})
+
+            assert response.status_code == 304
+
+    def test_export_through_async_service(self, async_client, sample_task):
+        """Test streaming the export with DATABASE_ASYNC enabled."""
+        response = async_client.get("/api/tasks/export")
+
+        assert response.status_code == 200
+        assert json.loads(response.text)["id"] == sample_task.id
+
+
 class TestHealthAPI:
     def test_health_check(self, client):
         """Test basic health check endpoint."""
@@ -155,6 +473,67 @@ class TestHealthAPI:
         assert "status" in data
         assert "database" in data
 
+    def test_pool_health_check(self, client):
+        """Test connection pool statistics endpoint."""
+        response = client.get("/api/health/pool")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert "checked_out" in data["primary"]
+        assert "timeouts" in data["primary"]
+
+    def test_cache_health_check(self, client):
+        """Test task cache statistics endpoint."""
+        response = client.get("/api/health/cache")
+
+        assert response.status_code == 200
+        assert {"hits", "misses", "evictions"} <= response.json().keys()
+
+    def test_outbox_health_check(self, client):
+        """Test outbox lag endpoint."""
+        with patch("app.services.task_service.settings.task_events_outbox", True):
+            client.post("/api/tasks/", json={"titulo": "Pending event"})
+
+        response = client.get("/api/health/outbox")
+
+        assert response.status_code == 200
+        assert response.json()["pending"] == 1
+        assert response.json()["lag_seconds"] >= 0
+
+
+class TestDashboardAPI:
+    def test_dashboard_reads_projections(self, client, db_session):
+        """Test that dashboard endpoints serve the projections, not the tasks."""
+        events = [
+            json.loads(build_message("task_created", task_created_event(task)))
+            for task in (
+                Task(id=1, titulo="A", status=TaskStatus.PENDING),
+                Task(id=2, titulo="B", status=TaskStatus.COMPLETED),
+            )
+        ]
+        ProjectionRepository(db_session).apply(events)
+        db_session.commit()
+
+        status_response = client.get("/api/dashboard/status")
+        daily_response = client.get("/api/dashboard/daily", params={"days": 7})
+        activity_response = client.get("/api/dashboard/activity", params={"limit": 1})
+
+        assert status_response.json() == {
+            "total": 2,
+            "counts": {"pendente": 1, "concluida": 1},
+        }
+        (today,) = daily_response.json()
+        assert (today["created"], today["completed"]) == (2, 0)
+        (latest,) = activity_response.json()
+        assert (latest["task_id"], latest["event_type"]) == (2, "task_created")
+        # Nothing was written to the tasks table itself
+        assert client.get("/api/tasks/").json() == []
+
+    def test_dashboard_limits(self, client):
+        """Test query parameter bounds on the dashboard endpoints."""
+        assert client.get("/api/dashboard/daily?days=0").status_code == 422
+        assert client.get("/api/dashboard/activity?limit=100000").status_code == 422
+
 
 class TestRootAPI:
     def test_root_endpoint(self, client):
@@ -165,3 +544,22 @@ class TestRootAPI:
         data = response.json()
         assert "message" in data
         assert "docs" in data
+
+
+class TestLifespan:
+    def test_shutdown_joins_publisher_threads_off_the_loop(self, db_session):
+        """Test that stopping the publisher threads does not block the event loop."""
+        on_loop = []
+
+        def stop():
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+
+        with patch("main.rabbitmq_service.stop", side_effect=stop):
+            with TestClient(app):
+                pass
+
+        assert on_loop == [False]
@@ -0,0 +1,231 @@
+import io
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import msgpack
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app.core.bulk_import import validate_chunks
+from app.core.cache import TTLCache
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.etag import etag_matches, make_etag
+from app.core.export import ExportFormat, encode_rows, export_header
+from app.core.media import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, negotiate, packb
+from app.core.metrics import RateMeter
+from app.core.pool import (
+    InstrumentedNullPool,
+    InstrumentedQueuePool,
+    engine_options,
+    pool_status,
+)
+
+
+class TestConnectionPool:
+    def test_pool_records_checkouts_and_timeouts(self):
+        """Test that the instrumented pool counts waits and timeouts."""
+        engine = create_engine(
+            "sqlite:///./test_pool.db",
+            poolclass=InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.01,
+        )
+
+        with engine.connect():
+            assert pool_status(engine)["checked_out"] == 1
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+
+        status = pool_status(engine)
+        assert status["checkouts"] == 1
+        assert status["timeouts"] == 1
+        assert status["checked_out"] == 0
+        assert status["wait_max_ms"] >= 10
+
+        engine.dispose()
+        assert pool_status(engine)["timeouts"] == 1
+
+    def test_engine_options_pool_settings(self):
+        """Test that pool settings are passed to the engine."""
+        with patch("app.core.pool.settings.db_pool_size", 20):
+            options = engine_options("postgresql://localhost/taskmanager")
+
+        assert options["poolclass"] is InstrumentedQueuePool
+        assert options["pool_size"] == 20
+        assert options["pool_pre_ping"] is True
+
+    def test_engine_options_pgbouncer_mode(self):
+        """Test that PgBouncer mode disables pooling and prepared statements."""
+        with patch("app.core.pool.settings.db_pgbouncer_mode", True):
+            options = engine_options(
+                "postgresql+asyncpg://localhost/taskmanager", is_async=True
+            )
+
+        assert options["poolclass"] is InstrumentedNullPool
+        assert options["connect_args"]["statement_cache_size"] == 0
+
+    def test_engine_options_in_memory_sqlite(self):
+        """Test that in-memory SQLite keeps its single-connection pool."""
+        assert engine_options("sqlite://") == {}
+
+
+class TestBulkImport:
+    def test_validate_ndjson_in_chunks(self):
+        """Test that invalid records are reported by line and skipped."""
+        stream = io.StringIO(
+            '{"titulo": "A"}\n'
+            "\n"
+            "{not json\n"
+            '{"titulo": ""}\n'
+            '{"titulo": "B", "descricao": "x", "status": "concluida"}\n'
+        )
+
+        chunks = list(validate_chunks(stream, ExportFormat.NDJSON, chunk_size=2))
+
+        assert [task.titulo for chunk in chunks for task in chunk.tasks] == ["A", "B"]
+        assert [line for chunk in chunks for line, _ in chunk.errors] == [3, 4]
+        assert len(chunks) == 2
+
+    def test_validate_csv_export_round_trip(self, sample_task):
+        """Test that a CSV export can be read back for import."""
+        stream = io.StringIO(
+            export_header(ExportFormat.CSV)
+            + encode_rows([sample_task], ExportFormat.CSV)
+        )
+
+        (chunk,) = validate_chunks(stream, ExportFormat.CSV, chunk_size=10)
+
+        assert chunk.errors == []
+        assert chunk.tasks[0].titulo == "Sample Task"
+        assert chunk.tasks[0].descricao == "Sample description"
+
+
+class TestTTLCache:
+    def test_evicts_least_recently_used(self):
+        """Test LRU eviction and the hit/miss/eviction counters."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set(1, "a")
+        cache.set(2, "b")
+        assert cache.get(1) == "a"
+
+        cache.set(3, "c")
+
+        assert cache.get(2) is None
+        assert cache.get(1) == "a"
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+        assert stats["size"] == 2
+
+    def test_entries_expire(self):
+        """Test that entries are dropped once their TTL has passed."""
+        now = [100.0]
+        cache = TTLCache(maxsize=10, ttl=5, clock=lambda: now[0])
+        cache.set(1, "a")
+
+        now[0] += 4.9
+        assert cache.get(1) == "a"
+        now[0] += 0.2
+        assert cache.get(1) is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_disabled_cache_keeps_nothing(self):
+        """Test that a zero-sized cache never stores entries."""
+        cache = TTLCache(maxsize=0, ttl=60)
+        cache.set(1, "a")
+
+        assert cache.get(1) is None
+        assert cache.stats()["enabled"] is False
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        """Test that the circuit opens at the threshold and a success resets it."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == "closed"
+
+        breaker.record_failure()
+
+        assert breaker.state == "open"
+        assert breaker.allow_request() is False
+
+    def test_half_open_allows_one_trial(self):
+        """Test that after the timeout one call is let through to probe recovery."""
+        now = [100.0]
+        breaker = CircuitBreaker(1, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+
+        now[0] += 10
+        assert breaker.allow_request() is True
+        assert breaker.allow_request() is False
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+        now[0] += 10
+        assert breaker.allow_request() is True
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.stats()["times_opened"] == 2
+
+
+class TestRateMeter:
+    def test_rate_over_sliding_window(self):
+        """Test events per second over the window, forgetting older buckets."""
+        now = [1000.0]
+        meter = RateMeter(window_seconds=10, clock=lambda: now[0])
+        meter.add(50)
+        now[0] += 5
+        meter.add(50)
+
+        assert meter.rate() == pytest.approx(20.0)
+
+        now[0] += 10
+        meter.add(30)
+
+        assert meter.rate() == pytest.approx(3.0)
+        assert meter.total == 130
+
+
+class TestETag:
+    def test_make_etag_is_stable_and_quoted(self):
+        """Test that the same version fields give the same strong ETag."""
+        etag = make_etag("task", 1, "2024-01-01 00:00:00")
+
+        assert etag == make_etag("task", 1, "2024-01-01 00:00:00")
+        assert etag != make_etag("task", 1, "2024-01-01 00:00:01")
+        assert etag.startswith('"') and etag.endswith('"')
+
+    def test_etag_matches(self):
+        """Test If-None-Match parsing: lists, weak tags and wildcard."""
+        etag = make_etag("task", 1)
+
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"other", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+        assert not etag_matches(None, etag)
+
+
+class TestMediaNegotiation:
+    def test_negotiate(self):
+        """Test that MessagePack is only chosen when explicitly preferred."""
+        assert negotiate(None) == JSON_MEDIA_TYPE
+        assert negotiate("*/*") == JSON_MEDIA_TYPE
+        assert negotiate("application/msgpack") == MSGPACK_MEDIA_TYPE
+        assert negotiate("application/x-msgpack, */*") == MSGPACK_MEDIA_TYPE
+        assert negotiate("application/msgpack;q=0.5, */*") == JSON_MEDIA_TYPE
+        assert negotiate("application/json;q=0.9, application/msgpack") == (
+            MSGPACK_MEDIA_TYPE
+        )
+        assert negotiate("application/msgpack;q=0") == JSON_MEDIA_TYPE
+
+    def test_packb_uses_native_timestamps(self):
+        """Test that datetimes round-trip as timestamps, naive ones as UTC."""
+        naive = datetime(2024, 1, 1, 12, 30)
+
+        decoded = msgpack.unpackb(packb({"at": naive}), timestamp=3)
+
+        assert decoded == {"at": naive.replace(tzinfo=timezone.utc)}
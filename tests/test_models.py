@@ -1,3 +1,9 @@
+import os
+import subprocess
+import sys
+
+from sqlalchemy import create_engine, inspect
+
 from app.models.task import Task, TaskStatus
 
 
@@ -41,3 +47,24 @@ class TestTaskModel:
         db_session.refresh(sample_task)
 
         assert sample_task.status == TaskStatus.COMPLETED
+
+
+class TestSchemaBootstrap:
+    def test_main_creates_every_table(self, tmp_path):
+        """Test that importing main alone creates the tables of all models."""
+        database_url = f"sqlite:///{tmp_path / 'bootstrap.db'}"
+        subprocess.run(
+            [sys.executable, "-c", "import main"],
+            env={**os.environ, "DATABASE_URL": database_url},
+            check=True,
+        )
+
+        tables = set(inspect(create_engine(database_url)).get_table_names())
+        assert {
+            "tasks",
+            "outbox_events",
+            "processed_events",
+            "task_status_counts",
+            "task_daily_stats",
+            "task_activity",
+        } <= tables
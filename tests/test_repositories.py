@@ -1,6 +1,15 @@
-from app.models.task import TaskStatus
-from app.repositories.task_repository import TaskRepository
+import json
+from datetime import date
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+from app.models.task import Task, TaskStatus
+from app.repositories.async_task_repository import AsyncTaskRepository
+from app.repositories.projection_repository import ProjectionRepository
+from app.repositories.task_repository import TaskRepository, copy_text
 from app.schemas.task import TaskCreate, TaskUpdate
+from app.services.rabbitmq_service import build_message
 
 
 class TestTaskRepository:
@@ -18,6 +27,43 @@ class TestTaskRepository:
         assert task.descricao == "Test description"
         assert task.status == TaskStatus.PENDING
 
+    def test_create_many_single_statement(self, db_session):
+        """Test that a batch is inserted with one statement."""
+        repo = TaskRepository(db_session)
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            tasks = repo.create_many(
+                [TaskCreate(titulo=f"Task {i}") for i in range(10)]
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+
+        assert len(statements) == 1
+        assert [task.titulo for task in tasks] == [f"Task {i}" for i in range(10)]
+        assert all(task.status == TaskStatus.PENDING for task in tasks)
+
+    def test_copy_many(self, db_session):
+        """Test bulk-loading tasks without RETURNING (executemany on SQLite)."""
+        repo = TaskRepository(db_session)
+
+        count = repo.copy_many([TaskCreate(titulo=f"Task {i}") for i in range(3)])
+
+        assert count == 3
+        tasks = repo.get_all()
+        assert [task.titulo for task in tasks] == ["Task 0", "Task 1", "Task 2"]
+        assert all(task.status == TaskStatus.PENDING for task in tasks)
+
+    def test_copy_text_escapes_values(self):
+        """Test escaping values for COPY's text format."""
+        assert copy_text(None) == "\\N"
+        assert copy_text("a\tb\nc\\d") == "a\\tb\\nc\\\\d"
+
     def test_get_task_by_id(self, db_session, sample_task):
         """Test getting task by ID."""
         repo = TaskRepository(db_session)
@@ -64,6 +110,27 @@ class TestTaskRepository:
         tasks = repo.get_all(skip=2, limit=2)
         assert len(tasks) == 2
 
+    def test_get_page_after_id(self, db_session):
+        """Test keyset pagination by id."""
+        repo = TaskRepository(db_session)
+
+        created = [repo.create(TaskCreate(titulo=f"Task {i}")) for i in range(5)]
+
+        tasks = repo.get_page(after_id=created[1].id, limit=2)
+
+        assert [task.id for task in tasks] == [created[2].id, created[3].id]
+
+    def test_get_all_projects_fields(self, db_session, sample_task):
+        """Test that a field list selects only those columns, plus the id."""
+        repo = TaskRepository(db_session)
+
+        tasks = repo.get_all(fields=["titulo", "status"])
+        task = repo.get_fields_by_id(sample_task.id, ["titulo"])
+
+        assert tasks[0]._fields == ("titulo", "id", "status")
+        assert task._fields == ("titulo", "id", "data_atualizacao")
+        assert repo.get_fields_by_id(999, ["titulo"]) is None
+
     def test_update_task(self, db_session, sample_task):
         """Test updating a task."""
         repo = TaskRepository(db_session)
@@ -77,6 +144,17 @@ class TestTaskRepository:
         assert updated_task.status == TaskStatus.COMPLETED
         assert updated_task.descricao == sample_task.descricao
 
+    def test_update_with_previous_status(self, db_session, sample_task):
+        """Test that an update returns the status it replaced."""
+        repo = TaskRepository(db_session)
+
+        updated_task = repo.update_with_previous_status(
+            sample_task.id, TaskUpdate(status=TaskStatus.COMPLETED)
+        )
+
+        assert updated_task.status == TaskStatus.COMPLETED
+        assert updated_task.old_status == TaskStatus.PENDING
+
     def test_update_nonexistent_task(self, db_session):
         """Test updating a task that doesn't exist."""
         repo = TaskRepository(db_session)
@@ -97,6 +175,30 @@ class TestTaskRepository:
         found_task = repo.get_by_id(sample_task.id)
         assert found_task is None
 
+    def test_delete_returning(self, db_session, sample_task):
+        """Test that a delete returns the id and title of the task."""
+        repo = TaskRepository(db_session)
+        task_id, titulo = sample_task.id, sample_task.titulo
+
+        deleted_task = repo.delete_returning(task_id)
+
+        assert (deleted_task.id, deleted_task.titulo) == (task_id, titulo)
+        assert repo.get_by_id(task_id) is None
+
+    def test_delete_returning_without_returning_support(
+        self, db_session, sample_task, monkeypatch
+    ):
+        """Test the fallback for databases without DELETE RETURNING."""
+        repo = TaskRepository(db_session)
+        task_id = sample_task.id
+        monkeypatch.setattr(db_session.get_bind().dialect, "delete_returning", False)
+
+        deleted_task = repo.delete_returning(task_id)
+
+        assert deleted_task.id == task_id
+        assert repo.get_by_id(task_id) is None
+        assert repo.delete_returning(task_id) is None
+
     def test_delete_nonexistent_task(self, db_session):
         """Test deleting a task that doesn't exist."""
         repo = TaskRepository(db_session)
@@ -105,6 +207,57 @@ class TestTaskRepository:
 
         assert success is False
 
+    def test_stream_all_in_chunks(self, db_session):
+        """Test that streaming yields every task in id order, chunk by chunk."""
+        repo = TaskRepository(db_session)
+        created = repo.create_many([TaskCreate(titulo=f"Task {i}") for i in range(5)])
+
+        chunks = list(repo.stream_all(chunk_size=2))
+
+        assert [len(rows) for rows in chunks] == [2, 2, 1]
+        assert [row.id for rows in chunks for row in rows] == [t.id for t in created]
+
+    def test_search_ranks_and_paginates(self, db_session):
+        """Test that full-text search ranks matches and pages by cursor."""
+        repo = TaskRepository(db_session)
+        repo.create_many(
+            [
+                TaskCreate(titulo="Comprar pão", descricao="padaria"),
+                TaskCreate(titulo="Pão de queijo", descricao="pão pão"),
+                TaskCreate(titulo="Lavar o carro"),
+            ]
+        )
+
+        results = repo.search("pao", limit=10)
+
+        assert [task.titulo for task in results] == ["Pão de queijo", "Comprar pão"]
+        assert results[0].rank >= results[1].rank
+
+        after = (results[0].rank, results[0].id)
+        next_page = repo.search("pao", limit=10, after=after)
+        assert [task.titulo for task in next_page] == ["Comprar pão"]
+
+    def test_search_follows_updates_and_deletes(self, db_session, sample_task):
+        """Test that the search index tracks updates and deletes."""
+        repo = TaskRepository(db_session)
+
+        repo.update(
+            sample_task.id,
+            TaskUpdate(titulo="Relatório mensal", descricao="Fechamento"),
+        )
+        assert repo.search("Sample") == []
+        assert [task.id for task in repo.search("relatorio")] == [sample_task.id]
+
+        repo.delete(sample_task.id)
+        assert repo.search("relatorio") == []
+
+    def test_search_escapes_query_syntax(self, db_session, sample_task):
+        """Test that quotes and operators in the query are matched literally."""
+        repo = TaskRepository(db_session)
+
+        assert repo.search('Sample" OR "x') == []
+        assert repo.search("Sample NOT") == []
+
     def test_get_by_status(self, db_session):
         """Test getting tasks by status."""
         repo = TaskRepository(db_session)
@@ -125,3 +278,176 @@ class TestTaskRepository:
         completed_tasks = repo.get_by_status(TaskStatus.COMPLETED)
         assert len(completed_tasks) == 1
         assert completed_tasks[0].titulo == "Completed Task"
+
+
+class TestAsyncTaskRepository:
+    async def test_create_and_get_task(self, async_db_session):
+        """Test creating and reading a task through the asyncio repository."""
+        repo = AsyncTaskRepository(async_db_session)
+
+        task = await repo.create(TaskCreate(titulo="Async Task"))
+        found_task = await repo.get_by_id(task.id)
+
+        assert found_task.titulo == "Async Task"
+        assert found_task.status == TaskStatus.PENDING
+
+    async def test_get_page(self, async_db_session):
+        """Test keyset pagination through the asyncio repository."""
+        repo = AsyncTaskRepository(async_db_session)
+
+        created = await repo.create_many(
+            [TaskCreate(titulo=f"Task {i}") for i in range(4)]
+        )
+        tasks = await repo.get_page(after_id=created[0].id, limit=2)
+
+        assert [task.id for task in tasks] == [created[1].id, created[2].id]
+
+    async def test_get_page_projects_fields(self, async_db_session, sample_task):
+        """Test column projection through the asyncio repository."""
+        repo = AsyncTaskRepository(async_db_session)
+
+        tasks = await repo.get_page(after_id=0, fields=["status"])
+        task = await repo.get_fields_by_id(sample_task.id, ["status"])
+
+        assert tasks[0]._fields == ("id", "status")
+        assert task._fields == ("id", "status", "data_atualizacao")
+
+    async def test_stream_all(self, async_db_session):
+        """Test streaming tasks in chunks through the asyncio repository."""
+        repo = AsyncTaskRepository(async_db_session)
+        await repo.create_many([TaskCreate(titulo=f"Task {i}") for i in range(3)])
+
+        chunks = [rows async for rows in repo.stream_all(chunk_size=2)]
+
+        assert [len(rows) for rows in chunks] == [2, 1]
+
+    async def test_search(self, async_db_session, sample_task):
+        """Test full-text search through the asyncio repository."""
+        repo = AsyncTaskRepository(async_db_session)
+
+        results = await repo.search("sample")
+
+        assert [task.id for task in results] == [sample_task.id]
+
+    async def test_update_with_previous_status(self, async_db_session, sample_task):
+        """Test that an asyncio update returns the status it replaced."""
+        repo = AsyncTaskRepository(async_db_session)
+
+        updated_task = await repo.update_with_previous_status(
+            sample_task.id, TaskUpdate(status=TaskStatus.COMPLETED)
+        )
+
+        assert updated_task.status == TaskStatus.COMPLETED
+        assert updated_task.old_status == TaskStatus.PENDING
+
+    async def test_delete_returning(self, async_db_session, sample_task):
+        """Test deleting a task through the asyncio repository."""
+        repo = AsyncTaskRepository(async_db_session)
+        task_id = sample_task.id
+
+        deleted_task = await repo.delete_returning(task_id)
+
+        assert deleted_task.id == task_id
+        assert await repo.get_by_id(task_id) is None
+        assert await repo.delete(task_id) is False
+
+
+def task_event(event_type, **task_data):
+    return json.loads(build_message(event_type, task_data))
+
+
+class TestProjectionRepository:
+    def test_apply_events(self, db_session):
+        """Test that created, updated and deleted events update every projection."""
+        repo = ProjectionRepository(db_session)
+        created = "2026-10-16 09:00:00+00:00"
+        completed = "2026-10-17 10:00:00+00:00"
+
+        repo.apply(
+            [
+                task_event(
+                    "task_created",
+                    id=1,
+                    titulo="A",
+                    status="pendente",
+                    data_criacao=created,
+                ),
+                task_event(
+                    "task_created",
+                    id=2,
+                    titulo="B",
+                    status="pendente",
+                    data_criacao=created,
+                ),
+            ]
+        )
+        repo.apply(
+            [
+                task_event(
+                    "task_updated",
+                    id=1,
+                    titulo="A",
+                    status="concluida",
+                    old_status="pendente",
+                    data_atualizacao=completed,
+                ),
+                task_event("task_deleted", id=2, titulo="B", status="pendente"),
+            ]
+        )
+        db_session.commit()
+
+        assert repo.status_counts() == {"pendente": 0, "concluida": 1}
+        assert [tuple(row) for row in repo.daily_stats(date(2026, 10, 1))] == [
+            (date(2026, 10, 16), 2, 0),
+            (date(2026, 10, 17), 0, 1),
+        ]
+        activity = repo.recent_activity(10)
+        assert [(row.task_id, row.event_type) for row in activity] == [
+            (2, "task_deleted"),
+            (1, "task_updated"),
+            (2, "task_created"),
+            (1, "task_created"),
+        ]
+
+    def test_activity_is_trimmed(self, db_session):
+        """Test that the activity feed keeps only the latest events."""
+        repo = ProjectionRepository(db_session)
+        with patch(
+            "app.repositories.projection_repository.settings.projection_activity_size",
+            3,
+        ):
+            repo.apply(
+                [
+                    task_event("task_created", id=i, titulo=f"T{i}", status="pendente")
+                    for i in range(5)
+                ]
+            )
+        db_session.commit()
+
+        activity = repo.recent_activity(10)
+        assert [row.task_id for row in activity] == [4, 3, 2]
+
+    def test_rebuild_from_tasks(self, db_session):
+        """Test that a rebuild matches the tasks table and replaces old data."""
+        repo = ProjectionRepository(db_session)
+        repo.apply([task_event("task_created", id=99, titulo="X", status="pendente")])
+        db_session.add_all(
+            [
+                Task(titulo="Open", status=TaskStatus.PENDING),
+                Task(titulo="Done", status=TaskStatus.COMPLETED),
+                Task(titulo="Also done", status=TaskStatus.COMPLETED),
+            ]
+        )
+        db_session.commit()
+
+        repo.rebuild()
+        db_session.commit()
+
+        assert repo.status_counts() == {"pendente": 1, "concluida": 2}
+        (today,) = repo.daily_stats(date(2000, 1, 1))
+        assert (today.created, today.completed) == (3, 2)
+        assert [row.titulo for row in repo.recent_activity(10)] == [
+            "Also done",
+            "Done",
+            "Open",
+        ]
@@ -1,10 +1,62 @@
-from unittest.mock import Mock, patch
+import asyncio
+import json
+import signal
+import sys
+import threading
+import time
+import warnings
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, Mock, call, patch
 
+import pika
 import pytest
+from pika.exceptions import (
+    AMQPConnectionError,
+    ConnectionWrongStateError,
+    NackError,
+    StreamLostError,
+)
+from sqlalchemy import event, select
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 
-from app.models.task import TaskStatus
-from app.schemas.task import TaskCreate, TaskUpdate
-from app.services.rabbitmq_service import RabbitMQService
+from app.commands.dead_letters import DeadLetters
+from app.commands.outbox_relay import OutboxRelay
+from app.consumers.dedup import EventDeduplicator
+from app.consumers.projections import project_events
+from app.consumers.retry import declare_retry_topology
+from app.consumers.supervisor import (
+    ConsumerSupervisor,
+    load_handler,
+    run_worker,
+)
+from app.consumers.supervisor import main as supervisor_main
+from app.consumers.task_consumer import TaskEventConsumer
+from app.core.cache import TTLCache
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.media import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE
+from app.core.metrics import RateMeter
+from app.models.outbox import OutboxEvent
+from app.models.processed_event import ProcessedEvent
+from app.models.task import Task, TaskStatus
+from app.repositories.projection_repository import ProjectionRepository
+from app.schemas.task import TaskCreate, TaskResponse, TaskRow, TaskUpdate
+from app.services.async_rabbitmq_service import AsyncTaskEventPublisher
+from app.services.async_task_service import AsyncTaskService
+from app.services.rabbitmq_service import (
+    TASK_EVENTS_QUEUE,
+    TASK_EVENTS_TOPIC_EXCHANGE,
+    PublisherWorker,
+    TaskEventPublisher,
+    UnsupportedEvent,
+    build_event,
+    build_message,
+    declare_task_events,
+    decode_event,
+    encode_event,
+    task_event_routing_key,
+)
+from app.services.task_cache import TaskCacheInvalidator
 from app.services.task_service import TaskService
 from app.services.teams_service import TeamsService
 
@@ -30,6 +82,58 @@ class TestTaskService:
             call_args = mock_publish.call_args
             assert call_args[0][0] == "task_created"
 
+    def test_create_tasks(self, db_session):
+        """Test creating tasks in batch publishes all events at once."""
+        service = TaskService(db_session)
+        tasks_data = [TaskCreate(titulo=f"Batch {i}") for i in range(3)]
+
+        with patch(
+            "app.services.task_service.rabbitmq_service.publish_task_events"
+        ) as mock_publish:
+            tasks = service.create_tasks(tasks_data)
+
+            assert [task.titulo for task in tasks] == ["Batch 0", "Batch 1", "Batch 2"]
+
+            mock_publish.assert_called_once()
+            events = mock_publish.call_args[0][0]
+            assert [event_type for event_type, _ in events] == ["task_created"] * 3
+            assert [data["id"] for _, data in events] == [task.id for task in tasks]
+
+    def test_import_tasks(self, db_session):
+        """Test importing chunks with and without task_created events."""
+        service = TaskService(db_session)
+        chunks = [
+            [TaskCreate(titulo="A"), TaskCreate(titulo="B")],
+            [],
+            [TaskCreate(titulo="C")],
+        ]
+
+        with patch(
+            "app.services.task_service.rabbitmq_service.publish_task_events"
+        ) as mock_publish:
+            assert list(service.import_tasks(chunks)) == [2, 1]
+            assert mock_publish.call_count == 2
+
+            mock_publish.reset_mock()
+            assert list(service.import_tasks(chunks, publish_events=False)) == [2, 1]
+            mock_publish.assert_not_called()
+
+        assert len(service.get_all_tasks()) == 6
+
+    def test_get_tasks_page_json_matches_models(self, db_session, sample_task):
+        """Test that the fast JSON path serializes exactly like TaskResponse."""
+        service = TaskService(db_session)
+        service.repository.create_many([TaskCreate(titulo="Other")])
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            body, next_cursor = service.get_tasks_page_json(limit=1)
+        tasks, expected_cursor = service.get_tasks_page(limit=1)
+
+        assert body == f"[{tasks[0].model_dump_json()}]".encode()
+        assert next_cursor == expected_cursor
+        assert list(TaskRow.__annotations__) == list(TaskResponse.model_fields)
+
     def test_get_task(self, db_session, sample_task):
         """Test getting a task through service."""
         service = TaskService(db_session)
@@ -40,6 +144,21 @@ class TestTaskService:
         assert task_response.id == sample_task.id
         assert task_response.titulo == sample_task.titulo
 
+    def test_get_task_from_read_replica(self, db_session, replica_session):
+        """Test that reads use the replica session while writes use the primary."""
+        replica_task = Task(titulo="Replica Task")
+        replica_session.add(replica_task)
+        replica_session.commit()
+        service = TaskService(db_session, read_db=replica_session)
+
+        assert service.get_task(replica_task.id).titulo == "Replica Task"
+        assert [task.titulo for task in service.get_all_tasks()] == ["Replica Task"]
+
+        with patch("app.services.task_service.rabbitmq_service.publish_task_event"):
+            created = service.create_task(TaskCreate(titulo="Primary Task"))
+
+        assert db_session.get(Task, created.id).titulo == "Primary Task"
+
     def test_get_nonexistent_task(self, db_session):
         """Test getting a task that doesn't exist."""
         service = TaskService(db_session)
@@ -77,7 +196,9 @@ class TestTaskService:
                 "app.services.task_service.rabbitmq_service.publish_task_event"
             ) as mock_publish,
         ):
-            updated_task = await service.update_task(sample_task.id, update_data)
+            updated_task = await run_in_threadpool(
+                service.update_task, sample_task.id, update_data
+            )
 
             assert updated_task.status == TaskStatus.COMPLETED
 
@@ -102,7 +223,9 @@ class TestTaskService:
                 "app.services.task_service.rabbitmq_service.publish_task_event"
             ) as mock_publish,
         ):
-            updated_task = await service.update_task(sample_task.id, update_data)
+            updated_task = await run_in_threadpool(
+                service.update_task, sample_task.id, update_data
+            )
 
             assert updated_task.titulo == "Updated Title"
 
@@ -110,6 +233,37 @@ class TestTaskService:
 
             mock_publish.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_update_task_query_count(self, db_session, sample_task):
+        """Test that an update no longer re-reads the task before and after."""
+        service = TaskService(db_session)
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            with (
+                patch(
+                    "app.services.task_service.teams_service.send_task_completion_notification"
+                ),
+                patch("app.services.task_service.rabbitmq_service.publish_task_event"),
+            ):
+                await run_in_threadpool(
+                    service.update_task,
+                    sample_task.id,
+                    TaskUpdate(status=TaskStatus.COMPLETED),
+                )
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+
+        # Previously 4 (get_by_id twice, UPDATE, refresh). PostgreSQL does it in
+        # one UPDATE ... RETURNING; SQLite needs to read the old status first.
+        expected = 1 if engine.dialect.name == "postgresql" else 2
+        assert len(statements) == expected
+
     def test_delete_task(self, db_session, sample_task):
         """Test deleting a task through service."""
         service = TaskService(db_session)
@@ -125,6 +279,285 @@ class TestTaskService:
             call_args = mock_publish.call_args
             assert call_args[0][0] == "task_deleted"
 
+    def test_delete_nonexistent_task(self, db_session):
+        """Test deleting a task that doesn't exist publishes nothing."""
+        service = TaskService(db_session)
+
+        with patch(
+            "app.services.task_service.rabbitmq_service.publish_task_event"
+        ) as mock_publish:
+            assert service.delete_task(999) is False
+
+            mock_publish.assert_not_called()
+
+
+class TestTaskCache:
+    @pytest.fixture
+    def cache(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        with (
+            patch("app.services.task_service.task_cache", cache),
+            patch("app.services.async_task_service.task_cache", cache),
+        ):
+            yield cache
+
+    def test_get_task_reads_through_cache(self, db_session, sample_task, cache):
+        """Test that repeated reads of a task are served from the cache."""
+        service = TaskService(db_session)
+
+        with patch.object(
+            service.read_repository,
+            "get_by_id",
+            wraps=service.read_repository.get_by_id,
+        ) as mock_get:
+            first = service.get_task(sample_task.id)
+            second = service.get_task(sample_task.id)
+
+        assert first == second
+        mock_get.assert_called_once()
+        assert cache.stats()["hits"] == 1
+
+    def test_get_task_fields_uses_cached_task(self, db_session, sample_task, cache):
+        """Test that a cached task answers partial reads without a query."""
+        service = TaskService(db_session)
+        service.get_task(sample_task.id)
+
+        with patch.object(service.read_repository, "get_fields_by_id") as mock_get:
+            body, etag = service.get_task_fields(sample_task.id, ("status",))
+
+        mock_get.assert_not_called()
+        assert json.loads(body) == {"status": "pendente"}
+        assert etag == service.get_task_etag(sample_task.id, ("status",))
+
+    async def test_update_and_delete_invalidate(self, db_session, sample_task, cache):
+        """Test that writes drop the cached task."""
+        service = TaskService(db_session)
+        service.get_task(sample_task.id)
+
+        with patch("app.services.task_service.rabbitmq_service.publish_task_event"):
+            await run_in_threadpool(
+                service.update_task, sample_task.id, TaskUpdate(titulo="Renamed")
+            )
+            assert service.get_task(sample_task.id).titulo == "Renamed"
+
+            service.delete_task(sample_task.id)
+            assert service.get_task(sample_task.id) is None
+
+    async def test_async_service_uses_cache(self, async_db_session, sample_task, cache):
+        """Test that the asyncio service shares the task cache."""
+        service = AsyncTaskService(async_db_session)
+
+        await service.get_task(sample_task.id)
+
+        assert cache.get(sample_task.id).titulo == sample_task.titulo
+
+    def test_invalidator_drops_updated_and_deleted_tasks(self, cache):
+        """Test that events from other workers invalidate cache entries."""
+        invalidator = TaskCacheInvalidator(cache)
+        for task_id in (1, 2, 3):
+            cache.set(task_id, f"task {task_id}")
+
+        for event_type, task_id in [
+            ("task_created", 1),
+            ("task_updated", 2),
+            ("task_deleted", 3),
+        ]:
+            body = json.dumps({"event_type": event_type, "task_data": {"id": task_id}})
+            invalidator.process_message(None, None, None, body.encode())
+        invalidator.process_message(None, None, None, b"not json")
+
+        assert [cache.get(task_id) for task_id in (1, 2, 3)] == ["task 1", None, None]
+
+
+class TestOutbox:
+    @pytest.fixture(autouse=True)
+    def outbox_enabled(self):
+        with patch("app.services.task_service.settings.task_events_outbox", True):
+            yield
+
+    @staticmethod
+    def outbox_events(db_session):
+        return db_session.execute(
+            select(
+                OutboxEvent.task_id, OutboxEvent.event_type, OutboxEvent.body
+            ).order_by(OutboxEvent.id)
+        ).all()
+
+    async def test_writes_go_to_outbox(self, db_session):
+        """Test that writes store their events instead of publishing them."""
+        service = TaskService(db_session)
+
+        with (
+            patch("app.services.task_service.rabbitmq_service") as mock_rabbitmq,
+            patch(
+                "app.services.task_service.teams_service"
+                ".send_task_completion_notification",
+                new_callable=AsyncMock,
+            ),
+        ):
+            task = service.create_task(TaskCreate(titulo="Outbox"))
+            service.create_tasks([TaskCreate(titulo="Batch")])
+            await run_in_threadpool(
+                service.update_task, task.id, TaskUpdate(status=TaskStatus.COMPLETED)
+            )
+            service.delete_task(task.id)
+
+        assert not mock_rabbitmq.method_calls
+        events = self.outbox_events(db_session)
+        assert [(event.task_id, event.event_type) for event in events] == [
+            (task.id, "task_created"),
+            (task.id + 1, "task_created"),
+            (task.id, "task_updated"),
+            (task.id, "task_deleted"),
+        ]
+        message = json.loads(events[2].body)
+        assert message["task_data"]["status"] == "concluida"
+        assert message["task_data"]["old_status"] == "pendente"
+
+    def test_outbox_commits_with_the_task(self, db_session):
+        """Test that a failed outbox write rolls the task back with it."""
+        service = TaskService(db_session)
+
+        with (
+            patch("app.services.task_service.build_message", side_effect=ValueError),
+            pytest.raises(ValueError),
+        ):
+            service.create_tasks([TaskCreate(titulo="Lost")])
+        db_session.rollback()
+
+        assert db_session.query(Task).count() == 0
+        assert self.outbox_events(db_session) == []
+
+    async def test_async_service_writes_outbox(
+        self, async_db_session, db_session, sample_task
+    ):
+        """Test that the asyncio service stages events the same way."""
+        service = AsyncTaskService(async_db_session)
+
+        with patch(
+            "app.services.async_task_service.async_rabbitmq_service"
+        ) as mock_rabbitmq:
+            await service.delete_task(sample_task.id)
+
+        assert not mock_rabbitmq.method_calls
+        events = self.outbox_events(db_session)
+        assert [(event.task_id, event.event_type) for event in events] == [
+            (sample_task.id, "task_deleted")
+        ]
+
+
+class TestOutboxRelay:
+    @pytest.fixture
+    def relay(self, db_session):
+        relay = OutboxRelay(batch_size=2, session_factory=lambda: db_session)
+        relay.channel = Mock()
+        db_session.add_all(
+            OutboxEvent(
+                task_id=task_id,
+                event_type="task_updated",
+                body=build_message("task_updated", {"id": task_id, "status": f"e{i}"}),
+            )
+            for i, task_id in enumerate([1, 2, 1])
+        )
+        db_session.commit()
+        return relay
+
+    def test_relays_in_order_and_deletes(self, relay, db_session):
+        """Test batches are published in id order and removed once confirmed."""
+        assert relay.drain() == 3
+
+        publishes = [call.kwargs for call in relay.channel.basic_publish.call_args_list]
+        assert [
+            json.loads(publish["body"])["task_data"]["status"] for publish in publishes
+        ] == ["e0", "e1", "e2"]
+        assert [publish["routing_key"] for publish in publishes] == [
+            "task.updated.status.e0",
+            "task.updated.status.e1",
+            "task.updated.status.e2",
+        ]
+        assert db_session.query(OutboxEvent).count() == 0
+        assert relay.stats()["published"] == 3
+        assert relay.stats()["pending"] == 0
+
+    def test_stops_at_refused_event(self, relay, db_session):
+        """Test that a nack keeps that event and the ones after it for later."""
+        relay.channel.basic_publish.side_effect = [None, NackError([])]
+
+        assert relay.relay_batch() == 1
+
+        remaining = db_session.scalars(
+            select(OutboxEvent.body).order_by(OutboxEvent.id)
+        ).all()
+        assert [json.loads(body)["task_data"]["status"] for body in remaining] == [
+            "e1",
+            "e2",
+        ]
+        assert relay.stats()["refused"] == 1
+        assert relay.stats()["pending"] == 2
+
+
+class TestAsyncTaskService:
+    async def test_get_tasks_page_json(self, async_db_session, sample_task):
+        """Test the fast JSON path through the asyncio service."""
+        service = AsyncTaskService(async_db_session)
+
+        body, next_cursor = await service.get_tasks_page_json()
+
+        assert json.loads(body)[0]["id"] == sample_task.id
+        assert next_cursor is None
+
+    async def test_create_task(self, async_db_session):
+        """Test creating a task through the asyncio service."""
+        service = AsyncTaskService(async_db_session)
+
+        with patch(
+            "app.services.async_task_service.async_rabbitmq_service.publish_task_event"
+        ) as mock_publish:
+            task_response = await service.create_task(TaskCreate(titulo="Async"))
+
+            assert task_response.titulo == "Async"
+            assert task_response.data_criacao is not None
+
+            mock_publish.assert_called_once()
+            assert mock_publish.call_args[0][0] == "task_created"
+
+    async def test_update_task_status_to_completed(self, async_db_session, sample_task):
+        """Test completing a task through the asyncio service."""
+        service = AsyncTaskService(async_db_session)
+
+        with (
+            patch(
+                "app.services.async_task_service.teams_service.send_task_completion_notification"
+            ) as mock_teams,
+            patch(
+                "app.services.async_task_service.async_rabbitmq_service.publish_task_event"
+            ) as mock_publish,
+        ):
+            updated_task = await service.update_task(
+                sample_task.id, TaskUpdate(status=TaskStatus.COMPLETED)
+            )
+
+            assert updated_task.status == TaskStatus.COMPLETED
+
+            mock_teams.assert_called_once()
+
+            mock_publish.assert_called_once()
+            event_type, event_data = mock_publish.call_args[0]
+            assert event_type == "task_updated"
+            assert event_data["old_status"] == TaskStatus.PENDING.value
+
+    async def test_delete_task(self, async_db_session, sample_task):
+        """Test deleting a task through the asyncio service."""
+        service = AsyncTaskService(async_db_session)
+
+        with patch(
+            "app.services.async_task_service.async_rabbitmq_service.publish_task_event"
+        ) as mock_publish:
+            assert await service.delete_task(sample_task.id) is True
+            assert await service.get_task(sample_task.id) is None
+
+            mock_publish.assert_called_once()
+
 
 class TestTeamsService:
     @pytest.mark.asyncio
@@ -191,45 +624,698 @@ class TestTeamsService:
             mock_log.assert_called_once()
 
 
-class TestRabbitMQService:
-    def test_publish_task_event(self):
-        """Test publishing task event."""
-        service = RabbitMQService()
+class TestTaskEvents:
+    def test_task_event_routing_keys(self):
+        """Test the routing keys consumers bind to."""
+        assert task_event_routing_key("task_created", {"id": 1}) == "task.created"
+        assert (
+            task_event_routing_key("task_updated", {"id": 1, "status": "concluida"})
+            == "task.updated.status.concluida"
+        )
+        assert task_event_routing_key("task_deleted", {"id": 1}) == "task.deleted"
 
-        with (
-            patch.object(service, "channel") as mock_channel,
-            patch.object(service, "connect"),
-        ):
-            mock_channel.basic_publish = Mock()
+    def test_events_round_trip_in_both_encodings(self):
+        """Test the envelope in JSON and in MessagePack with native timestamps."""
+        created = datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc)
+        event = build_event(
+            "task_created", {"id": 1, "status": "pendente", "data_criacao": created}
+        )
 
-            event_type = "task_created"
-            task_data = {"id": 1, "titulo": "Test Task"}
+        as_json = encode_event(event, JSON_MEDIA_TYPE)
+        as_msgpack = encode_event(event, MSGPACK_MEDIA_TYPE)
 
-            service.publish_task_event(event_type, task_data)
+        assert decode_event(as_json, JSON_MEDIA_TYPE)["timestamp"] == str(created)
+        decoded = decode_event(as_msgpack, MSGPACK_MEDIA_TYPE)
+        assert decoded == event
+        assert decoded["version"] == 1
+        assert len(as_msgpack) < len(as_json)
 
-            mock_channel.basic_publish.assert_called_once()
+    def test_decode_negotiates_by_content_type(self):
+        """Test that legacy bodies read as JSON and unknown ones are refused."""
+        legacy = json.dumps({"event_type": "task_created", "task_data": {"id": 1}})
 
-    def test_publish_event_no_connection(self):
-        """Test publishing event when not connected."""
-        service = RabbitMQService()
+        assert decode_event(legacy.encode())["task_data"] == {"id": 1}
+        with pytest.raises(UnsupportedEvent):
+            decode_event(legacy.encode(), "text/plain")
+        with pytest.raises(UnsupportedEvent):
+            decode_event(json.dumps({"version": 2}).encode(), JSON_MEDIA_TYPE)
+        with pytest.raises(UnsupportedEvent):
+            TaskEventPublisher(content_type="text/plain")
 
-        with patch.object(service, "connect") as mock_connect:
-            service.channel = None
+    def test_topic_exchange_feeds_legacy_queue(self):
+        """Test that the fanout exchange and its queue still get every event."""
+        channel = Mock()
 
-            service.publish_task_event("test_event", {"test": "data"})
+        declare_task_events(channel)
 
-            mock_connect.assert_called_once()
+        channel.exchange_bind.assert_called_once_with(
+            destination="task_events",
+            source=TASK_EVENTS_TOPIC_EXCHANGE,
+            routing_key="#",
+        )
+        channel.queue_bind.assert_called_once_with(
+            queue="task_events", exchange="task_events"
+        )
 
-    def test_publish_event_error(self):
-        """Test publishing event with error."""
-        service = RabbitMQService()
 
-        with (
-            patch.object(service, "channel") as mock_channel,
-            patch("app.services.rabbitmq_service.logger.error") as mock_log,
-        ):
-            mock_channel.basic_publish.side_effect = Exception("RabbitMQ Error")
+class TestTaskEventPublisher:
+    def test_publishes_each_task_events_in_order(self):
+        """Test that sharded workers publish every event, in order per task."""
+        publisher = TaskEventPublisher(threads=2, buffer_size=100)
+        with patch(
+            "app.services.rabbitmq_service.pika.BlockingConnection"
+        ) as mock_connection:
+            channel = mock_connection.return_value.channel.return_value
+            events = [
+                ("task_updated", {"id": task_id, "status": step})
+                for step in range(5)
+                for task_id in (1, 2, 3)
+            ]
 
-            service.publish_task_event("test_event", {"test": "data"})
+            assert publisher.publish_task_events(events) == 15
+            publisher.stop()
 
-            mock_log.assert_called_once()
+        publishes = [call.kwargs for call in channel.basic_publish.call_args_list]
+        messages = [json.loads(publish["body"])["task_data"] for publish in publishes]
+        assert len(messages) == 15
+        assert {publish["exchange"] for publish in publishes} == {
+            TASK_EVENTS_TOPIC_EXCHANGE
+        }
+        assert all(
+            publish["routing_key"] == f"task.updated.status.{message['status']}"
+            for publish, message in zip(publishes, messages, strict=True)
+        )
+        for task_id in (1, 2, 3):
+            steps = [m["status"] for m in messages if m["id"] == task_id]
+            assert steps == list(range(5))
+        assert mock_connection.call_count == 2
+        assert publisher.stats()["published"] == 15
+
+    def test_drops_events_when_buffer_is_full(self):
+        """Test that a full buffer drops events instead of blocking the caller."""
+        publisher = TaskEventPublisher(threads=1, buffer_size=2)
+        # Workers that are never started keep their buffer full
+        publisher.workers = [PublisherWorker(0, 2, publisher.breaker, publisher.meter)]
+
+        accepted = publisher.publish_task_events(
+            [("task_created", {"id": i}) for i in range(3)]
+        )
+
+        assert accepted == 2
+        assert publisher.publish_task_event("task_created", {"id": 4}) is False
+        stats = publisher.stats()
+        assert (stats["buffered"], stats["dropped"]) == (2, 2)
+
+    def test_blocking_publisher_waits_for_room(self):
+        """Test that a blocking publisher outruns its buffer without dropping."""
+        publisher = TaskEventPublisher(threads=1, buffer_size=2, block=True)
+        with patch(
+            "app.services.rabbitmq_service.pika.BlockingConnection"
+        ) as mock_connection:
+            channel = mock_connection.return_value.channel.return_value
+            accepted = publisher.publish_task_events(
+                [("task_created", {"id": i}) for i in range(20)]
+            )
+            unpublished = publisher.stop(timeout=2)
+
+        assert (accepted, unpublished, publisher.dropped) == (20, 0, 0)
+        assert channel.basic_publish.call_count == 20
+
+    def test_failed_publish_is_retried(self):
+        """Test that events stay pending until a publish succeeds."""
+        worker = PublisherWorker(
+            0, 10, CircuitBreaker(3, 60), RateMeter(), retry_seconds=0
+        )
+        worker.buffer.put_nowait(("task.created", b"event"))
+        with patch(
+            "app.services.rabbitmq_service.pika.BlockingConnection"
+        ) as mock_connection:
+            channel = mock_connection.return_value.channel.return_value
+            channel.basic_publish.side_effect = [Exception("RabbitMQ Error"), None]
+            worker.start()
+            assert wait_for(lambda: worker.meter.total == 1)
+            worker.stop(timeout=2)
+
+        assert (worker.failures, len(worker.pending)) == (1, 0)
+        assert mock_connection.call_count == 2
+
+    def test_breaker_opens_while_rabbitmq_is_down(self):
+        """Test that failed connections open the breaker and keep events buffered."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        publisher = TaskEventPublisher(threads=1, breaker=breaker)
+        with patch(
+            "app.services.rabbitmq_service.pika.BlockingConnection",
+            side_effect=AMQPConnectionError("refused"),
+        ) as mock_connection:
+            publisher.publish_task_event("task_created", {"id": 1})
+            deadline = time.monotonic() + 2
+            while breaker.state != "open" and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            stats = publisher.stats()
+            unpublished = publisher.stop(timeout=2)
+
+        assert stats["breaker"]["state"] == "open"
+        assert unpublished == 1
+        assert (stats["buffered"], stats["failures"]) == (1, 1)
+        mock_connection.assert_called_once()
+
+
+class TestAsyncTaskEventPublisher:
+    @staticmethod
+    def connected(publisher, exchange):
+        async def connect():
+            publisher.connection = Mock(is_closed=False, close=AsyncMock())
+            publisher.exchange = exchange
+
+        return patch.object(publisher, "_connect", side_effect=connect)
+
+    async def test_flushes_queued_events_in_order(self):
+        """Test that queued events are published in order and flushed on close."""
+        publisher = AsyncTaskEventPublisher(flush_seconds=0.01, flush_size=3)
+        exchange = AsyncMock()
+        with self.connected(publisher, exchange):
+            await publisher.start()
+            accepted = publisher.publish_task_events(
+                [("task_created", {"id": i}) for i in range(5)]
+            )
+            await publisher.close()
+
+        assert accepted == 5
+        ids = [
+            json.loads(call.args[0].body)["task_data"]["id"]
+            for call in exchange.publish.call_args_list
+        ]
+        assert ids == list(range(5))
+        assert publisher.stats()["published"] == 5
+
+    async def test_retries_unconfirmed_events(self):
+        """Test that events the broker did not confirm are sent again."""
+        publisher = AsyncTaskEventPublisher(flush_seconds=0.01, retry_seconds=0)
+        exchange = AsyncMock()
+        exchange.publish.side_effect = [Exception("nack"), None, None]
+        with self.connected(publisher, exchange):
+            await publisher.start()
+            publisher.publish_task_event("task_created", {"id": 1})
+            publisher.publish_task_event("task_created", {"id": 2})
+            await publisher.close()
+
+        assert exchange.publish.call_count == 3
+        stats = publisher.stats()
+        assert (stats["published"], stats["failures"]) == (2, 1)
+
+    async def test_close_flushes_the_event_waiting_for_a_batch(self):
+        """Test that an event taken from the queue still counts as buffered."""
+        publisher = AsyncTaskEventPublisher(flush_seconds=10, flush_size=3)
+        exchange = AsyncMock()
+        with self.connected(publisher, exchange):
+            await publisher.start()
+            publisher.publish_task_event("task_created", {"id": 1})
+            # The flush task takes the event and waits for the batch to fill
+            for _ in range(3):
+                await asyncio.sleep(0)
+            assert publisher._queue.empty() and publisher.buffered == 1
+            await publisher.close()
+
+        exchange.publish.assert_awaited_once()
+        assert publisher.stats()["published"] == 1
+
+    def test_drops_events_before_start(self):
+        """Test that events published before the lifespan started are counted."""
+        publisher = AsyncTaskEventPublisher()
+
+        assert publisher.publish_task_event("task_created", {"id": 1}) is False
+        assert publisher.stats()["dropped"] == 1
+
+
+class TestTaskEventConsumer:
+    @staticmethod
+    def deliver(consumer, tag, body=None):
+        body = body or json.dumps({"event_type": "task_created", "task_data": {}})
+        consumer.process_message(
+            consumer.channel, Mock(delivery_tag=tag), None, body.encode()
+        )
+
+    def make_consumer(self, handler, batch_size=3):
+        consumer = TaskEventConsumer(
+            handler=handler, prefetch_count=10, batch_size=batch_size
+        )
+        consumer.connection = Mock()
+        consumer.channel = Mock()
+        return consumer
+
+    def test_full_batch_is_acked_at_once(self):
+        """Test that a full batch is handled together and acked with multiple=True."""
+        handler = Mock(return_value=None)
+        consumer = self.make_consumer(handler)
+
+        for tag in (1, 2, 3):
+            self.deliver(consumer, tag)
+
+        handler.assert_called_once()
+        assert len(handler.call_args.args[0]) == 3
+        consumer.channel.basic_ack.assert_called_once_with(
+            delivery_tag=3, multiple=True
+        )
+        consumer.connection.remove_timeout.assert_called_once()
+        assert consumer.meter.total == 3
+
+    def test_own_queue_binds_selected_routing_keys(self):
+        """Test a consumer queue bound to some events, with its own retries."""
+        consumer = TaskEventConsumer(
+            handler=Mock(side_effect=ValueError("boom")),
+            batch_size=1,
+            max_attempts=3,
+            queue="task_events.audit",
+            bindings=["task.deleted", "task.updated.status.*"],
+        )
+        with patch(
+            "app.consumers.task_consumer.pika.BlockingConnection"
+        ) as mock_connection:
+            consumer.connect()
+        channel = consumer.channel
+
+        channel.queue_declare.assert_any_call(queue="task_events.audit", durable=True)
+        assert [
+            c.kwargs["routing_key"]
+            for c in channel.queue_bind.call_args_list
+            if c.kwargs["queue"] == "task_events.audit"
+        ] == ["task.deleted", "task.updated.status.*"]
+        declared = [c.kwargs["queue"] for c in channel.queue_declare.call_args_list]
+        assert "task_events.audit.retry.1000" in declared
+        assert "task_events.audit.dead" in declared
+
+        consumer.connection = mock_connection.return_value
+        self.deliver(consumer, 1)
+        assert channel.basic_publish.call_args.kwargs["routing_key"] == (
+            "task_events.audit.retry.1000"
+        )
+
+        with pytest.raises(ValueError):
+            TaskEventConsumer(bindings=["task.deleted"])
+        # Projecting a subset of the events would count them twice
+        with pytest.raises(ValueError):
+            TaskEventConsumer(queue="task_events.audit", bindings=["task.deleted"])
+
+    def test_partial_batch_flushes_on_timeout(self):
+        """Test that the batch timer flushes a batch that never fills up."""
+        handler = Mock(return_value=None)
+        consumer = self.make_consumer(handler)
+
+        self.deliver(consumer, 1)
+        handler.assert_not_called()
+        delay, callback = consumer.connection.call_later.call_args.args
+        assert delay == 0.2
+
+        callback()
+
+        handler.assert_called_once()
+        consumer.channel.basic_ack.assert_called_once_with(
+            delivery_tag=1, multiple=True
+        )
+
+    def test_decodes_by_content_type(self):
+        """Test MessagePack events are handled and unknown encodings parked."""
+        handler = Mock(return_value=None)
+        consumer = self.make_consumer(handler, batch_size=1)
+        updated = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        event = build_event("task_updated", {"id": 1, "data_atualizacao": updated})
+
+        consumer.process_message(
+            consumer.channel,
+            Mock(delivery_tag=1),
+            pika.BasicProperties(content_type=MSGPACK_MEDIA_TYPE),
+            encode_event(event, MSGPACK_MEDIA_TYPE),
+        )
+        consumer.process_message(
+            consumer.channel,
+            Mock(delivery_tag=2),
+            pika.BasicProperties(content_type="application/xml"),
+            b"<event/>",
+        )
+
+        assert handler.call_args.args[0][0]["timestamp"] == updated
+        dead = consumer.channel.basic_publish.call_args.kwargs
+        assert dead["routing_key"] == "task_events.dead"
+        assert dead["properties"].content_type == "application/xml"
+
+    def test_failed_events_are_retried_then_dead_lettered(self):
+        """Test that only failing events are retried, and parked when out of attempts."""
+
+        def handler(events):
+            if any(event["task_data"].get("poison") for event in events):
+                raise ValueError("poison")
+
+        consumer = TaskEventConsumer(handler=handler, batch_size=2, max_attempts=3)
+        consumer.connection = Mock()
+        consumer.channel = Mock()
+        poison = json.dumps({"event_type": "task_created", "task_data": {"poison": 1}})
+
+        self.deliver(consumer, 1, "not json")
+        self.deliver(consumer, 2, poison)
+        self.deliver(consumer, 3)
+        consumer.process_message(
+            consumer.channel,
+            Mock(delivery_tag=4),
+            pika.BasicProperties(headers={"x-attempts": 2}),
+            poison.encode(),
+        )
+        consumer.flush()
+
+        publishes = consumer.channel.basic_publish.call_args_list
+        assert [call.kwargs["routing_key"] for call in publishes] == [
+            "task_events.dead",
+            "task_events.retry.1000",
+            "task_events.dead",
+        ]
+        headers = publishes[1].kwargs["properties"].headers
+        assert headers["x-attempts"] == 1
+        assert headers["x-last-error"] == "ValueError: poison"
+        assert consumer.channel.basic_ack.call_args_list == [
+            call(delivery_tag=1),
+            call(delivery_tag=3, multiple=True),
+            call(delivery_tag=4, multiple=True),
+        ]
+        assert (consumer.retried, consumer.dead_lettered) == (1, 2)
+        consumer.channel.basic_nack.assert_not_called()
+
+    def test_duplicate_events_are_acked_without_handling(self, db_session):
+        """Test that redelivered events are skipped, within and across batches."""
+        handler = Mock(return_value=None)
+        consumer = self.make_consumer(handler, batch_size=3)
+        consumer.dedup = EventDeduplicator(
+            session_factory=sessionmaker(bind=db_session.get_bind())
+        )
+        first = build_message("task_created", {"id": 1})
+        second = build_message("task_created", {"id": 2})
+
+        for tag, body in enumerate((first, second, first), start=1):
+            self.deliver(consumer, tag, body)
+        for tag, body in enumerate((second, first), start=4):
+            self.deliver(consumer, tag, body)
+        consumer.flush()
+
+        assert [len(c.args[0]) for c in handler.call_args_list] == [2]
+        assert consumer.channel.basic_ack.call_args_list == [
+            call(delivery_tag=3, multiple=True),
+            call(delivery_tag=5, multiple=True),
+        ]
+        assert consumer.dedup.stats()["duplicates"] == 2
+
+    def test_ids_recorded_by_the_handler_are_not_written_again(self):
+        """Test that only ids the handler did not record reach the dedup table."""
+        first = json.loads(build_message("task_created", {"id": 1}))
+        second = json.loads(build_message("task_created", {"id": 2}))
+        consumer = self.make_consumer(
+            Mock(return_value=[first["event_id"]]), batch_size=2
+        )
+        consumer.dedup = Mock(seen=Mock(return_value=set()))
+
+        for tag, message in enumerate((first, second), start=1):
+            self.deliver(consumer, tag, json.dumps(message))
+
+        consumer.dedup.mark.assert_called_once_with(
+            [first["event_id"], second["event_id"]], recorded={first["event_id"]}
+        )
+
+    def test_stop_after_connection_lost(self):
+        """Test that stopping a consumer whose connection closed does not raise."""
+        consumer = self.make_consumer(Mock())
+        consumer.connection.add_callback_threadsafe.side_effect = (
+            ConnectionWrongStateError("Channel is closed")
+        )
+
+        consumer.stop()
+
+        assert consumer._stopping.is_set()
+
+    def test_stop_drains_pending_batch(self):
+        """Test that a stopped consumer acks the batch it holds and disconnects."""
+        handler = Mock(return_value=None)
+        consumer = self.make_consumer(handler)
+        self.deliver(consumer, 1)
+
+        consumer.stop()
+        consumer.start_consuming()
+
+        consumer.channel.start_consuming.assert_not_called()
+        consumer.channel.basic_ack.assert_called_once_with(
+            delivery_tag=1, multiple=True
+        )
+        consumer.connection.close.assert_called_once()
+
+
+def crashing_worker(index, threads, processed):
+    sys.exit(1)
+
+
+def draining_worker(index, threads, processed):
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+    processed.value = 1
+    while not stopping:
+        time.sleep(0.01)
+    processed.value = 5
+
+
+class LostConnectionConsumer(TaskEventConsumer):
+    """Consumer whose connection drops as soon as it starts consuming."""
+
+    def start_consuming(self):
+        self.channel = Mock()
+        self.connection = Mock(is_closed=True)
+        self.connection.add_callback_threadsafe.side_effect = ConnectionWrongStateError(
+            "Channel is closed"
+        )
+        raise StreamLostError("Transport indicated EOF")
+
+
+class BlockingConsumer(TaskEventConsumer):
+    """Consumer that consumes until ``stop`` reaches it through its connection."""
+
+    def start_consuming(self):
+        stopped = threading.Event()
+        self.channel = Mock(stop_consuming=stopped.set)
+        self.connection = Mock(is_closed=False)
+        self.connection.add_callback_threadsafe.side_effect = lambda callback: (
+            callback()
+        )
+        stopped.wait()
+
+
+def worker_losing_a_consumer(index, threads, processed):
+    consumers = iter([LostConnectionConsumer, BlockingConsumer])
+    with patch(
+        "app.consumers.supervisor.TaskEventConsumer",
+        side_effect=lambda **kwargs: next(consumers)(**kwargs),
+    ):
+        run_worker(index, threads, processed)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestConsumerSupervisor:
+    def test_restarts_crashed_workers(self):
+        """Test that workers that exit are started again."""
+        supervisor = ConsumerSupervisor(1, 1, restart_seconds=0, target=crashing_worker)
+        supervisor.spawn(0)
+
+        def restarted():
+            supervisor.check_workers()
+            return supervisor.restarts[0] >= 2
+
+        assert wait_for(restarted)
+        supervisor.shutdown()
+
+    def test_worker_exits_when_a_consumer_dies(self):
+        """Test that a dead consumer stops its siblings and fails the worker."""
+        supervisor = ConsumerSupervisor(1, 2, target=worker_losing_a_consumer)
+        supervisor.spawn(0)
+        process = supervisor.processes[0]
+
+        process.join(timeout=5)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+        assert process.exitcode == 1
+
+    def test_shutdown_lets_workers_drain(self):
+        """Test that shutdown sends SIGTERM and waits for workers to finish."""
+        supervisor = ConsumerSupervisor(2, 1, grace_seconds=5, target=draining_worker)
+        for index in range(2):
+            supervisor.spawn(index)
+        assert wait_for(lambda: all(c.value == 1 for c in supervisor.processed))
+
+        supervisor.shutdown()
+
+        assert [p.exitcode for p in supervisor.processes] == [0, 0]
+        rates = supervisor.rates()
+        assert [rate["processed"] for rate in rates] == [5, 5]
+        assert all(rate["restarts"] == 0 for rate in rates)
+
+    def test_own_queue_needs_a_handler(self):
+        """Test that a queue of its own is not consumed with the projections."""
+        with pytest.raises(SystemExit):
+            supervisor_main(["--queue", "task_events.audit", "--bind", "task.deleted"])
+        with pytest.raises(SystemExit):
+            supervisor_main(["--queue", "task_events.audit", "--handler", "json"])
+
+        assert load_handler("app.consumers.projections:project_events") is (
+            project_events
+        )
+
+
+class TestDeadLetters:
+    @staticmethod
+    def dead_channel(count=2):
+        channel = Mock()
+        channel.basic_get.side_effect = [
+            (
+                Mock(delivery_tag=tag),
+                pika.BasicProperties(
+                    headers={"x-attempts": 5, "x-last-error": "ValueError: boom"}
+                ),
+                json.dumps(
+                    {"event_type": "task_created", "task_data": {"id": tag}}
+                ).encode(),
+            )
+            for tag in range(1, count + 1)
+        ] + [(None, None, None)]
+        return channel
+
+    def test_retry_topology(self):
+        """Test one TTL queue per retry delay, dead-lettering into the work queue."""
+        channel = Mock()
+
+        declare_retry_topology(channel, max_attempts=3)
+
+        declared = {
+            c.kwargs["queue"]: c.kwargs.get("arguments")
+            for c in channel.queue_declare.call_args_list
+        }
+        assert list(declared) == [
+            "task_events.retry.1000",
+            "task_events.retry.2000",
+            "task_events.dead",
+        ]
+        assert declared["task_events.retry.2000"] == {
+            "x-message-ttl": 2000,
+            "x-dead-letter-exchange": "",
+            "x-dead-letter-routing-key": "task_events",
+        }
+
+    def test_browse_leaves_events_in_queue(self):
+        """Test that listing dead letters requeues them all with one nack."""
+        channel = self.dead_channel()
+
+        entries = DeadLetters(channel).browse(limit=10)
+
+        assert [entry["event"]["task_data"]["id"] for entry in entries] == [1, 2]
+        assert entries[0]["attempts"] == 5
+        assert entries[0]["error"] == "ValueError: boom"
+        channel.basic_nack.assert_called_once_with(
+            delivery_tag=2, multiple=True, requeue=True
+        )
+
+    def test_replay_resets_attempts(self):
+        """Test that replayed events go back to the work queue with fresh attempts."""
+        channel = self.dead_channel()
+
+        assert DeadLetters(channel).replay() == 2
+
+        publish = channel.basic_publish.call_args_list[0].kwargs
+        assert publish["routing_key"] == "task_events"
+        assert publish["properties"].headers == {}
+        assert channel.basic_ack.call_count == 2
+
+
+class TestProjectionHandler:
+    def test_events_and_their_ids_commit_together(self, db_session):
+        """Test that projections and dedup records are written in one transaction."""
+        events = [
+            json.loads(build_message("task_created", {"id": i, "status": "pendente"}))
+            for i in (1, 2)
+        ]
+        session_factory = sessionmaker(bind=db_session.get_bind())
+
+        returned = project_events(events, session_factory)
+
+        recorded = set(db_session.scalars(select(ProcessedEvent.event_id)))
+        assert recorded == set(returned) == {event["event_id"] for event in events}
+        assert ProjectionRepository(db_session).status_counts()["pendente"] == 2
+
+        events.append({"event_type": "task_created", "task_data": {"id": 3}})
+        with pytest.raises(KeyError):
+            project_events(events, session_factory)
+        assert ProjectionRepository(db_session).status_counts()["pendente"] == 2
+
+
+class TestEventDeduplicator:
+    @staticmethod
+    def make(db_session, **kwargs):
+        return EventDeduplicator(
+            session_factory=sessionmaker(bind=db_session.get_bind()), **kwargs
+        )
+
+    def test_event_ids_are_unique(self):
+        """Test that every published event carries its own event_id."""
+        ids = {
+            json.loads(build_message("task_created", {"id": 1}))["event_id"]
+            for _ in range(100)
+        }
+        assert len(ids) == 100
+
+    def test_lookups_use_cache_then_table(self, db_session):
+        """Test that ids recorded by another consumer are found in the table."""
+        self.make(db_session).mark(["a", "b"])
+        dedup = self.make(db_session)
+
+        assert dedup.seen({"a", "c"}) == {"a"}
+        assert dedup.seen({"a"}) == {"a"}
+
+        stats = dedup.stats()
+        assert (stats["db_hits"], stats["cache_hits"]) == (1, 1)
+        assert stats["hit_rate"] == pytest.approx(2 / 3, abs=1e-4)
+
+    def test_recorded_ids_only_go_to_the_cache(self, db_session):
+        """Test that ids a handler already stored are not inserted again."""
+        dedup = self.make(db_session)
+
+        dedup.mark(["a", "b"], recorded=["a"])
+
+        assert db_session.scalars(select(ProcessedEvent.event_id)).all() == ["b"]
+        assert dedup.seen({"a", "b"}) == {"a", "b"}
+
+    def test_consumers_of_other_queues_are_independent(self, db_session):
+        """Test that ids one queue's consumer handled are new to another's."""
+        self.make(db_session).mark(["a"])
+        audit = self.make(db_session, consumer="task_events.audit")
+
+        assert audit.seen({"a"}) == set()
+        audit.mark(["a"])
+        assert self.make(db_session).seen({"a"}) == {"a"}
+        assert len(db_session.scalars(select(ProcessedEvent.event_id)).all()) == 2
+
+    def test_old_ids_are_compacted(self, db_session):
+        """Test that ids older than the TTL are deleted from the table."""
+        db_session.add(
+            ProcessedEvent(
+                consumer=TASK_EVENTS_QUEUE,
+                event_id="old",
+                processed_at=datetime.now(timezone.utc) - timedelta(hours=2),
+            )
+        )
+        db_session.commit()
+        dedup = self.make(db_session, ttl_seconds=3600)
+
+        dedup.mark(["new"])
+
+        remaining = db_session.scalars(select(ProcessedEvent.event_id)).all()
+        assert remaining == ["new"]
+        assert dedup.stats()["compacted"] == 1